@@ -1,3 +1,7 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from contextlib import suppress
 from logging.config import dictConfig
 
 from fastapi import Depends
@@ -5,48 +9,110 @@ from fastapi import FastAPI
 from fastapi import status
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.sessions import SessionMiddleware
 from starlette_context import plugins
 from starlette_context.middleware import RawContextMiddleware
 
 from app.config.catch_all_exception import catch_all_exception
+from app.config.compression import CompressionMiddleware
 from app.config.config import config
 from app.config.http import exception_error
 from app.config.http import validation_error
 from app.config.logs import LogConfig
+from app.config.logs import RateLimitFilter
+from app.config.logs import RequestContextFilter
+from app.config.logs import log_directory
+from app.config.logs import log_pipeline
+from app.config.metrics import app_metrics
+from app.config.profiling import ProfilingMiddleware
+from app.config.profiling import profile_store
+from app.config.response import FastJSONResponse
 from app.config.response import HTTPErrorResponse
 from app.config.response import HTTPException
+from app.config.static import PrecompressedStaticFiles
+from app.config.timing import TimedRoute
+from app.config.timing import TimingMiddleware
 from app.controller import client
 from app.controller.backoffice import router as bo_router
 from app.controller.client import router as client_router
-from app.controller.dependencies import get_user_repo
-from app.db.database import create_db_and_tables
-from app.db.session_hook import get_db
+from app.controller.dependencies import get_metrics_sampler
+from app.controller.dependencies import user_repo_session
+from app.controller.metrics import router as metrics_router
+from app.db.database import engine
+from app.db.instrumentation import QueryStatsMiddleware
 from app.domain.authorization import AuthorizationMiddleware
+from app.domain.idempotency import IdempotencyMiddleware
+from app.domain.idempotency import idempotency_store
+from app.utils.timing import latency_registry
 
-create_db_and_tables()
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # At startup rather than on import, importing the app touches neither the database nor the disk
+    if config.DATABASE_MIGRATE_ON_STARTUP:
+        # Alembic is only imported by the processes migrating
+        from app.db.migrations import upgrade_database
+
+        await run_in_threadpool(upgrade_database)
+    sampler = asyncio.create_task(get_metrics_sampler().run(interval=config.METRICS_SAMPLE_INTERVAL))
+    yield
+    sampler.cancel()
+    with suppress(asyncio.CancelledError):
+        await sampler
+    # Runs once the server has served the in-flight requests
+    engine.dispose()
+    log_pipeline.stop()
 
 
 def create_app():
-    main_app = FastAPI(title=config.SERVER_NAME)
+    main_app = FastAPI(title=config.SERVER_NAME, default_response_class=FastJSONResponse, lifespan=lifespan)
+    # Routes declared on the app itself are timed too
+    main_app.router.route_class = TimedRoute
 
-    dictConfig(LogConfig().model_dump())
+    os.makedirs(log_directory, exist_ok=True)
+    log_config = LogConfig(CONSOLE_FORMATTER="json" if config.LOG_JSON else "default")
+    dictConfig(log_config.model_dump())
+    log_pipeline.install(
+        log_config.SERVER_LOGGER,
+        max_size=config.LOG_QUEUE_SIZE,
+        filters=[
+            RateLimitFilter(
+                burst=config.LOG_RATE_LIMIT_BURST,
+                interval=config.LOG_RATE_LIMIT_INTERVAL,
+                sample_rate=config.LOG_SAMPLE_RATE,
+            ),
+            RequestContextFilter(),
+        ],
+    )
 
     # Static Folder
-    main_app.mount("/static", StaticFiles(directory="static"), name="static")
+    main_app.mount(
+        "/static",
+        PrecompressedStaticFiles(directory="static", max_age=config.STATIC_CACHE_MAX_AGE),
+        name="static",
+    )
     main_app.include_router(bo_router)
     main_app.include_router(client_router)
+    main_app.include_router(metrics_router)
 
-    # Route Context Configuration
+    main_app.middleware("http")(catch_all_exception)
+
+    # Runs inside the authorization middleware, so only authorized requests reserve keys
     main_app.add_middleware(
-        RawContextMiddleware,
-        plugins=(plugins.RequestIdPlugin(), plugins.CorrelationIdPlugin()),
+        IdempotencyMiddleware, store=idempotency_store, wait_timeout=config.IDEMPOTENCY_WAIT_TIMEOUT
     )
-    main_app.middleware("http")(catch_all_exception)
 
-    user_repo = get_user_repo(session=next(get_db()))
-    main_app.add_middleware(AuthorizationMiddleware, repo=user_repo)
+    # Within the authorization middleware, which tells whether the user is an admin
+    if config.PROFILING_ENABLED:
+        main_app.add_middleware(
+            ProfilingMiddleware,
+            store=profile_store,
+            interval=config.PROFILING_INTERVAL_MS / 1000,
+            sample_rate=config.PROFILING_SAMPLE_RATE,
+        )
+
+    main_app.add_middleware(AuthorizationMiddleware, repo_factory=user_repo_session)
 
     # Cors Middleware Configuration
     main_app.add_middleware(
@@ -57,6 +123,32 @@ def create_app():
         allow_headers=["*"],
     )
 
+    # Around the routes, authorization and CORS, so every response is compressed once it is final
+    main_app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=config.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=config.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=config.COMPRESSION_BROTLI_QUALITY,
+    )
+
+    # Within the timing middleware, which names the route of the request
+    main_app.add_middleware(QueryStatsMiddleware, repeat_threshold=config.N_PLUS_ONE_THRESHOLD)
+
+    # Around all but the context middleware, so the timings cover the whole stack and its compression
+    main_app.add_middleware(
+        TimingMiddleware,
+        registry=latency_registry,
+        metrics=app_metrics,
+        server_timing=config.SERVER_TIMING_ENABLED,
+    )
+
+    # Route Context Configuration
+    # Outermost, so the records logged by every middleware carry the request IDs
+    main_app.add_middleware(
+        RawContextMiddleware,
+        plugins=(plugins.RequestIdPlugin(), plugins.CorrelationIdPlugin()),
+    )
+
     # Endpoints
     # main_app.include_router(client.router)
 
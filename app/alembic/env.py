@@ -0,0 +1,54 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel
+
+from app.data import models  # noqa: F401, registers the tables on the metadata
+from app.db.database import engine
+
+config = context.config
+
+# Only when run by the alembic command, the server configures its own logging
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = SQLModel.metadata
+
+
+def _configure(dialect: str, **kwargs) -> None:
+    context.configure(
+        target_metadata=target_metadata,
+        # SQLite alters tables by copying them
+        render_as_batch=dialect == "sqlite",
+        **kwargs,
+    )
+
+
+def run_migrations_offline() -> None:
+    """Writes the SQL of the migrations instead of running it."""
+    _configure(engine.dialect.name, url=engine.url, literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_on(connection: Connection) -> None:
+    _configure(connection.dialect.name, connection=connection)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    # `app.db.migrations` hands over its connection
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_migrations_on(connection)
+        return
+    with engine.connect() as connection:
+        run_migrations_on(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
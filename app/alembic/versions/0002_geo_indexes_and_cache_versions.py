@@ -0,0 +1,163 @@
+"""Float coordinates with their geohash, duplicates, cache versions and the indexes of the paging
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 17:02:11.204518
+
+Databases created by `create_all` after the initial schema have some of these already,
+the steps check the tables before changing them.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+from app.utils.geo import encode_geohash
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The precision of `app.data.assistance_repo.GEOHASH_PRECISION` when the revision was written
+GEOHASH_PRECISION = 8
+
+TABLES = [
+    'emergency_contacts', 'faqs', 'identification_details', 'token', 'users',
+    'assistances', 'feedbacks', 'assistance_images',
+]
+
+
+def _columns(table: str) -> dict[str, sa.types.TypeEngine]:
+    return {column['name']: column['type'] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _indexes(table: str) -> set[str]:
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def _to_float(value) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table('cache_versions'):
+        op.create_table('cache_versions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('external_reference', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('is_deleted', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('last_updated', sa.DateTime(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('cache_versions', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_cache_versions_external_reference'), ['external_reference'], unique=False)
+            batch_op.create_index(batch_op.f('ix_cache_versions_last_updated'), ['last_updated'], unique=False)
+            batch_op.create_index(batch_op.f('ix_cache_versions_name'), ['name'], unique=True)
+
+    for table in TABLES:
+        if f'ix_{table}_last_updated' not in _indexes(table):
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                batch_op.create_index(batch_op.f(f'ix_{table}_last_updated'), ['last_updated'], unique=False)
+
+    columns = _columns('assistances')
+    with op.batch_alter_table('assistances', schema=None) as batch_op:
+        if 'geohash' not in columns:
+            batch_op.add_column(sa.Column('geohash', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+        if 'duplicate_of_id' not in columns:
+            batch_op.add_column(sa.Column('duplicate_of_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key('fk_assistances_duplicate_of_id', 'assistances', ['duplicate_of_id'], ['id'])
+
+    # The coordinates were strings, those which are not numbers are dropped
+    assistances = sa.table(
+        'assistances',
+        sa.column('id', sa.Integer()),
+        sa.column('gps_latitude', sa.String()),
+        sa.column('gps_longitude', sa.String()),
+        sa.column('geohash', sa.String()),
+    )
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(assistances.c.id, assistances.c.gps_latitude, assistances.c.gps_longitude)
+        .where(sa.or_(assistances.c.gps_latitude.is_not(None), assistances.c.gps_longitude.is_not(None)))
+    ).all()
+    coordinates = {row.id: (_to_float(row.gps_latitude), _to_float(row.gps_longitude)) for row in rows}
+
+    if not all(isinstance(_columns('assistances')[name], sa.Float) for name in ('gps_latitude', 'gps_longitude')):
+        op.execute(assistances.update().values(gps_latitude=None, gps_longitude=None))
+        with op.batch_alter_table('assistances', schema=None) as batch_op:
+            for name in ('gps_latitude', 'gps_longitude'):
+                batch_op.alter_column(
+                    name,
+                    existing_type=sqlmodel.sql.sqltypes.AutoString(),
+                    type_=sa.Float(),
+                    existing_nullable=True,
+                    postgresql_using=f'{name}::double precision',
+                )
+
+    assistances = sa.table(
+        'assistances',
+        sa.column('id', sa.Integer()),
+        sa.column('gps_latitude', sa.Float()),
+        sa.column('gps_longitude', sa.Float()),
+        sa.column('geohash', sa.String()),
+    )
+    for assistance_id, (latitude, longitude) in coordinates.items():
+        located = latitude is not None and longitude is not None
+        connection.execute(
+            assistances.update().where(assistances.c.id == assistance_id).values(
+                gps_latitude=latitude,
+                gps_longitude=longitude,
+                geohash=encode_geohash(latitude, longitude, GEOHASH_PRECISION) if located else None,
+            )
+        )
+
+    indexes = _indexes('assistances')
+    with op.batch_alter_table('assistances', schema=None) as batch_op:
+        if 'ix_assistances_gps' not in indexes:
+            batch_op.create_index('ix_assistances_gps', ['gps_latitude', 'gps_longitude'], unique=False)
+        if 'ix_assistances_geohash' not in indexes:
+            batch_op.create_index('ix_assistances_geohash', ['geohash', 'gps_latitude', 'gps_longitude', 'is_deleted'], unique=False)
+        if 'ix_assistances_status_geohash' not in indexes:
+            batch_op.create_index('ix_assistances_status_geohash', ['status', 'geohash', 'gps_latitude', 'gps_longitude', 'is_deleted'], unique=False)
+        if 'ix_assistances_user_last_updated' not in indexes:
+            batch_op.create_index('ix_assistances_user_last_updated', ['user_id', 'last_updated', 'id'], unique=False)
+
+    if 'ix_feedbacks_user_last_updated' not in _indexes('feedbacks'):
+        with op.batch_alter_table('feedbacks', schema=None) as batch_op:
+            batch_op.create_index('ix_feedbacks_user_last_updated', ['user_id', 'last_updated', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('feedbacks', schema=None) as batch_op:
+        batch_op.drop_index('ix_feedbacks_user_last_updated')
+
+    with op.batch_alter_table('assistances', schema=None) as batch_op:
+        batch_op.drop_index('ix_assistances_user_last_updated')
+        batch_op.drop_index('ix_assistances_status_geohash')
+        batch_op.drop_index('ix_assistances_geohash')
+        batch_op.drop_index('ix_assistances_gps')
+        batch_op.alter_column('gps_longitude', existing_type=sa.Float(), type_=sqlmodel.sql.sqltypes.AutoString(), existing_nullable=True)
+        batch_op.alter_column('gps_latitude', existing_type=sa.Float(), type_=sqlmodel.sql.sqltypes.AutoString(), existing_nullable=True)
+        batch_op.drop_constraint('fk_assistances_duplicate_of_id', type_='foreignkey')
+        batch_op.drop_column('duplicate_of_id')
+        batch_op.drop_column('geohash')
+
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(batch_op.f(f'ix_{table}_last_updated'))
+
+    with op.batch_alter_table('cache_versions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_cache_versions_name'))
+        batch_op.drop_index(batch_op.f('ix_cache_versions_last_updated'))
+        batch_op.drop_index(batch_op.f('ix_cache_versions_external_reference'))
+
+    op.drop_table('cache_versions')
@@ -1,5 +1,3 @@
-import traceback
-
 from fastapi import Request
 from fastapi import status
 
@@ -16,10 +14,9 @@ async def catch_all_exception(request: Request, call_next):
     except HTTPException as err:
         log.error(err)
         return HTTPErrorResponse(title=err.title, details=err.message).response()
-    except Exception as exc:
-
-        log.error(exc)
-        traceback.print_exc()
+    except Exception:
+        # The traceback is formatted by the logging thread, see `LogPipeline`
+        log.exception("Unhandled error on %s %s", request.method, request.url.path)
         return HTTPErrorResponse(
             title="Server Error",
             details="An error occurred. Contact an admin for assistance",
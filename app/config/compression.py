@@ -0,0 +1,216 @@
+import zlib
+from typing import Callable
+
+from starlette.datastructures import Headers
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is used alone without it
+    brotli = None
+
+# Media types whose payload is already compressed, or must be flushed as produced
+UNCOMPRESSIBLE_MEDIA_TYPES = frozenset(
+    {
+        "text/event-stream",
+        "application/gzip",
+        "application/x-gzip",
+        "application/zip",
+        "application/x-7z-compressed",
+        "application/x-rar-compressed",
+        "application/x-brotli",
+        "application/zstd",
+        "application/pdf",
+        "application/octet-stream",
+        "font/woff",
+        "font/woff2",
+    }
+)
+UNCOMPRESSIBLE_MEDIA_PREFIXES = ("image/", "video/", "audio/")
+# Vector images are text
+COMPRESSIBLE_IMAGES = frozenset({"image/svg+xml"})
+# zlib window bits producing a gzip container
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if not media_type or media_type in UNCOMPRESSIBLE_MEDIA_TYPES:
+        return False
+    if media_type in COMPRESSIBLE_IMAGES:
+        return True
+    return not media_type.startswith(UNCOMPRESSIBLE_MEDIA_PREFIXES)
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """The ETag of the `encoding` representation of a response whose identity ETag is `etag`."""
+    weak, opaque = ("W/", etag[2:]) if etag.startswith("W/") else ("", etag)
+    if len(opaque) < 2 or not opaque.startswith('"') or not opaque.endswith('"'):
+        return etag
+    return f'{weak}"{opaque[1:-1]}-{encoding}"'
+
+
+def identity_etag(etag: str, encoding: str) -> str:
+    """The ETag of the identity representation, for the ETag of its `encoding` representation."""
+    suffix = f'-{encoding}"'
+    return f'{etag[:-len(suffix)]}"' if etag.endswith(suffix) else etag
+
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+    """Returns the content codings of an `Accept-Encoding` header whose quality is not zero."""
+    encodings = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            encodings.add(coding)
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """Picks brotli when the client and the server both support it, then gzip."""
+    encodings = accepted_encodings(accept_encoding)
+    if brotli is not None and "br" in encodings:
+        return "br"
+    if "gzip" in encodings or "*" in encodings:
+        return "gzip"
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Compresses response bodies of at least `minimum_size` bytes with brotli or gzip.
+
+    Bodies are buffered until they reach `minimum_size`, then compressed as they are
+    produced. Responses that already carry a `Content-Encoding`, such as precompressed
+    static files, already compressed media and server-sent events, which must be
+    flushed as produced, are passed through untouched.
+
+    Compressed responses get the ETag of the route suffixed with the encoding, and the
+    suffix is removed from `If-None-Match` before the route compares it to its own.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        encoded_tags = set()
+        if "if-none-match" in Headers(scope=scope):
+            scope = {**scope, "headers": list(scope["headers"])}
+            headers = MutableHeaders(scope=scope)
+            tags = [tag.strip() for tag in headers["if-none-match"].split(",")]
+            encoded_tags = {tag for tag in tags if identity_etag(tag, encoding) != tag}
+            headers["if-none-match"] = ", ".join(identity_etag(tag, encoding) for tag in tags)
+
+        responder = _CompressionResponder(self, encoding, send, encoded_tags)
+        await self.app(scope, receive, responder.send)
+
+    def compressor(self, encoding: str) -> tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+        """Returns the functions compressing a chunk and flushing the end of a stream."""
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            return compressor.process, compressor.finish
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, GZIP_WBITS)
+        return compressor.compress, compressor.flush
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send, encoded_tags: set[str]) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        # The If-None-Match tags of the compressed representation
+        self.encoded_tags = encoded_tags
+        self._send = send
+        self.start_message: Message | None = None
+        self.passthrough = False
+        self.buffer: list[bytes] = []
+        self.buffered_size = 0
+        self.compress: Callable[[bytes], bytes] | None = None
+        self.flush: Callable[[], bytes] | None = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = MutableHeaders(raw=message["headers"])
+            self.passthrough = "content-encoding" in headers or not is_compressible(headers.get("content-type", ""))
+            etag = headers.get("etag")
+            if message["status"] == 304 and etag and encoded_etag(etag, self.encoding) in self.encoded_tags:
+                # Validates the compressed representation the client holds
+                headers["ETag"] = encoded_etag(etag, self.encoding)
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        more_body = message.get("more_body", False)
+        if self.passthrough:
+            await self._send_start()
+            await self._send(message)
+            return
+
+        if self.compress is not None:
+            body = self.compress(message.get("body", b""))
+            if not more_body:
+                body += self.flush()
+            await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+
+        self.buffer.append(message.get("body", b""))
+        self.buffered_size += len(self.buffer[-1])
+        if more_body and self.buffered_size < self.middleware.minimum_size:
+            return
+
+        body, self.buffer = b"".join(self.buffer), []
+        if self.buffered_size < self.middleware.minimum_size:
+            await self._send_start()
+            await self._send({"type": "http.response.body", "body": body, "more_body": False})
+            return
+
+        self.compress, self.flush = self.middleware.compressor(self.encoding)
+        body = self.compress(body)
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if "etag" in headers:
+            headers["ETag"] = encoded_etag(headers["etag"], self.encoding)
+        if more_body:
+            # The compressed length is only known once the stream ends
+            del headers["Content-Length"]
+        else:
+            body += self.flush()
+            headers["Content-Length"] = str(len(body))
+        await self._send_start()
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    async def _send_start(self) -> None:
+        if self.start_message is not None:
+            start_message, self.start_message = self.start_message, None
+            await self._send(start_message)
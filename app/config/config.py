@@ -13,7 +13,26 @@ class FactoryConfig(BaseSettings):
     SERVER_NAME: str
     SERVER_HOST: str
     SERVER_PORT: str
+    SERVER_WORKERS: int = 0  # 0 for one per available CPU
+    SERVER_WORKERS_PER_CPU: float = 1
+    SERVER_MAX_WORKERS: int = 16
+    SERVER_PRELOAD: bool = True  # the app is imported once, before the workers are forked
+    SERVER_MAX_REQUESTS: int = 10000  # requests served by a worker before it is replaced, 0 for never
+    SERVER_MAX_REQUESTS_JITTER: int = 1000  # so the workers are not replaced all at once
+    SERVER_KEEPALIVE: int = 5  # seconds an idle connection is kept open
+    SERVER_BACKLOG: int = 2048  # connections waiting to be accepted
+    SERVER_GRACEFUL_TIMEOUT: int = 30  # seconds the in-flight requests are given to complete on shutdown
     SQLALCHEMY_DATABASE_URI: str
+    # Off when the deployment runs `python -m app.db.migrations` before starting the workers
+    DATABASE_MIGRATE_ON_STARTUP: bool = True
+    # Applied to SQLite files only, see `app.db.sqlite`
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # bytes
+    SQLITE_CACHE_SIZE_KIB: int = 64 * 1024  # per connection
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    SQLITE_POOL_SIZE: int = 20  # connections kept open, for the threads of the threadpool
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 24 * 60  # 1 day expressed in minutes
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 5 * 24 * 60  # 5 days expressed in minutes
@@ -27,6 +46,41 @@ class FactoryConfig(BaseSettings):
     EMAILS_FROM_EMAIL: str | None = None
     EMAILS_FROM_NAME: str | None = None
     GCP_AUTH_SERVICE_FILE: str | None = None
+    GCP_STORAGE_BUCKET: str | None = None
+    STORAGE_BLOB_INDEX_SIZE: int = 10000
+    SIGNED_URL_REUSE_FRACTION: float = 0.5
+    SIGNED_URL_CACHE_SIZE: int = 10000
+    BLOB_LISTING_CACHE_TTL: int = 30  # seconds
+    ASSISTANCE_DUPLICATE_DISTANCE_METERS: float = 200
+    ASSISTANCE_DUPLICATE_WINDOW_SECONDS: int = 10 * 60  # 10 minutes expressed in seconds
+    ASSISTANCE_DUPLICATE_MATCH_OTHER_USERS: bool = False
+    ASSISTANCE_DUPLICATE_POLICY: Literal["merge", "flag"] = "merge"
+    ASSISTANCE_MAX_IMAGES: int = 5  # per request
+    IDEMPOTENCY_KEY_TTL: int = 24 * 60 * 60  # 24 hours expressed in seconds
+    IDEMPOTENCY_STORE_SIZE: int = 10000
+    IDEMPOTENCY_WAIT_TIMEOUT: int = 30  # seconds
+    REFERENCE_CACHE_CHECK_INTERVAL: float = 5  # seconds
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # bytes
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    STATIC_CACHE_MAX_AGE: int = 7 * 24 * 60 * 60  # 7 days expressed in seconds
+    SERVER_TIMING_ENABLED: bool = False
+    METRICS_SAMPLE_INTERVAL: float = 1  # seconds
+    # Bearer token of the scrapers of /metrics, which is not served without it
+    METRICS_TOKEN: str | None = None
+    SLOW_QUERY_THRESHOLD_MS: float = 200
+    N_PLUS_ONE_THRESHOLD: int = 5  # identical statements within a request
+    LOG_QUEUE_SIZE: int = 10000  # records
+    LOG_JSON: bool = True  # console output, the log file is always JSON lines
+    LOG_RATE_LIMIT_BURST: int = 20  # records of a message template per interval
+    LOG_RATE_LIMIT_INTERVAL: float = 60  # seconds
+    LOG_SAMPLE_RATE: int = 100  # one record out of, past the burst
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0  # fraction of the requests, besides those asked for by admins
+    PROFILING_INTERVAL_MS: float = 5
+    PROFILING_STORE_SIZE: int = 50  # profiles kept
+    # Shared by the workers, which otherwise keep their profiles in memory
+    PROFILING_DIRECTORY: str | None = None
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
@@ -1,8 +1,6 @@
-import json
-
 from fastapi import status
-from fastapi.responses import JSONResponse
 
+from app.config.response import FastJSONResponse
 from app.config.response import HTTPException
 from app.utils.logger import get_logger
 
@@ -10,24 +8,25 @@ log = get_logger()
 
 
 # Override fastapi validation error
-def validation_error(error) -> JSONResponse:
+def validation_error(error) -> FastJSONResponse:
     errors: list = []
-    for err in json.loads(error.json()):
+    for err in error.errors():
         errors.append({err["loc"][-1]: err["msg"]})
 
     message = f"{list(errors[0].keys())[0]}: {list(errors[0].values())[0]}"
-    log.error(message)
+    # A single template, so the rate limit of the logs applies to every validation error
+    log.error("Validation error: %s", message)
     response: dict = {
         "statusCode": status.HTTP_400_BAD_REQUEST,
         "message": message,
     }
 
-    return JSONResponse(content=response, status_code=status.HTTP_400_BAD_REQUEST)
+    return FastJSONResponse(content=response, status_code=status.HTTP_400_BAD_REQUEST)
 
 
 # Override fastapi http error response
-def exception_error(exc: HTTPException) -> JSONResponse:
-    return JSONResponse(
+def exception_error(exc: HTTPException) -> FastJSONResponse:
+    return FastJSONResponse(
         status_code=exc.status_code,
         content={
             "status": "Failed",
@@ -1,10 +1,28 @@
+import copy
+import logging
 import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from datetime import timezone
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
 from typing import Any
+from typing import Callable
 
+import orjson
 from pydantic import BaseModel
 from pydantic import Field
+from starlette_context import context
+from starlette_context.header_keys import HeaderKeys
 
 from app.config.config import base_dir
+from app.utils.timing import current_request
+
+# Key of the reference of the authorized user in the request context
+USER_REFERENCE = "user_reference"
 
 
 class LogConfig(BaseModel):
@@ -17,6 +35,8 @@ class LogConfig(BaseModel):
         f"%(levelprefix)s | %(asctime)s | %(filename)s:%(lineno)d | %(message)s"  # noqa
     )
     LOG_LEVEL: str = "DEBUG"
+    # "json" or "default", the file is always written as JSON lines
+    CONSOLE_FORMATTER: str = "default"
 
     DATABASE_LOGGER: str = "database"
 
@@ -41,13 +61,13 @@ class LogConfig(BaseModel):
                 "class": "logging.StreamHandler",
                 "stream": "ext://sys.stderr",
             },
+            # Shared by the workers of the server, which append to it: it is rotated outside
+            # of the app, e.g. by logrotate, and every worker reopens it once it was moved
             "file": {
                 "level": "WARNING",
-                "class": "logging.handlers.RotatingFileHandler",
-                "formatter": "default",
+                "class": "logging.handlers.WatchedFileHandler",
+                "formatter": "json",
                 "filename": f"{base_dir}/app/logs/server.log",
-                "maxBytes": 10485760,  # 10 MB
-                "backupCount": 5,
             },
         }
     )
@@ -56,8 +76,237 @@ class LogConfig(BaseModel):
         {"server": {"handlers": ["console", "file"], "level": LOG_LEVEL}}
     )
 
+    def model_post_init(self, __context: Any) -> None:
+        # The class itself, `app.config` resolves to the settings in a dotted path
+        self.formatters["json"] = {"()": JsonFormatter}
+        self.handlers["console"]["formatter"] = self.CONSOLE_FORMATTER
+
 
-# Ensure the log directory exists
+# Created by `create_app`, before the file handler opens its file
 log_directory = f"{base_dir}/app/logs"
-if not os.path.exists(log_directory):
-    os.makedirs(log_directory)
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as JSON lines, with the request fields set by `RequestContextFilter`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        document = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "location": f"{record.filename}:{record.lineno}",
+        }
+        for name in ("request_id", "correlation_id", "route", "user_reference", "suppressed", "sampled"):
+            value = getattr(record, name, None)
+            if value is not None:
+                document[name] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            document["exception"] = record.exc_text
+        if record.stack_info:
+            document["stack"] = self.formatStack(record.stack_info)
+        return orjson.dumps(document, default=str).decode()
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Adds the request and correlation IDs, the route and the reference of the authorized
+    user to the records logged while handling a request. It must run on the thread
+    logging the record, i.e. on the queue handler rather than on the handlers behind it.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if context.exists():
+            record.request_id = context.get(HeaderKeys.request_id)
+            record.correlation_id = context.get(HeaderKeys.correlation_id)
+            record.user_reference = context.get(USER_REFERENCE)
+        timings = current_request()
+        if timings is not None:
+            record.route = timings.route
+        return True
+
+
+class _Window:
+    __slots__ = ("started_at", "count", "suppressed")
+
+    def __init__(self, started_at: float) -> None:
+        self.started_at = started_at
+        self.count = 0
+        self.suppressed = 0
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Bounds the volume of each message template: within `interval` seconds, the first
+    `burst` records of a template pass, then one out of `sample_rate`. The first record
+    of the next window tells how many were suppressed.
+
+    Templates are told apart by logger, level and unformatted message; the least
+    recently seen are forgotten beyond `max_templates`.
+    """
+
+    def __init__(
+        self,
+        burst: int,
+        interval: float,
+        sample_rate: int,
+        max_templates: int = 1000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.sample_rate = sample_rate
+        self.max_templates = max_templates
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._windows: OrderedDict[tuple, _Window] = OrderedDict()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.levelno, str(record.msg))
+        now = self._clock()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window.started_at >= self.interval:
+                suppressed = window.suppressed if window is not None else 0
+                window = self._windows[key] = _Window(now)
+                if suppressed:
+                    record.suppressed = suppressed
+            self._windows.move_to_end(key)
+            while len(self._windows) > self.max_templates:
+                self._windows.popitem(last=False)
+
+            window.count += 1
+            if window.count <= self.burst:
+                return True
+            if self.sample_rate > 0 and (window.count - self.burst) % self.sample_rate == 0:
+                record.sampled = f"1/{self.sample_rate}"
+                return True
+            window.suppressed += 1
+            return False
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Hands records to a bounded queue without ever blocking the caller: records which
+    do not fit are dropped and counted, and a warning with the count is queued once
+    there is room again.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported_drops = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only the message is rendered here, the traceback is formatted by the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # Called under the handler lock
+        if self._unreported_drops:
+            try:
+                self.queue.put_nowait(self._drop_report())
+                self._unreported_drops = 0
+            except queue.Full:
+                pass
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported_drops += 1
+
+    def _drop_report(self) -> logging.LogRecord:
+        return logging.LogRecord(
+            name=self.name or "logging",
+            level=logging.WARNING,
+            pathname=__file__,
+            lineno=0,
+            msg=f"{self._unreported_drops} log records dropped, the log queue was full",
+            args=None,
+            exc_info=None,
+        )
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Waits for room, the queue may be full when stopping
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    """
+    Moves the handlers of a logger behind a bounded queue, emptied by a background
+    thread, so logging does no I/O on the threads serving requests.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.handler: DroppingQueueHandler | None = None
+        self._listener: QueueListener | None = None
+        self._logger: logging.Logger | None = None
+        self._handlers: list[logging.Handler] = []
+
+    def install(self, logger_name: str, max_size: int, filters: list[logging.Filter] = ()) -> None:
+        """
+        Queues the records of a logger configured with its handlers, e.g. by `dictConfig`.
+
+        Args:
+            logger_name: Name of the logger.
+            max_size: Number of records the queue holds.
+            filters: Filters run on the thread logging a record, before it is queued.
+        """
+        with self._lock:
+            self._stop()
+            self._logger = logging.getLogger(logger_name)
+            self._handlers = self._logger.handlers[:]
+            for handler in self._handlers:
+                self._logger.removeHandler(handler)
+
+            self.handler = DroppingQueueHandler(queue.Queue(maxsize=max_size))
+            for log_filter in filters:
+                self.handler.addFilter(log_filter)
+            self._logger.addHandler(self.handler)
+            self._listener = _Listener(self.handler.queue, *self._handlers, respect_handler_level=True)
+            self._listener.start()
+
+    def stop(self) -> None:
+        """Writes the records still queued and hands the handlers back to the logger."""
+        with self._lock:
+            self._stop()
+
+    def _stop(self) -> None:
+        if self._listener is None:
+            return
+        # Unless the logger was configured again since, e.g. by `dictConfig`
+        restore = self.handler in self._logger.handlers
+        self._logger.removeHandler(self.handler)
+        self._listener.stop()
+        if restore:
+            for handler in self._handlers:
+                self._logger.addHandler(handler)
+        self._listener = None
+
+    def after_fork(self) -> None:
+        """Starts a listener again in a forked process, which inherited none of the threads of its parent."""
+        self._lock = threading.Lock()
+        if self._listener is None:
+            return
+        # The records queued before the fork are the parent's to write
+        self.handler.queue = queue.Queue(maxsize=self.handler.queue.maxsize)
+        self._listener = _Listener(self.handler.queue, *self._handlers, respect_handler_level=True)
+        self._listener.start()
+
+    @property
+    def dropped(self) -> int:
+        return self.handler.dropped if self.handler is not None else 0
+
+
+log_pipeline = LogPipeline()
+# Workers forked from a server which created the app, e.g. gunicorn preloading it
+os.register_at_fork(after_in_child=log_pipeline.after_fork)
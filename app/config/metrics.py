@@ -0,0 +1,203 @@
+"""
+Prometheus metrics of the API.
+
+Request metrics are recorded as requests complete. Pools, caches, single-flight
+groups and the event loop lag are sampled periodically by `MetricsSampler` in each
+worker, so every worker publishes its own values in multiprocess mode.
+
+Multiprocess mode, for several uvicorn or gunicorn workers, is enabled by pointing
+the `PROMETHEUS_MULTIPROC_DIR` environment variable at an empty directory before
+the workers start; `/metrics` then aggregates the values written by every worker.
+
+`/metrics` is served to scrapers sending the `METRICS_TOKEN` setting as bearer token.
+"""
+import asyncio
+import os
+from typing import Any
+
+from anyio import to_thread
+from prometheus_client import CONTENT_TYPE_LATEST
+from prometheus_client import REGISTRY
+from prometheus_client import CollectorRegistry
+from prometheus_client import Counter
+from prometheus_client import Gauge
+from prometheus_client import Histogram
+from prometheus_client import generate_latest
+from prometheus_client import multiprocess
+from sqlalchemy import Pool
+from sqlalchemy import QueuePool
+
+from app.utils.timing import LATENCY_BUCKETS
+
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, float("inf"))
+
+
+class AppMetrics:
+    """The metrics of the API, registered in `registry`."""
+
+    def __init__(self, registry: CollectorRegistry = REGISTRY) -> None:
+        self.requests = Counter(
+            "http_requests_total", "HTTP requests handled", ["method", "route", "status"], registry=registry
+        )
+        self.request_duration = Histogram(
+            "http_request_duration_seconds",
+            "Time to handle HTTP requests",
+            ["method", "route", "status"],
+            buckets=LATENCY_BUCKETS,
+            registry=registry,
+        )
+        self.requests_in_progress = Gauge(
+            "http_requests_in_progress", "HTTP requests being handled", multiprocess_mode="livesum", registry=registry
+        )
+
+        self.db_pool_size = Gauge(
+            "db_pool_size", "Connections kept by the database pool", multiprocess_mode="livesum", registry=registry
+        )
+        self.db_pool_checked_out = Gauge(
+            "db_pool_checked_out", "Connections in use", multiprocess_mode="livesum", registry=registry
+        )
+        self.db_pool_overflow = Gauge(
+            "db_pool_overflow",
+            "Connections opened above the pool size, negative while the pool is not full",
+            multiprocess_mode="livesum",
+            registry=registry,
+        )
+        self.db_pool_checkouts = Counter(
+            "db_pool_checkouts_total", "Connections checked out of the pool", registry=registry
+        )
+        self.db_pool_wait = Counter(
+            "db_pool_wait_seconds_total", "Time spent waiting for a connection of the pool", registry=registry
+        )
+
+        self.cache_requests = Counter(
+            "cache_requests_total", "Lookups of the in-process caches", ["cache", "result"], registry=registry
+        )
+        self.singleflight_calls = Counter(
+            "singleflight_calls_total",
+            "Calls to the single-flight groups, executed or coalesced into a running call",
+            ["group", "outcome"],
+            registry=registry,
+        )
+        self.singleflight_in_flight = Gauge(
+            "singleflight_in_flight",
+            "Calls running in the single-flight groups",
+            ["group"],
+            multiprocess_mode="livesum",
+            registry=registry,
+        )
+
+        self.threadpool_busy = Gauge(
+            "threadpool_busy_threads",
+            "Threads of the worker threadpool running blocking calls",
+            multiprocess_mode="livesum",
+            registry=registry,
+        )
+        self.threadpool_size = Gauge(
+            "threadpool_size", "Threads of the worker threadpool", multiprocess_mode="livesum", registry=registry
+        )
+        self.threadpool_queued = Gauge(
+            "threadpool_queued_calls",
+            "Blocking calls waiting for a thread of the worker threadpool",
+            multiprocess_mode="livesum",
+            registry=registry,
+        )
+        self.log_records_dropped = Counter(
+            "log_records_dropped_total", "Log records dropped because the log queue was full", registry=registry
+        )
+        self.loop_lag = Histogram(
+            "event_loop_lag_seconds",
+            "Delay of the event loop in waking up a sleeping task",
+            buckets=LOOP_LAG_BUCKETS,
+            registry=registry,
+        )
+
+    def observe_request(self, method: str, route: str, status_code: int, duration: float) -> None:
+        self.requests.labels(method, route, status_code).inc()
+        self.request_duration.labels(method, route, status_code).observe(duration)
+
+
+class MetricsSampler:
+    """
+    Copies the state of the pools, caches, single-flight groups and log queue of a
+    worker into its metrics, and measures the event loop lag while it runs.
+
+    Caches are objects exposing `hits` and `misses` counters; counters are published
+    as increments since the previous sample.
+    """
+
+    def __init__(
+        self,
+        metrics: AppMetrics,
+        pool: Pool | None = None,
+        caches: dict[str, Any] | None = None,
+        singleflight_groups: dict[str, Any] | None = None,
+        log_pipeline: Any | None = None,
+    ) -> None:
+        self.metrics = metrics
+        self.pool = pool
+        self.caches = caches or {}
+        self.singleflight_groups = singleflight_groups if singleflight_groups is not None else {}
+        self.log_pipeline = log_pipeline
+        self._published: dict[tuple, float] = {}
+
+    def sample(self) -> None:
+        """Publishes the current state, must be called from the event loop."""
+        self._sample_pool()
+        for name, cache in self.caches.items():
+            self._publish_increase(self.metrics.cache_requests.labels(name, "hit"), ("cache", name, "hit"), cache.hits)
+            self._publish_increase(
+                self.metrics.cache_requests.labels(name, "miss"), ("cache", name, "miss"), cache.misses
+            )
+        for name, group in list(self.singleflight_groups.items()):
+            stats = group.stats()
+            self._publish_increase(
+                self.metrics.singleflight_calls.labels(name, "executed"), ("sf", name, "executed"), stats.executions
+            )
+            self._publish_increase(
+                self.metrics.singleflight_calls.labels(name, "coalesced"), ("sf", name, "coalesced"), stats.coalesced
+            )
+            self.metrics.singleflight_in_flight.labels(name).set(stats.in_flight)
+
+        if self.log_pipeline is not None:
+            self._publish_increase(self.metrics.log_records_dropped, ("logs", "dropped"), self.log_pipeline.dropped)
+
+        limiter = to_thread.current_default_thread_limiter()
+        self.metrics.threadpool_busy.set(limiter.borrowed_tokens)
+        self.metrics.threadpool_size.set(limiter.total_tokens)
+        self.metrics.threadpool_queued.set(limiter.statistics().tasks_waiting)
+
+    async def run(self, interval: float) -> None:
+        """Samples every `interval` seconds, recording how late the loop wakes up, until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            self.metrics.loop_lag.observe(max(0.0, loop.time() - start - interval))
+            self.sample()
+
+    def _sample_pool(self) -> None:
+        if not isinstance(self.pool, QueuePool):
+            return
+        self.metrics.db_pool_size.set(self.pool.size())
+        self.metrics.db_pool_checked_out.set(self.pool.checkedout())
+        self.metrics.db_pool_overflow.set(self.pool.overflow())
+        if hasattr(self.pool, "checkouts"):
+            self._publish_increase(self.metrics.db_pool_checkouts, ("pool", "checkouts"), self.pool.checkouts)
+            self._publish_increase(self.metrics.db_pool_wait, ("pool", "wait"), self.pool.wait_seconds)
+
+    def _publish_increase(self, counter: Counter, key: tuple, total: float) -> None:
+        increase = total - self._published.get(key, 0)
+        if increase > 0:
+            counter.inc(increase)
+        self._published[key] = total
+
+
+def render_metrics(registry: CollectorRegistry = REGISTRY) -> tuple[bytes, str]:
+    """Renders the metrics in the Prometheus text format, aggregated over the workers in multiprocess mode."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+app_metrics = AppMetrics()
@@ -0,0 +1,98 @@
+import gzip
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from email.utils import formatdate
+from email.utils import parsedate_to_datetime
+
+from jinja2 import Environment
+from jinja2 import FileSystemLoader
+from starlette import status
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.config.compression import accepted_encodings
+
+
+@dataclass(frozen=True, slots=True)
+class RenderedPage:
+    mtime: float
+    body: bytes
+    gzip_body: bytes
+    etag: str
+    gzip_etag: str
+    last_modified: str
+
+
+class CachedPage:
+    """
+    A template without per-request data, rendered once on creation and kept as bytes
+    along with its gzip variant, answered with 304 when the client copy is still valid.
+
+    With `auto_reload`, the template file is checked on each request and rendered
+    again when it changes, for development.
+    """
+
+    def __init__(self, directory: str, template: str, auto_reload: bool = False) -> None:
+        self.environment = Environment(loader=FileSystemLoader(directory), autoescape=True)
+        self.template = template
+        self.path = os.path.join(directory, template)
+        self.auto_reload = auto_reload
+        self._lock = threading.Lock()
+        self._page = self.render()
+
+    def render(self) -> RenderedPage:
+        mtime = os.stat(self.path).st_mtime
+        body = self.environment.get_template(self.template).render().encode()
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        return RenderedPage(
+            mtime=mtime,
+            body=body,
+            gzip_body=gzip.compress(body, compresslevel=9, mtime=0),
+            etag=f'"{digest}"',
+            gzip_etag=f'"{digest}-gzip"',
+            last_modified=formatdate(mtime, usegmt=True),
+        )
+
+    @property
+    def page(self) -> RenderedPage:
+        page = self._page
+        if self.auto_reload and os.stat(self.path).st_mtime != page.mtime:
+            with self._lock:
+                if self._page is page:
+                    self._page = self.render()
+                page = self._page
+        return page
+
+    def response(self, request: Request) -> Response:
+        page = self.page
+        headers = {"Last-Modified": page.last_modified, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+        if self.is_not_modified(request.headers, page):
+            headers["ETag"] = page.etag
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        if "gzip" in accepted_encodings(request.headers.get("accept-encoding", "")):
+            headers["ETag"] = page.gzip_etag
+            headers["Content-Encoding"] = "gzip"
+            return Response(content=page.gzip_body, media_type="text/html", headers=headers)
+
+        headers["ETag"] = page.etag
+        return Response(content=page.body, media_type="text/html", headers=headers)
+
+    @staticmethod
+    def is_not_modified(request_headers: Headers, page: RenderedPage) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            # Both variants share the same content
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or page.etag in tags or page.gzip_etag in tags
+
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since is None:
+            return False
+        try:
+            return int(page.mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
@@ -0,0 +1,83 @@
+import random
+import time
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from app.config.config import config
+from app.utils.profiling import DirectoryProfileStore
+from app.utils.profiling import Profile
+from app.utils.profiling import ProfileStore
+from app.utils.profiling import StackSampler
+from app.utils.timing import current_request
+
+# Request header asking for a profile, honoured for admins only
+PROFILE_HEADER = b"x-profile"
+# Response header naming the profile of the request
+PROFILE_ID_HEADER = "X-Profile-ID"
+
+
+class ProfilingMiddleware:
+    """
+    Profiles the requests of admins sending the `X-Profile` header and, when
+    `sample_rate` is set, that fraction of all requests. A worker profiles one
+    request at a time, the others run unprofiled.
+
+    It must run within `AuthorizationMiddleware` to know whether the user is an
+    admin, and is left out of the stack when profiling is disabled.
+    """
+
+    def __init__(self, app: ASGIApp, store: ProfileStore, interval: float, sample_rate: float = 0.0) -> None:
+        self.app = app
+        self.store = store
+        self.interval = interval
+        self.sample_rate = sample_rate
+        self._profiling = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._profiling or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(method=scope["method"], path=scope["path"], interval=self.interval)
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                MutableHeaders(scope=message).append(PROFILE_ID_HEADER, profile.id)
+            await send(message)
+
+        self._profiling = True
+        sampler = StackSampler(self.interval)
+        started_at = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profile.stacks = sampler.stop()
+            profile.idle_samples = sampler.idle_samples
+            profile.duration = time.perf_counter() - started_at
+            timings = current_request()
+            profile.route = timings.route if timings is not None else None
+            await run_in_threadpool(self.store.add, profile)
+            self._profiling = False
+
+    def _wanted(self, scope: Scope) -> bool:
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        if not any(name == PROFILE_HEADER for name, _ in scope["headers"]):
+            return False
+        user = scope.get("state", {}).get("current_user")
+        return bool(getattr(user, "is_admin", False))
+
+
+profile_store = (
+    DirectoryProfileStore(max_profiles=config.PROFILING_STORE_SIZE, directory=config.PROFILING_DIRECTORY)
+    if config.PROFILING_DIRECTORY
+    else ProfileStore(max_profiles=config.PROFILING_STORE_SIZE)
+)
@@ -1,10 +1,31 @@
 from typing import Any
 
+import orjson
 from fastapi import status
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
+from app.utils.timing import phase
+
+
+def json_dumps(content: Any, sort_keys: bool = False) -> bytes:
+    """
+    Serializes to JSON with orjson, which handles datetimes, enums, UUIDs and
+    dataclasses natively. Anything else (pydantic models, SQLModel records)
+    goes through `jsonable_encoder`.
+    """
+    option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return orjson.dumps(content, default=jsonable_encoder, option=option)
+
+
+class FastJSONResponse(JSONResponse):
+    """The default response class, rendering content with `json_dumps`."""
+
+    def render(self, content: Any) -> bytes:
+        with phase("render"):
+            return json_dumps(content)
+
 
 class HTTPResponse(BaseModel):
     status_code: int = status.HTTP_200_OK
@@ -21,8 +42,8 @@ class HTTPErrorResponse:
         self.__result = {"status": "Failed", "errorBody": self.__error_body}
 
     def response(self) -> object:
-        return JSONResponse(
-            content=jsonable_encoder(self.__result),
+        return FastJSONResponse(
+            content=self.__result,
             status_code=self.__status_code,
             headers={"Access-Control-Allow-Origin": "*"},
         )
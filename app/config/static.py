@@ -0,0 +1,59 @@
+import os
+from mimetypes import guess_type
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.responses import Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from app.config.compression import accepted_encodings
+
+# Content codings of the precompressed siblings, by order of preference
+PRECOMPRESSED_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    Static files served with cache headers, preferring the `.br` or `.gz` sibling of a
+    file built by `scripts/precompress_static.py` when the client accepts its encoding.
+
+    Siblings older than their source file are ignored, so a stale build is never served.
+    """
+
+    def __init__(self, *args, max_age: int = 0, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.cache_control = f"public, max-age={max_age}"
+
+    def file_response(
+        self,
+        full_path: str | os.PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        media_type = guess_type(str(full_path))[0] or "text/plain"
+        headers = {"Cache-Control": self.cache_control, "Vary": "Accept-Encoding"}
+
+        encodings = accepted_encodings(request_headers.get("accept-encoding", ""))
+        for encoding, suffix in PRECOMPRESSED_SUFFIXES:
+            if encoding not in encodings:
+                continue
+            try:
+                sibling_stat = os.stat(f"{full_path}{suffix}")
+            except OSError:
+                continue
+            if sibling_stat.st_mtime >= stat_result.st_mtime:
+                # The ETag is derived from the sibling, so each encoding is validated separately
+                full_path, stat_result = f"{full_path}{suffix}", sibling_stat
+                headers["Content-Encoding"] = encoding
+                break
+
+        response = FileResponse(
+            full_path, status_code=status_code, stat_result=stat_result, media_type=media_type, headers=headers
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
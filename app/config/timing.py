@@ -0,0 +1,113 @@
+import asyncio
+from functools import wraps
+from typing import Any
+from typing import Callable
+from typing import Coroutine
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from app.config.metrics import AppMetrics
+from app.utils.timing import LatencyRegistry
+from app.utils.timing import current_request
+from app.utils.timing import phase
+from app.utils.timing import start_request
+
+# Requests which matched no API route, e.g. static files and 404s
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class TimingMiddleware:
+    """
+    Times each request and its phases (see `app.utils.timing.phase`), aggregates
+    them into the latency histograms of its route and, when given, the Prometheus
+    metrics, and, when `server_timing` is set, reports them in a `Server-Timing`
+    response header.
+
+    It should be the outermost middleware so the total covers the whole stack.
+    """
+
+    def __init__(
+        self, app: ASGIApp, registry: LatencyRegistry, metrics: AppMetrics | None = None, server_timing: bool = False
+    ) -> None:
+        self.app = app
+        self.registry = registry
+        self.metrics = metrics
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = start_request()
+        status_code = 500
+
+        async def send_with_timings(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    metrics = [f"{name};dur={duration * 1000:.3f}" for name, duration in timings.phases.items()]
+                    metrics.append(f"total;dur={timings.elapsed() * 1000:.3f}")
+                    MutableHeaders(scope=message).append("Server-Timing", ", ".join(metrics))
+            await send(message)
+
+        if self.metrics is not None:
+            self.metrics.requests_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            duration = timings.elapsed()
+            route = timings.route or UNMATCHED_ROUTE
+            self.registry.observe(scope["method"], route, timings, duration)
+            if self.metrics is not None:
+                self.metrics.requests_in_progress.dec()
+                self.metrics.observe_request(scope["method"], route, status_code, duration)
+
+
+def _timed_endpoint(call: Callable[..., Any]) -> Callable[..., Any]:
+    if asyncio.iscoroutinefunction(call):
+
+        @wraps(call)
+        async def timed(*args, **kwargs):
+            with phase("handler"):
+                return await call(*args, **kwargs)
+
+    else:
+
+        @wraps(call)
+        def timed(*args, **kwargs):
+            with phase("handler"):
+                return call(*args, **kwargs)
+
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """API route timing its endpoint as the `handler` phase and naming the request after its path template."""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        super().__init__(path, endpoint, **kwargs)
+        # The request handler built above reads the call from the dependant when it runs
+        self.dependant.call = _timed_endpoint(self.dependant.call)
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+        route = self.path_format
+
+        async def named_handler(request: Request) -> Response:
+            # Named before the request is validated, so rejected requests are counted under their route
+            timings = current_request()
+            if timings is not None:
+                timings.route = route
+            return await handler(request)
+
+        return named_handler
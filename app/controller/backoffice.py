@@ -1,4 +1,5 @@
 from typing import Annotated
+from typing import Literal
 from typing import Optional
 
 from fastapi import APIRouter
@@ -6,18 +7,45 @@ from fastapi import Query
 from fastapi import Depends
 from fastapi import File
 from fastapi import UploadFile
+from fastapi import status
+from fastapi.responses import PlainTextResponse
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
 
 from app.config.config import config
+from app.config.profiling import profile_store
+from app.config.response import FastJSONResponse
+from app.config.response import HTTPException
+from app.config.timing import TimedRoute
+from app.controller.dependencies import get_assistance_repo
+from app.controller.dependencies import get_backoffice_assistance_repo
+from app.controller.dependencies import get_backoffice_reference_repo
+from app.controller.dependencies import get_reference_cache
+from app.controller.dependencies import get_duplicate_detector
+from app.controller.dependencies import get_storage
 from app.controller.dependencies import get_user_repo
+from app.data.assistance_repo import AbstractAssistanceRepo
 from app.data.backoffice import schemas
+from app.data.backoffice.assistance_repo import AbstractAssistanceRepo as AbstractBackofficeAssistanceRepo
+from app.data.backoffice.reference_repo import AbstractReferenceRepo as AbstractBackofficeReferenceRepo
 from app.data.backoffice.schemas import LoginResponse
 from app.data.backoffice.schemas import LoginSchema
+from app.data.models import AssistanceStatusType
+from app.data.models import IncidentType
 from app.data.user_repo import AbstractUserRepo
 from app.db.session_hook import get_db
+from app.domain import assistance_service
 from app.domain import auth_service
+from app.domain import reference_service
+from app.domain.authorization import require_admin
+from app.domain.dispatch import dispatch_hub
+from app.domain.dispatch import server_sent_events
+from app.domain.duplicate_detector import AssistanceDuplicateDetector
+from app.domain.reference_cache import ReferenceCache
+from app.domain.storage import StorageBase
+from app.utils.timing import latency_registry
 
-router = APIRouter(prefix="/bo")
+router = APIRouter(prefix="/bo", route_class=TimedRoute)
 
 
 # Health Check
@@ -26,6 +54,39 @@ async def health_check():
     return {"ping": "pong"}
 
 
+@router.get("/metrics/latency", description="Latency histograms of this worker, per route and per phase")
+@require_admin
+async def latency_metrics():
+    return latency_registry.snapshot()
+
+
+@router.get("/profiles", description="Request profiles, the latest first")
+@require_admin
+async def list_profiles():
+    return profile_store.summaries()
+
+
+@router.get("/profiles/download", description="Download a request profile, as speedscope JSON or collapsed stacks")
+@require_admin
+async def download_profile(profile_id: str, format: Literal["speedscope", "collapsed"] = "speedscope"):
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            title="Profile Not Found",
+            message=f"Profile with id {profile_id} not found",
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+    if format == "collapsed":
+        return PlainTextResponse(
+            profile.collapsed(),
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.txt"'},
+        )
+    return FastJSONResponse(
+        profile.speedscope(),
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.speedscope.json"'},
+    )
+
+
 # User Routes
 
 
@@ -72,68 +133,254 @@ async def get_users(offset: Optional[int] = Query(0), size: Optional[int] = Quer
 
 # Feedback Routes
 @router.get("/feedbacks", response_model=schemas.FeedbackListSchema)
-async def get_feedbacks(offset: Optional[int] = Query(0), size: Optional[int] = Query(30)): ...
+@require_admin
+async def get_feedbacks(
+    assistance_repo: Annotated[AbstractBackofficeAssistanceRepo, Depends(get_backoffice_assistance_repo)],
+    offset: Optional[int] = Query(0),
+    size: Optional[int] = Query(30),
+):
+    records = assistance_repo.get_feedbacks(offset=offset, limit=size)
+    page = schemas.FeedbackListSchema(
+        feedbacks=[schemas.FeedbackSchema.model_validate(record, from_attributes=True) for record in records]
+    )
+    # Already validated, rendered directly instead of being validated again against the response model
+    return FastJSONResponse(content=page.model_dump())
 
 
 @router.get("/feedbacks/{id}", response_model=schemas.FeedbackSchema)
-async def get_feedback(id: int): ...
+@require_admin
+async def get_feedback(
+    id: int,
+    assistance_repo: Annotated[AbstractBackofficeAssistanceRepo, Depends(get_backoffice_assistance_repo)],
+):
+    record = assistance_repo.get_feedback_from_id(id)
+    if record is None:
+        raise HTTPException(
+            title="Feedback Not Found",
+            message=f"Feedback with id {id} not found",
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+    return schemas.FeedbackSchema.model_validate(record, from_attributes=True)
 
 
 # Emmergency contact routes
 @router.get("/contacts", response_model=schemas.EmmergencyContactListSchema)
-async def get_contacts(offset: Optional[int] = Query(0), size: Optional[int] = Query(30)): ...
+async def get_contacts(
+    reference_repo: Annotated[AbstractBackofficeReferenceRepo, Depends(get_backoffice_reference_repo)],
+    offset: Optional[int] = Query(0),
+    size: Optional[int] = Query(30),
+):
+    records = reference_repo.get_contact_list(offset=offset, limit=size)
+    return schemas.EmmergencyContactListSchema(
+        contacts=[schemas.EmmergencyContactSchema.model_validate(record, from_attributes=True) for record in records]
+    )
 
 
 @router.get("/contacts/{id}", response_model=schemas.EmmergencyContactSchema)
-def get_contact(id: int): ...
+def get_contact(
+    id: int,
+    reference_repo: Annotated[AbstractBackofficeReferenceRepo, Depends(get_backoffice_reference_repo)],
+):
+    record = reference_repo.get_contact_from_id(id)
+    if record is None:
+        raise _contact_not_found(id)
+    return schemas.EmmergencyContactSchema.model_validate(record, from_attributes=True)
 
 
 @router.post("/contacts", response_model=schemas.EmmergencyContactSchema)
-async def create_contact(schema: schemas.CreateEmmergencyContactSchema): ...
+@require_admin
+async def create_contact(
+    schema: schemas.CreateEmmergencyContactSchema,
+    reference_repo: Annotated[AbstractBackofficeReferenceRepo, Depends(get_backoffice_reference_repo)],
+    cache: Annotated[ReferenceCache, Depends(get_reference_cache)],
+):
+    record = reference_service.create_contact(
+        name=schema.name, number=schema.number, reference_repo=reference_repo, cache=cache
+    )
+    return schemas.EmmergencyContactSchema.model_validate(record, from_attributes=True)
 
 
 @router.put("/contacts/{id}", response_model=schemas.EmmergencyContactSchema)
-async def update_contact(id: int, schema: schemas.UpdateEmmergencyContactSchema): ...
+@require_admin
+async def update_contact(
+    id: int,
+    schema: schemas.UpdateEmmergencyContactSchema,
+    reference_repo: Annotated[AbstractBackofficeReferenceRepo, Depends(get_backoffice_reference_repo)],
+    cache: Annotated[ReferenceCache, Depends(get_reference_cache)],
+):
+    record = reference_service.update_contact(
+        id=id, name=schema.name, number=schema.number, reference_repo=reference_repo, cache=cache
+    )
+    if record is None:
+        raise _contact_not_found(id)
+    return schemas.EmmergencyContactSchema.model_validate(record, from_attributes=True)
 
 
-@router.delete("/contact/{id}")
-async def delete_contact(id: int): ...
+@router.delete("/contact/{id}", status_code=status.HTTP_204_NO_CONTENT)
+@require_admin
+async def delete_contact(
+    id: int,
+    reference_repo: Annotated[AbstractBackofficeReferenceRepo, Depends(get_backoffice_reference_repo)],
+    cache: Annotated[ReferenceCache, Depends(get_reference_cache)],
+):
+    if not reference_service.delete_contact(id=id, reference_repo=reference_repo, cache=cache):
+        raise _contact_not_found(id)
+
+
+def _contact_not_found(id: int) -> HTTPException:
+    return HTTPException(
+        title="Contact Not Found",
+        message=f"Contact with id {id} not found",
+        status_code=status.HTTP_404_NOT_FOUND,
+    )
 
 
 # FAQs Routes
 @router.post("/faqs", response_model=schemas.FAQSchema)
-async def create_faq(schema: schemas.CreateFAQSchema): ...
+@require_admin
+async def create_faq(
+    schema: schemas.CreateFAQSchema,
+    reference_repo: Annotated[AbstractBackofficeReferenceRepo, Depends(get_backoffice_reference_repo)],
+    cache: Annotated[ReferenceCache, Depends(get_reference_cache)],
+):
+    record = reference_service.create_faq(
+        question=schema.question, answer=schema.answer, reference_repo=reference_repo, cache=cache
+    )
+    return schemas.FAQSchema.model_validate(record, from_attributes=True)
 
 
 @router.get("/faqs", response_model=schemas.FAQListSchema)
-async def get_faqs(offset: Optional[int] = Query(0), size: Optional[int] = Query(30)): ...
+async def get_faqs(
+    reference_repo: Annotated[AbstractBackofficeReferenceRepo, Depends(get_backoffice_reference_repo)],
+    offset: Optional[int] = Query(0),
+    size: Optional[int] = Query(30),
+):
+    records = reference_repo.get_faq_list(offset=offset, limit=size)
+    return schemas.FAQListSchema(
+        faqs=[schemas.FAQSchema.model_validate(record, from_attributes=True) for record in records]
+    )
 
 
-@router.get("/faqs/{id}", response_model=schemas.FAQListSchema)
-async def get_faq(id: int): ...
+@router.get("/faqs/{id}", response_model=schemas.FAQSchema)
+async def get_faq(
+    id: int,
+    reference_repo: Annotated[AbstractBackofficeReferenceRepo, Depends(get_backoffice_reference_repo)],
+):
+    record = reference_repo.get_faq_from_id(id)
+    if record is None:
+        raise _faq_not_found(id)
+    return schemas.FAQSchema.model_validate(record, from_attributes=True)
 
 
 @router.put("/faqs/{id}", response_model=schemas.FAQSchema)
-async def update_faq(id: int, schema: schemas.UpdateFAQSchema): ...
+@require_admin
+async def update_faq(
+    id: int,
+    schema: schemas.UpdateFAQSchema,
+    reference_repo: Annotated[AbstractBackofficeReferenceRepo, Depends(get_backoffice_reference_repo)],
+    cache: Annotated[ReferenceCache, Depends(get_reference_cache)],
+):
+    record = reference_service.update_faq(
+        id=id, question=schema.question, answer=schema.answer, reference_repo=reference_repo, cache=cache
+    )
+    if record is None:
+        raise _faq_not_found(id)
+    return schemas.FAQSchema.model_validate(record, from_attributes=True)
 
 
-@router.delete("/faqs/{id}")
-async def delete_faq(id: int): ...
+@router.delete("/faqs/{id}", status_code=status.HTTP_204_NO_CONTENT)
+@require_admin
+async def delete_faq(
+    id: int,
+    reference_repo: Annotated[AbstractBackofficeReferenceRepo, Depends(get_backoffice_reference_repo)],
+    cache: Annotated[ReferenceCache, Depends(get_reference_cache)],
+):
+    if not reference_service.delete_faq(id=id, reference_repo=reference_repo, cache=cache):
+        raise _faq_not_found(id)
+
+
+def _faq_not_found(id: int) -> HTTPException:
+    return HTTPException(
+        title="FAQ Not Found",
+        message=f"FAQ with id {id} not found",
+        status_code=status.HTTP_404_NOT_FOUND,
+    )
 
 
 # Assistance Routes
 @router.get("/assistance", response_model=schemas.AssistanceListSchema)
+@require_admin
 async def get_assistance_list(
-    offset: Optional[int] = Query(0), size: Optional[int] = Query(30), type: Optional[str] = Query(None)
-): ...
+    assistance_repo: Annotated[AbstractBackofficeAssistanceRepo, Depends(get_backoffice_assistance_repo)],
+    storage: Annotated[StorageBase, Depends(get_storage)],
+    offset: Optional[int] = Query(0),
+    size: Optional[int] = Query(30),
+    type: Optional[IncidentType] = Query(None),
+):
+    records = assistance_repo.get_assistances(offset=offset, limit=size, type_=type)
+    page = schemas.AssistanceListSchema(
+        assistance=assistance_service.sign_images(
+            [schemas.AssistanceSchema.model_validate(record, from_attributes=True) for record in records],
+            storage=storage,
+        )
+    )
+    # Already validated, rendered directly instead of being validated again against the response model
+    return FastJSONResponse(content=page.model_dump())
+
+
+@router.get("/assistance/events", description="Live stream of new and updated assistances")
+@require_admin
+async def stream_assistance_events(
+    type: Optional[IncidentType] = Query(None), status: Optional[AssistanceStatusType] = Query(None)
+):
+    return StreamingResponse(
+        server_sent_events(dispatch_hub.stream(incident_type=type, status=status)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/assistance/{id}", response_model=schemas.AssistanceSchema)
-async def get_assistance(id: int, type: Optional[str] = Query(None)): ...
+@require_admin
+async def get_assistance(
+    id: int,
+    assistance_repo: Annotated[AbstractBackofficeAssistanceRepo, Depends(get_backoffice_assistance_repo)],
+    storage: Annotated[StorageBase, Depends(get_storage)],
+):
+    record = assistance_repo.get_assistance_from_id(id)
+    if record is None:
+        raise HTTPException(
+            title="Assistance Not Found",
+            message=f"Assistance with id {id} not found",
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+    assistance = schemas.AssistanceSchema.model_validate(record, from_attributes=True)
+    return assistance_service.sign_images([assistance], storage=storage)[0]
 
 
 @router.put("/assistance/{id}", response_model=schemas.AssistanceSchema)
-async def update_assistance(id: int, schema: schemas.UpdateAssistanceSchema): ...
+@require_admin
+async def update_assistance(
+    id: int,
+    schema: schemas.UpdateAssistanceSchema,
+    assistance_repo: Annotated[AbstractAssistanceRepo, Depends(get_assistance_repo)],
+    duplicate_detector: Annotated[AssistanceDuplicateDetector, Depends(get_duplicate_detector)],
+    storage: Annotated[StorageBase, Depends(get_storage)],
+):
+    record = assistance_service.update_assistance_status(
+        id=id,
+        status=schema.status,
+        assistance_repo=assistance_repo,
+        duplicate_detector=duplicate_detector,
+    )
+    if record is None:
+        raise HTTPException(
+            title="Assistance Not Found",
+            message=f"Assistance with id {id} not found",
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+    assistance = schemas.AssistanceSchema.model_validate(record, from_attributes=True)
+    return assistance_service.sign_images([assistance], storage=storage)[0]
 
 
 # Identification Routes
@@ -1,11 +1,15 @@
 from typing import Annotated
 
 from fastapi import APIRouter
-from fastapi import Depends, Request
+from fastapi import Depends, Query, Request
 from starlette import status
+from starlette.concurrency import run_in_threadpool
 
 from app import config
-from app.controller.dependencies import get_user_repo, get_assistance_repo, get_storage
+from app.config.response import FastJSONResponse
+from app.config.timing import TimedRoute
+from app.controller.dependencies import get_user_repo, get_assistance_repo, get_storage, get_duplicate_detector
+from app.controller.dependencies import get_reference_repo, get_reference_cache, get_sync_repo
 from app.data.assistance_repo import AbstractAssistanceRepo
 from app.data.schemas import LoginResponse, SubmitFeedbackSchema
 from app.data.schemas import LoginSchema
@@ -16,12 +20,17 @@ from app.data.schemas import ResetPasswordSchema
 from app.data.schemas import SignUpResponse
 from app.data.schemas import SignUpSchema
 from app.data.schemas import ValidateResetCodeSchema
+from app.data.reference_repo import AbstractReferenceRepo
+from app.data.sync_repo import AbstractSyncRepo
 from app.data.user_repo import AbstractUserRepo
-from app.domain import auth_service, assistance_service
+from app.domain import auth_service, assistance_service, reference_service, sync_service
 from app.domain.authorization import require_authorization
-from app.domain.storage import StorageBase
+from app.domain.duplicate_detector import AssistanceDuplicateDetector
+from app.domain.idempotency import idempotent
+from app.domain.reference_cache import ReferenceCache, cached_response
+from app.domain.storage import IMAGE_EXTENSIONS, StorageBase
 
-router = APIRouter(prefix="/api")
+router = APIRouter(prefix="/api", route_class=TimedRoute)
 
 
 @router.post("/login", response_model=LoginResponse)
@@ -46,6 +55,7 @@ async def login(
 
 
 @router.post("/signup", response_model=SignUpResponse)
+@idempotent
 async def sign_up(
     schema: SignUpSchema, user_repo: Annotated[AbstractUserRepo, Depends(get_user_repo)]
 ):
@@ -116,24 +126,28 @@ async def reset_password(
 
 
 @router.post("/request-assistance", status_code=status.HTTP_201_CREATED)
+@idempotent
 @require_authorization
 async def request_assistance(
     request: Request,
     schema: RequestAssistanceSchema,
     assistance_repo: Annotated[AbstractAssistanceRepo, Depends(get_assistance_repo)],
-    storage: Annotated[StorageBase, Depends(get_storage)]
+    storage: Annotated[StorageBase, Depends(get_storage)],
+    duplicate_detector: Annotated[AssistanceDuplicateDetector, Depends(get_duplicate_detector)]
 ):
-    assistance_service.request_assistance(
-        user_id=request.state.current_user,
+    await run_in_threadpool(
+        assistance_service.request_assistance,
+        user_id=request.state.current_user.id,
         latitude=schema.latitude,
         longitude=schema.longitude,
         address_complement=schema.address_complement,
         comment=schema.comment,
-        images=None,
-        image_extensions=None,
+        images=[image.data for image in schema.images],
+        image_extensions=[IMAGE_EXTENSIONS[image.content_type] for image in schema.images],
         type_=schema.type,
         assistance_repo=assistance_repo,
-        storage=storage
+        storage=storage,
+        duplicate_detector=duplicate_detector
     )
 
 
@@ -145,12 +159,19 @@ async def declare_accident(request: Request): ...
 @router.get("/emergency-contacts")
 @require_authorization
 async def get_emergency_contacts(
-    assistance_repo: Annotated[AbstractAssistanceRepo, Depends(get_assistance_repo)]
+    request: Request,
+    reference_repo: Annotated[AbstractReferenceRepo, Depends(get_reference_repo)],
+    cache: Annotated[ReferenceCache, Depends(get_reference_cache)]
 ):
-    return assistance_service.get_emergency_contacts(assistance_repo=assistance_repo)
+    # Off the event loop, so that concurrent cold reads overlap and share one query
+    contacts = await run_in_threadpool(
+        reference_service.get_emergency_contacts, reference_repo=reference_repo, cache=cache
+    )
+    return cached_response(request, contacts)
 
 
 @router.post("/submit-feedback", status_code=status.HTTP_201_CREATED)
+@idempotent
 @require_authorization
 async def submit_feedback(
     schema: SubmitFeedbackSchema,
@@ -158,11 +179,35 @@ async def submit_feedback(
     assistance_repo: Annotated[AbstractAssistanceRepo, Depends(get_assistance_repo)]
 ):
     return assistance_service.submit_feedback(
-        user_id=request.state.current_user["id"],
+        user_id=request.state.current_user.id,
         message=schema.message,
         assistance_repo=assistance_repo
     )
 
 
 @router.get("/faqs")
-async def get_faqs(): ...
+async def get_faqs(
+    request: Request,
+    reference_repo: Annotated[AbstractReferenceRepo, Depends(get_reference_repo)],
+    cache: Annotated[ReferenceCache, Depends(get_reference_cache)]
+):
+    faqs = await run_in_threadpool(reference_service.get_faqs, reference_repo=reference_repo, cache=cache)
+    return cached_response(request, faqs)
+
+
+@router.get("/sync")
+@require_authorization
+async def sync(
+    request: Request,
+    sync_repo: Annotated[AbstractSyncRepo, Depends(get_sync_repo)],
+    since: str | None = Query(None, description="ISO 8601 timestamp or cursor returned by the previous sync"),
+    limit: int = Query(500, ge=1, le=1000)
+):
+    changes = sync_service.sync_changes(
+        user_id=request.state.current_user.id,
+        since=since,
+        limit=limit,
+        sync_repo=sync_repo
+    )
+    # Rendered directly, the rows hold datetimes and enums orjson handles natively
+    return FastJSONResponse(content=changes)
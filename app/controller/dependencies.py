@@ -1,19 +1,77 @@
+from contextlib import contextmanager
+from typing import Iterator
+
 from fastapi import Depends
+from sqlmodel import Session
 
+from app.config.logs import log_pipeline
+from app.config.metrics import MetricsSampler, app_metrics
 from app.data.assistance_repo import AbstractAssistanceRepo, AssistanceRepo
+from app.data.backoffice import assistance_repo as backoffice_assistance_repo
+from app.data.backoffice import reference_repo as backoffice_reference_repo
+from app.data.reference_repo import AbstractReferenceRepo, ReferenceRepo
+from app.data.sync_repo import AbstractSyncRepo, SyncRepo
 from app.data.user_repo import AbstractUserRepo
 from app.data.user_repo import UserRepo
+from app.db.database import engine
 from app.db.session_hook import get_db
-from app.domain.storage import GCPStorage, StorageBase
+from app.domain.dispatch import dispatch_hub
+from app.domain.duplicate_detector import AssistanceDuplicateDetector, assistance_duplicates
+from app.domain.reference_cache import ReferenceCache, reference_cache
+from app.domain.storage import GCPStorage, StorageBase, blob_listings, signed_urls
+from app.utils import singleflight
+
+metrics_sampler = MetricsSampler(
+    metrics=app_metrics,
+    pool=engine.pool,
+    caches={"reference": reference_cache, "signed_urls": signed_urls, "blob_listings": blob_listings},
+    singleflight_groups=singleflight.groups,
+    log_pipeline=log_pipeline,
+)
 
 
 def get_user_repo(session=Depends(get_db)) -> AbstractUserRepo:
     return UserRepo(session=session)
 
 
+@contextmanager
+def user_repo_session() -> Iterator[AbstractUserRepo]:
+    """A user repository over its own session, for code running outside of the dependencies."""
+    with Session(engine) as session:
+        yield UserRepo(session=session)
+
+
 def get_assistance_repo(session=Depends(get_db)) -> AbstractAssistanceRepo:
-    return AssistanceRepo(session=session)
+    return AssistanceRepo(session=session, events=dispatch_hub)
+
+
+def get_backoffice_assistance_repo(session=Depends(get_db)) -> backoffice_assistance_repo.AbstractAssistanceRepo:
+    return backoffice_assistance_repo.AssistanceRepo(session=session, events=dispatch_hub)
+
+
+def get_reference_repo(session=Depends(get_db)) -> AbstractReferenceRepo:
+    return ReferenceRepo(session=session)
+
+
+def get_backoffice_reference_repo(session=Depends(get_db)) -> backoffice_reference_repo.AbstractReferenceRepo:
+    return backoffice_reference_repo.ReferenceRepo(session=session)
+
+
+def get_sync_repo(session=Depends(get_db)) -> AbstractSyncRepo:
+    return SyncRepo(session=session)
+
+
+def get_reference_cache() -> ReferenceCache:
+    return reference_cache
 
 
 def get_storage() -> StorageBase:
     return GCPStorage()
+
+
+def get_duplicate_detector() -> AssistanceDuplicateDetector:
+    return assistance_duplicates
+
+
+def get_metrics_sampler() -> MetricsSampler:
+    return metrics_sampler
@@ -0,0 +1,32 @@
+import hmac
+
+from fastapi import APIRouter
+from fastapi import Request
+from fastapi import Response
+from starlette import status
+
+from app.config.config import config
+from app.config.metrics import render_metrics
+from app.config.response import HTTPException
+from app.config.timing import TimedRoute
+from app.controller.dependencies import get_metrics_sampler
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    if not config.METRICS_TOKEN:
+        raise HTTPException(title="Not Found", message="Metrics are disabled", status_code=status.HTTP_404_NOT_FOUND)
+    authorization = request.headers.get("authorization", "")
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {config.METRICS_TOKEN}".encode()):
+        raise HTTPException(
+            title="Unauthorized Access",
+            message="The metrics token is missing or invalid",
+            status_code=status.HTTP_401_UNAUTHORIZED,
+        )
+
+    # The workers publish every few seconds, this one is brought up to date before being scraped
+    get_metrics_sampler().sample()
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
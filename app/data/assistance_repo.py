@@ -1,9 +1,47 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
-from typing import Any
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import bindparam
+from sqlmodel import Session, and_, or_, select
+
+from app.data.models import IncidentType, Assistance, AssistanceImage, AssistanceStatusType, Feedback
+from app.data.read_models import FeedbackRecord, from_instance
+from app.domain.dispatch import ASSISTANCE_CREATED, ASSISTANCE_UPDATED
+from app.utils import geo
+
+if TYPE_CHECKING:
+    from app.domain.dispatch import DispatchHub
 
-from sqlmodel import Session, select
+GEOHASH_PRECISION = 8
+NEAREST_SEARCH_START_RADIUS_KM = 0.5
 
-from app.data.models import IncidentType, Assistance, EmergencyContact, Feedback
+
+@lru_cache(maxsize=256)
+def _geohash_cells_query(cells: int, statuses: int):
+    """
+    Builds, once per shape, the candidate query of a radius lookup over `cells`
+    geohash ranges and `statuses` statuses, with the values left as bind
+    parameters. One fully specified term per (status, cell) lets the database
+    answer each term with a single range scan of the covering index.
+    """
+    terms = []
+    for cell in range(cells):
+        in_cell = (Assistance.geohash >= bindparam(f"lower_{cell}")) & (Assistance.geohash < bindparam(f"upper_{cell}"))
+        if statuses:
+            terms.extend(
+                (Assistance.status == bindparam(f"status_{status}", type_=Assistance.status.type)) & in_cell
+                for status in range(statuses)
+            )
+        else:
+            terms.append(in_cell)
+
+    return select(Assistance.id, Assistance.gps_latitude, Assistance.gps_longitude).where(
+        or_(*terms), Assistance.is_deleted == False
+    )
 
 
 class AbstractAssistanceRepo(ABC):
@@ -12,60 +50,302 @@ class AbstractAssistanceRepo(ABC):
     def create_incidence_record(
         self,
         user_id: int,
-        latitude: str,
-        longitude: str,
+        latitude: float,
+        longitude: float,
         address_complement: str,
         comment: str,
         type_: IncidentType,
-        images: list[bytes] | None
+        image_urls: list[str] | None,
+        duplicate_of_id: int | None = None
     ): ...
 
     @abstractmethod
-    def create_feedback_record(self, user_id: int, message: str): ...
+    def merge_into_assistance(self, id: int, comment: str | None, image_urls: list[str] | None): ...
+
+    @abstractmethod
+    def update_assistance_status(self, id: int, status: AssistanceStatusType): ...
+
+    @abstractmethod
+    def get_assistances_within_radius(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        statuses: list[AssistanceStatusType] | None = None,
+        limit: int | None = None
+    ): ...
+
+    @abstractmethod
+    def get_nearest_assistances(
+        self,
+        latitude: float,
+        longitude: float,
+        max_radius_km: float,
+        statuses: list[AssistanceStatusType] | None = None,
+        limit: int = 1
+    ): ...
+
+    @abstractmethod
+    def get_assistances_in_bounding_box(
+        self,
+        min_latitude: float,
+        min_longitude: float,
+        max_latitude: float,
+        max_longitude: float,
+        statuses: list[AssistanceStatusType] | None = None,
+        limit: int | None = None
+    ): ...
 
     @abstractmethod
-    def get_emergency_contacts(self): ...
+    def create_feedback_record(self, user_id: int, message: str): ...
 
 
 class AssistanceRepo(AbstractAssistanceRepo):
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, events: DispatchHub | None = None):
         self._session = session
+        self._events = events
 
     def create_incidence_record(
         self, user_id: int,
-        latitude: str,
-        longitude: str,
+        latitude: float,
+        longitude: float,
         address_complement: str,
         comment: str,
         type_: IncidentType,
-        images: list[bytes] | None
+        image_urls: list[str] | None,
+        duplicate_of_id: int | None = None
     ) -> dict[str, Any]:
         record = Assistance(
             user_id=user_id,
             gps_latitude=latitude,
             gps_longitude=longitude,
+            geohash=geo.encode_geohash(latitude, longitude, GEOHASH_PRECISION),
             address_complement=address_complement,
-            incident_type=type_
+            comment=comment,
+            incident_type=type_,
+            status=AssistanceStatusType.OPEN,
+            duplicate_of_id=duplicate_of_id
         )
+        # Content addressed blobs may be shared by several rows, only link each once
+        for image_url in dict.fromkeys(image_urls or []):
+            record.images.append(AssistanceImage(image_url=image_url))
         self._session.add(record)
         self._session.commit()
         self._session.refresh(record)
 
-        return dict(record)
+        assistance = dict(record)
+        if self._events:
+            self._events.publish(ASSISTANCE_CREATED, assistance)
+        return assistance
 
-    def get_emergency_contacts(self) -> list[dict[str, str]]:
-        records = self._session.exec(select(EmergencyContact)).all()
-        return list(map(lambda record: dict(record), records)) if records else []
+    def merge_into_assistance(self, id: int, comment: str | None, image_urls: list[str] | None) -> dict[str, Any] | None:
+        """
+        Merges a duplicate request into an existing open assistance: its comment
+        is appended and its images are linked, instead of creating a new row.
 
-    def create_feedback_record(self, user_id: int, message: str) -> dict[str, Any]:
-        record = Feedback(user_id=user_id, message=message)
+        Args:
+            id (int): The ID of the assistance to merge into.
+            comment (str | None): Comment of the duplicate request.
+            image_urls (list[str] | None): Images of the duplicate request.
 
+        Returns:
+            dict[str, Any] | None: The updated assistance, or None if it is no longer open.
+        """
+        record = self._session.exec(
+            select(Assistance).where(
+                (Assistance.id == id)
+                & (Assistance.is_deleted == False)
+                & (Assistance.status == AssistanceStatusType.OPEN)
+            )
+        ).one_or_none()
+        if record is None:
+            return None
+
+        changed = False
+        if comment and comment not in (record.comment or ""):
+            record.comment = f"{record.comment}\n{comment}" if record.comment else comment
+            changed = True
+        linked = {image.image_url for image in record.images}
+        for image_url in dict.fromkeys(image_urls or []):
+            if image_url not in linked:
+                record.images.append(AssistanceImage(image_url=image_url))
+                changed = True
+        if changed:
+            # Images are rows of their own, linking them alone would leave the assistance unchanged for sync
+            record.last_updated = datetime.now(timezone.utc)
         self._session.add(record)
         self._session.commit()
         self._session.refresh(record)
 
-        return dict(record)
+        assistance = dict(record)
+        if self._events:
+            self._events.publish(ASSISTANCE_UPDATED, assistance)
+        return assistance
+
+    def update_assistance_status(self, id: int, status: AssistanceStatusType) -> Assistance | None:
+        """
+        Updates the status of an assistance and notifies the dispatch board.
 
+        Args:
+            id (int): The ID of the assistance.
+            status (AssistanceStatusType): The new status.
 
+        Returns:
+            Assistance | None: The updated Assistance, or None if no assistance has this ID.
+        """
+        record = self._session.exec(
+            select(Assistance).where((Assistance.id == id) & (Assistance.is_deleted == False))
+        ).one_or_none()
+        if record is None:
+            return None
 
+        record.status = status
+        self._session.add(record)
+        self._session.commit()
+        self._session.refresh(record)
+
+        if self._events:
+            self._events.publish(ASSISTANCE_UPDATED, dict(record))
+        return record
+
+    def get_assistances_within_radius(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        statuses: list[AssistanceStatusType] | None = None,
+        limit: int | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Retrieves the assistances located within `radius_km` of a coordinate,
+        nearest first. Candidates are narrowed with index range scans over the
+        geohash cells covering the circle, then filtered by exact distance.
+
+        Args:
+            latitude (float): Latitude of the center in decimal degrees.
+            longitude (float): Longitude of the center in decimal degrees.
+            radius_km (float): Search radius in kilometers.
+            statuses (list[AssistanceStatusType] | None): Only return assistances in these statuses.
+            limit (int | None): Maximum number of assistances to return.
+
+        Returns:
+            list[dict[str, Any]]: The assistances, each with an extra `distance_km` key.
+        """
+        prefixes = geo.covering_geohashes(latitude, longitude, radius_km, GEOHASH_PRECISION)
+        if prefixes:
+            query = _geohash_cells_query(len(prefixes), len(statuses or []))
+            params = {f"status_{index}": status for index, status in enumerate(statuses or [])}
+            for index, (lower, upper) in enumerate(map(geo.geohash_prefix_range, prefixes)):
+                params[f"lower_{index}"] = lower
+                params[f"upper_{index}"] = upper
+        else:
+            columns = (Assistance.id, Assistance.gps_latitude, Assistance.gps_longitude)
+            query = self._bounding_box_query(*geo.bounding_box(latitude, longitude, radius_km), columns=columns)
+            query = self._filter_active_records(query, statuses)
+            params = None
+
+        # Distances are computed on the projected coordinates, only the matches are loaded
+        distances = {}
+        for id_, record_latitude, record_longitude in self._session.exec(query, params=params).all():
+            distance = geo.haversine_km(latitude, longitude, record_latitude, record_longitude)
+            if distance <= radius_km:
+                distances[id_] = distance
+
+        ids = sorted(distances, key=distances.get)[:limit] if limit else list(distances)
+        if not ids:
+            return []
+
+        records = self._session.exec(select(Assistance).where(Assistance.id.in_(ids))).all()
+        results = [{**dict(record), "distance_km": distances[record.id]} for record in records]
+        results.sort(key=lambda result: result["distance_km"])
+        return results
+
+    def get_nearest_assistances(
+        self,
+        latitude: float,
+        longitude: float,
+        max_radius_km: float,
+        statuses: list[AssistanceStatusType] | None = None,
+        limit: int = 1
+    ) -> list[dict[str, Any]]:
+        """
+        Retrieves the `limit` assistances nearest to a coordinate within
+        `max_radius_km`. The search starts with a small radius and doubles it
+        until enough assistances are found, so dense areas stay cheap.
+
+        Args:
+            latitude (float): Latitude of the center in decimal degrees.
+            longitude (float): Longitude of the center in decimal degrees.
+            max_radius_km (float): Largest radius searched, in kilometers.
+            statuses (list[AssistanceStatusType] | None): Only return assistances in these statuses.
+            limit (int): Number of assistances to return.
+
+        Returns:
+            list[dict[str, Any]]: The assistances, nearest first, each with a `distance_km` key.
+        """
+        radius_km = min(NEAREST_SEARCH_START_RADIUS_KM, max_radius_km)
+        while True:
+            results = self.get_assistances_within_radius(latitude, longitude, radius_km, statuses, limit)
+            if len(results) >= limit or radius_km >= max_radius_km:
+                return results
+            radius_km = min(radius_km * 2, max_radius_km)
+
+    def get_assistances_in_bounding_box(
+        self,
+        min_latitude: float,
+        min_longitude: float,
+        max_latitude: float,
+        max_longitude: float,
+        statuses: list[AssistanceStatusType] | None = None,
+        limit: int | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Retrieves the assistances located inside a bounding box. A box crossing
+        the antimeridian is expressed with `min_longitude > max_longitude`.
+
+        Args:
+            min_latitude (float): Southern edge of the box.
+            min_longitude (float): Western edge of the box.
+            max_latitude (float): Northern edge of the box.
+            max_longitude (float): Eastern edge of the box.
+            statuses (list[AssistanceStatusType] | None): Only return assistances in these statuses.
+            limit (int | None): Maximum number of assistances to return.
+
+        Returns:
+            list[dict[str, Any]]: The assistances inside the box.
+        """
+        query = self._bounding_box_query(min_latitude, min_longitude, max_latitude, max_longitude)
+        query = self._filter_active_records(query, statuses)
+        if limit:
+            query = query.limit(limit)
+
+        return [dict(record) for record in self._session.exec(query).all()]
+
+    @staticmethod
+    def _bounding_box_query(
+        min_latitude: float, min_longitude: float, max_latitude: float, max_longitude: float, columns=(Assistance,)
+    ):
+        if min_longitude <= max_longitude:
+            longitude_clause = Assistance.gps_longitude.between(min_longitude, max_longitude)
+        else:
+            longitude_clause = (Assistance.gps_longitude >= min_longitude) | (Assistance.gps_longitude <= max_longitude)
+
+        return select(*columns).where(
+            and_(Assistance.gps_latitude.between(min_latitude, max_latitude), longitude_clause)
+        )
+
+    @staticmethod
+    def _filter_active_records(query, statuses: list[AssistanceStatusType] | None):
+        query = query.where(Assistance.is_deleted == False)
+        if statuses:
+            query = query.where(Assistance.status.in_(statuses))
+        return query
+
+    def create_feedback_record(self, user_id: int, message: str) -> FeedbackRecord:
+        record = Feedback(user_id=user_id, message=message)
+
+        self._session.add(record)
+        self._session.commit()
+        self._session.refresh(record)
 
+        return from_instance(FeedbackRecord, record)
@@ -0,0 +1,120 @@
+from abc import abstractmethod
+
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import raiseload
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+
+from app.data.assistance_repo import AbstractAssistanceRepo as BaseAbstractAssistanceRepo
+from app.data.assistance_repo import AssistanceRepo as BaseAssistanceRepo
+from app.data.models import Assistance
+from app.data.models import Feedback
+from app.data.models import IncidentType
+
+# Loader plans matching the nested backoffice schemas. The user is joined in the
+# main query, images come in one extra query for the whole page, and any other
+# relationship raises instead of silently issuing a query per row.
+ASSISTANCE_DETAIL_PLAN = (joinedload(Assistance.user), selectinload(Assistance.images), raiseload("*"))
+FEEDBACK_DETAIL_PLAN = (joinedload(Feedback.user), raiseload("*"))
+
+
+class AbstractAssistanceRepo(BaseAbstractAssistanceRepo):
+
+    @abstractmethod
+    def get_assistances(self, offset: int, limit: int, type_: IncidentType | None = None): ...
+
+    @abstractmethod
+    def get_assistance_from_id(self, id: int): ...
+
+    @abstractmethod
+    def get_feedbacks(self, offset: int, limit: int): ...
+
+    @abstractmethod
+    def get_feedback_from_id(self, id: int): ...
+
+
+class AssistanceRepo(BaseAssistanceRepo, AbstractAssistanceRepo):
+
+    def get_assistances(self, offset: int, limit: int, type_: IncidentType | None = None) -> list[Assistance]:
+        """
+        Retrieves a page of assistances that have not been soft-deleted, newest
+        first, with their user and images loaded. A page costs two queries
+        whatever its size.
+
+        Args:
+            offset (int): The starting position for the records to retrieve.
+            limit (int): The maximum number of records to retrieve. If set to 0, all records are returned.
+            type_ (IncidentType | None): Only return assistances of this type.
+
+        Returns:
+            list[Assistance]: A list of Assistance objects.
+        """
+        query = (
+            select(Assistance)
+            .options(*ASSISTANCE_DETAIL_PLAN)
+            .where(Assistance.is_deleted == False)
+            .order_by(Assistance.id.desc())
+            .offset(offset)
+        )
+        if type_:
+            query = query.where(Assistance.incident_type == type_)
+        if limit > 0:
+            query = query.limit(limit)
+
+        return self._session.exec(query).all()
+
+    def get_assistance_from_id(self, id: int) -> Assistance | None:
+        """
+        Retrieves an assistance that has not been soft-deleted, with its user and images loaded.
+
+        Args:
+            id (int): The ID of the assistance.
+
+        Returns:
+            Assistance | None: The Assistance, or None if no assistance has this ID.
+        """
+        query = (
+            select(Assistance)
+            .options(*ASSISTANCE_DETAIL_PLAN)
+            .where((Assistance.id == id) & (Assistance.is_deleted == False))
+        )
+        return self._session.exec(query).one_or_none()
+
+    def get_feedbacks(self, offset: int, limit: int) -> list[Feedback]:
+        """
+        Retrieves a page of feedbacks that have not been soft-deleted, newest
+        first, with their user loaded in the same query.
+
+        Args:
+            offset (int): The starting position for the records to retrieve.
+            limit (int): The maximum number of records to retrieve. If set to 0, all records are returned.
+
+        Returns:
+            list[Feedback]: A list of Feedback objects.
+        """
+        query = (
+            select(Feedback)
+            .options(*FEEDBACK_DETAIL_PLAN)
+            .where(Feedback.is_deleted == False)
+            .order_by(Feedback.id.desc())
+            .offset(offset)
+        )
+        if limit > 0:
+            query = query.limit(limit)
+
+        return self._session.exec(query).all()
+
+    def get_feedback_from_id(self, id: int) -> Feedback | None:
+        """
+        Retrieves a feedback that has not been soft-deleted, with its user loaded.
+
+        Args:
+            id (int): The ID of the feedback.
+
+        Returns:
+            Feedback | None: The Feedback, or None if no feedback has this ID.
+        """
+        query = select(Feedback).options(*FEEDBACK_DETAIL_PLAN).where(
+            (Feedback.id == id) & (Feedback.is_deleted == False)
+        )
+        return self._session.exec(query).one_or_none()
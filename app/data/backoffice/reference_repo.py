@@ -0,0 +1,123 @@
+from abc import abstractmethod
+from datetime import datetime
+from datetime import timezone
+
+from sqlmodel import select
+
+from app.data.models import EmergencyContact
+from app.data.models import Faq
+from app.data.reference_repo import AbstractReferenceRepo as BaseAbstractReferenceRepo
+from app.data.reference_repo import ReferenceRepo as BaseReferenceRepo
+
+
+class AbstractReferenceRepo(BaseAbstractReferenceRepo):
+
+    @abstractmethod
+    def get_contact_list(self, offset: int, limit: int): ...
+
+    @abstractmethod
+    def get_contact_from_id(self, id: int): ...
+
+    @abstractmethod
+    def create_contact(self, name: str, number: str): ...
+
+    @abstractmethod
+    def update_contact(self, id: int, name: str, number: str): ...
+
+    @abstractmethod
+    def soft_delete_contact(self, id: int): ...
+
+    @abstractmethod
+    def get_faq_list(self, offset: int, limit: int): ...
+
+    @abstractmethod
+    def get_faq_from_id(self, id: int): ...
+
+    @abstractmethod
+    def create_faq(self, question: str, answer: str): ...
+
+    @abstractmethod
+    def update_faq(self, id: int, question: str, answer: str): ...
+
+    @abstractmethod
+    def soft_delete_faq(self, id: int): ...
+
+
+class ReferenceRepo(BaseReferenceRepo, AbstractReferenceRepo):
+    """
+    Manages the reference datasets. Every change bumps the version of the
+    dataset in the same transaction, invalidating the cached copies of all workers.
+    """
+
+    def get_contact_list(self, offset: int, limit: int) -> list[EmergencyContact]:
+        return self._get_list(EmergencyContact, offset, limit)
+
+    def get_contact_from_id(self, id: int) -> EmergencyContact | None:
+        return self._get_from_id(EmergencyContact, id)
+
+    def create_contact(self, name: str, number: str) -> EmergencyContact:
+        return self._create(EmergencyContact(name=name, number=number))
+
+    def update_contact(self, id: int, name: str, number: str) -> EmergencyContact | None:
+        return self._update(EmergencyContact, id, name=name, number=number)
+
+    def soft_delete_contact(self, id: int) -> bool:
+        return self._soft_delete(EmergencyContact, id)
+
+    def get_faq_list(self, offset: int, limit: int) -> list[Faq]:
+        return self._get_list(Faq, offset, limit)
+
+    def get_faq_from_id(self, id: int) -> Faq | None:
+        return self._get_from_id(Faq, id)
+
+    def create_faq(self, question: str, answer: str) -> Faq:
+        return self._create(Faq(question=question, answer=answer))
+
+    def update_faq(self, id: int, question: str, answer: str) -> Faq | None:
+        return self._update(Faq, id, question=question, answer=answer)
+
+    def soft_delete_faq(self, id: int) -> bool:
+        return self._soft_delete(Faq, id)
+
+    def _get_list(self, model, offset: int, limit: int):
+        """
+        Retrieves a paginated list of records that have not been soft-deleted.
+        If limit is set to 0, all records starting from the offset will be returned.
+        """
+        query = select(model).where(model.is_deleted == False).order_by(model.id).offset(offset)
+        if limit > 0:
+            query = query.limit(limit)
+        return self._session.exec(query).all()
+
+    def _get_from_id(self, model, id: int):
+        return self._session.exec(select(model).where((model.id == id) & (model.is_deleted == False))).one_or_none()
+
+    def _create(self, record):
+        self._session.add(record)
+        self._bump_cache_version(record.__tablename__)
+        self._session.commit()
+        self._session.refresh(record)
+        return record
+
+    def _update(self, model, id: int, **values):
+        record = self._get_from_id(model, id)
+        if record is None:
+            return None
+
+        for key, value in values.items():
+            setattr(record, key, value)
+        self._bump_cache_version(model.__tablename__)
+        self._session.commit()
+        self._session.refresh(record)
+        return record
+
+    def _soft_delete(self, model, id: int) -> bool:
+        record = self._get_from_id(model, id)
+        if record is None:
+            return False
+
+        record.is_deleted = True
+        record.deleted_at = datetime.now(timezone.utc)
+        self._bump_cache_version(model.__tablename__)
+        self._session.commit()
+        return True
@@ -112,12 +112,12 @@ class AssistanceImageSchema(BaseModel):
 
 class AssistanceSchema(BaseModel):
     id: int
-    gps_latitude: str
-    gps_longitude: str
-    address_complement: str
-    comment: str
+    gps_latitude: Optional[float] = None
+    gps_longitude: Optional[float] = None
+    address_complement: Optional[str] = None
+    comment: Optional[str] = None
     incident_type: IncidentType
-    user: UserDetailSchema
+    user: Optional[UserDetailSchema] = None
     images: List[AssistanceImageSchema]
     status: AssistanceStatusType
     created_at: datetime
@@ -135,7 +135,7 @@ class AssistanceListSchema(BaseModel):
 # ===== Feedback Schemas ========
 class FeedbackSchema(BaseModel):
     id: int
-    user: UserDetailSchema
+    user: Optional[UserDetailSchema] = None
     message: str
     created_at: datetime
     last_updated: datetime
@@ -5,6 +5,7 @@ from typing import Optional
 from sqlmodel import Column
 from sqlmodel import Enum
 from sqlmodel import Field
+from sqlmodel import Index
 from sqlmodel import Relationship
 
 from app.db.base import Base
@@ -24,6 +25,13 @@ class Faq(Base, table=True):
     answer: str
 
 
+class CacheVersion(Base, table=True):
+    __tablename__ = "cache_versions"
+
+    name: str = Field(index=True, unique=True)
+    version: int = 0
+
+
 class IncidentType(enum.Enum):
     Accident = "ACCIDENT"
     Assistance = "ASSISTANCE"
@@ -67,6 +75,7 @@ class Token(Base, table=True):
 
 class Feedback(Base, table=True):
     __tablename__ = "feedbacks"
+    __table_args__ = (Index("ix_feedbacks_user_last_updated", "user_id", "last_updated", "id"),)
 
     user_id: Optional[int] = Field(default=None, foreign_key="users.id")
     message: str
@@ -75,14 +84,28 @@ class Feedback(Base, table=True):
 
 class Assistance(Base, table=True):
     __tablename__ = "assistances"
+    __table_args__ = (
+        Index("ix_assistances_gps", "gps_latitude", "gps_longitude"),
+        # Covering indexes: radius lookups are answered from the index alone
+        Index("ix_assistances_geohash", "geohash", "gps_latitude", "gps_longitude", "is_deleted"),
+        Index(
+            "ix_assistances_status_geohash", "status", "geohash", "gps_latitude", "gps_longitude", "is_deleted"
+        ),
+        # Delta sync of a user's own assistances
+        Index("ix_assistances_user_last_updated", "user_id", "last_updated", "id"),
+    )
 
     user_id: Optional[int] = Field(default=None, foreign_key="users.id")
-    gps_latitude: Optional[str] = None
-    gps_longitude: Optional[str] = None
+    gps_latitude: Optional[float] = None
+    gps_longitude: Optional[float] = None
+    geohash: Optional[str] = None
     address_complement: Optional[str] = None
     comment: Optional[str] = None
     incident_type: IncidentType = Field(sa_column=Column(Enum(IncidentType)))
-    status: AssistanceStatusType = Field(sa_column=Column(Enum(AssistanceStatusType)))
+    status: AssistanceStatusType = Field(
+        default=AssistanceStatusType.OPEN, sa_column=Column(Enum(AssistanceStatusType))
+    )
+    duplicate_of_id: Optional[int] = Field(default=None, foreign_key="assistances.id")
     user: Optional[User] = Relationship(back_populates="assistances")
     images: List["AssistanceImage"] = Relationship(back_populates="assistance")
 
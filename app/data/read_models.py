@@ -0,0 +1,76 @@
+"""
+Lightweight, immutable read models for the read-only paths of the repositories.
+
+They are filled from column-projection `select()` statements, which skips the
+identity map, the SQLModel instance construction and the `dict()` copy done on
+full ORM rows, and they only carry the fields their callers use.
+"""
+from dataclasses import dataclass
+from dataclasses import fields
+from functools import lru_cache
+from typing import Any
+from typing import TypeVar
+
+from sqlmodel import select
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True, slots=True)
+class UserRecord:
+    id: int
+    external_reference: str
+    name: str
+    email: str
+    password: bytes
+    code: str | None
+    is_admin: bool | None
+    profile_image_url: str | None
+    chassis_number: str | None
+    plate_number: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class TokenRecord:
+    subject: str
+    access_token: bytes
+    refresh_token: bytes
+
+
+@dataclass(frozen=True, slots=True)
+class EmergencyContactRecord:
+    id: int
+    name: str
+    number: str
+
+
+@dataclass(frozen=True, slots=True)
+class FaqRecord:
+    id: int
+    question: str
+    answer: str
+
+
+@dataclass(frozen=True, slots=True)
+class FeedbackRecord:
+    id: int
+    user_id: int | None
+    message: str
+
+
+@lru_cache(maxsize=None)
+def _columns(read_model: type, model: type) -> tuple:
+    return tuple(getattr(model, field.name) for field in fields(read_model))
+
+
+def select_read_model(read_model: type, model: type):
+    """
+    Builds a `select()` of the columns of `model` matching the fields of
+    `read_model`, in order, so each row can be passed to `read_model(*row)`.
+    """
+    return select(*_columns(read_model, model))
+
+
+def from_instance(read_model: type[T], instance: Any) -> T:
+    """Builds a read model from an ORM instance already loaded, e.g. after an insert."""
+    return read_model(*(getattr(instance, field.name) for field in fields(read_model)))
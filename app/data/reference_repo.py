@@ -0,0 +1,92 @@
+from abc import ABC, abstractmethod
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select
+
+from app.data.models import CacheVersion, EmergencyContact, Faq
+from app.data.read_models import EmergencyContactRecord, FaqRecord, select_read_model
+from app.utils.singleflight import SingleFlight
+
+# Concurrent reads of the same dataset share a single query
+reference_reads = SingleFlight("reference_repo")
+
+# INSERT ... ON CONFLICT DO UPDATE of the supported databases
+UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class AbstractReferenceRepo(ABC):
+
+    @abstractmethod
+    def get_emergency_contacts(self, version: int | None = None): ...
+
+    @abstractmethod
+    def get_faqs(self, version: int | None = None): ...
+
+    @abstractmethod
+    def get_cache_version(self, name: str): ...
+
+
+class ReferenceRepo(AbstractReferenceRepo):
+    """
+    Reads the reference datasets (emergency contacts, FAQs) shown in the app,
+    along with the version counters used to invalidate their cached copies.
+    """
+
+    def __init__(self, session: Session):
+        self._session = session
+
+    def get_emergency_contacts(self, version: int | None = None) -> list[EmergencyContactRecord]:
+        """
+        Retrieves the emergency contacts that have not been soft-deleted.
+
+        Args:
+            version (int | None): The cache version the caller read. Loads are only shared
+                between callers of the same version, so one which started before a change
+                is never handed to a caller which already saw its version.
+
+        Returns:
+            list[EmergencyContactRecord]: The contacts, by ID.
+        """
+        return reference_reads.do(
+            (EmergencyContact.__tablename__, version),
+            lambda: self._get_active_records(EmergencyContactRecord, EmergencyContact),
+        )
+
+    def get_faqs(self, version: int | None = None) -> list[FaqRecord]:
+        """
+        Retrieves the FAQs that have not been soft-deleted, shared like `get_emergency_contacts`.
+        """
+        return reference_reads.do((Faq.__tablename__, version), lambda: self._get_active_records(FaqRecord, Faq))
+
+    def get_cache_version(self, name: str) -> int:
+        """
+        Retrieves the version of a cached dataset, shared by all workers.
+
+        Args:
+            name (str): Name of the dataset.
+
+        Returns:
+            int: The version, 0 if the dataset was never modified.
+        """
+        return reference_reads.do(("version", name), lambda: self._get_cache_version(name))
+
+    def _get_active_records(self, read_model, model) -> list:
+        rows = self._session.exec(
+            select_read_model(read_model, model).where(model.is_deleted == False).order_by(model.id)
+        ).all()
+        return [read_model(*row) for row in rows]
+
+    def _get_cache_version(self, name: str) -> int:
+        version = self._session.exec(select(CacheVersion.version).where(CacheVersion.name == name)).one_or_none()
+        return version or 0
+
+    def _bump_cache_version(self, name: str) -> None:
+        # A single upsert, so concurrent writers on other workers can neither lose a bump
+        # nor both insert the first version of a dataset
+        insert = UPSERTS[self._session.get_bind().dialect.name]
+        statement = insert(CacheVersion).values(CacheVersion(name=name, version=1).model_dump(exclude={"id"}))
+        self._session.exec(
+            statement.on_conflict_do_update(
+                index_elements=[CacheVersion.name],
+                set_={"version": CacheVersion.version + 1, "last_updated": statement.excluded.last_updated},
+            )
+        )
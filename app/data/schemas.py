@@ -1,5 +1,10 @@
+from typing import Literal
+
+from pydantic import Base64Bytes
 from pydantic import BaseModel
+from pydantic import Field
 
+from app import config
 from app.data.models import IncidentType
 
 
@@ -49,12 +54,18 @@ class ResetPasswordSchema(BaseModel):
     password: str
 
 
+class AssistanceImageSchema(BaseModel):
+    content_type: Literal["image/jpeg", "image/png", "image/webp"]
+    data: Base64Bytes
+
+
 class RequestAssistanceSchema(BaseModel):
-    longitude: str
-    latitude: str
+    longitude: float = Field(ge=-180, le=180)
+    latitude: float = Field(ge=-90, le=90)
     address_complement: str
     comment: str
     type: IncidentType
+    images: list[AssistanceImageSchema] = Field(default=[], max_length=config.ASSISTANCE_MAX_IMAGES)
 
 
 class SubmitFeedbackSchema(BaseModel):
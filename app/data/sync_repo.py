@@ -0,0 +1,68 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any
+
+from sqlmodel import Session, and_, or_, select
+
+from app.data.models import Assistance, EmergencyContact, Faq, Feedback
+
+# Datasets a client can sync, and whether each one is restricted to the user's own rows
+SYNC_DATASETS = {
+    EmergencyContact.__tablename__: (EmergencyContact, False),
+    Faq.__tablename__: (Faq, False),
+    Assistance.__tablename__: (Assistance, True),
+    Feedback.__tablename__: (Feedback, True),
+}
+
+
+class AbstractSyncRepo(ABC):
+
+    @abstractmethod
+    def get_changes(
+        self,
+        dataset: str,
+        user_id: int,
+        since: datetime | None,
+        since_id: int,
+        limit: int
+    ): ...
+
+
+class SyncRepo(AbstractSyncRepo):
+    def __init__(self, session: Session):
+        self._session = session
+
+    def get_changes(
+        self,
+        dataset: str,
+        user_id: int,
+        since: datetime | None,
+        since_id: int,
+        limit: int
+    ) -> list[dict[str, Any]]:
+        """
+        Retrieves the rows of a dataset changed after a position, oldest change
+        first. Rows are ordered by `(last_updated, id)` so rows sharing a
+        timestamp are neither skipped nor repeated across pages.
+
+        Args:
+            dataset (str): Name of the dataset, a key of `SYNC_DATASETS`.
+            user_id (int): The user syncing, used for the datasets restricted to their own rows.
+            since (datetime | None): `last_updated` of the last row already synced, None for a full sync.
+            since_id (int): ID of the last row already synced with that `last_updated`.
+            limit (int): Maximum number of rows to return.
+
+        Returns:
+            list[dict[str, Any]]: The changed rows, soft-deleted ones included.
+        """
+        model, per_user = SYNC_DATASETS[dataset]
+        query = select(model)
+        if since is not None:
+            query = query.where(
+                or_(model.last_updated > since, and_(model.last_updated == since, model.id > since_id))
+            )
+        if per_user:
+            query = query.where(model.user_id == user_id)
+
+        query = query.order_by(model.last_updated, model.id).limit(limit)
+        return [dict(record) for record in self._session.exec(query).all()]
@@ -6,6 +6,14 @@ from sqlmodel import select
 
 from app.data.models import IdentificationDetails, Token
 from app.data.models import User
+from app.data.read_models import TokenRecord
+from app.data.read_models import UserRecord
+from app.data.read_models import from_instance
+from app.data.read_models import select_read_model
+from app.utils.singleflight import SingleFlight
+
+# Every authorized request looks its user up, concurrent requests of a user share the query
+user_lookups = SingleFlight("user_repo.get_user_from_ref_key")
 
 
 class AbstractUserRepo(ABC):
@@ -41,11 +49,11 @@ class UserRepo(AbstractUserRepo):
     def __init__(self, session: Session):
         self._session = session
 
-    def get_user_from_email(self, email: str) -> dict[str, str] | None:
-        record = self._session.exec(
-            select(User).where(User.email == email)
+    def get_user_from_email(self, email: str) -> UserRecord | None:
+        row = self._session.exec(
+            select_read_model(UserRecord, User).where(User.email == email)
         ).one_or_none()
-        return dict(record) if record else None
+        return UserRecord(*row) if row else None
 
     def validate_identification_information(
         self, chassis_number: str, plate_number: str
@@ -57,19 +65,22 @@ class UserRepo(AbstractUserRepo):
         record = self._session.exec(query).one_or_none()
         return dict(record) if record else None
 
-    def create_user(self, email: str, name: str, password: bytes, is_admin: bool = False) -> dict[str, str]:
+    def create_user(self, email: str, name: str, password: bytes, is_admin: bool = False) -> UserRecord:
         user = User(email=email, name=name, password=password, is_admin=is_admin)
         self._session.add(user)
         self._session.commit()
         self._session.refresh(user)
 
-        return dict(user)
+        return from_instance(UserRecord, user)
 
-    def get_user_from_ref_key(self, ref_key: str) -> dict[str, str] | None:
-        record = self._session.exec(
-            select(User).where(User.external_reference == ref_key)
+    def get_user_from_ref_key(self, ref_key: str) -> UserRecord | None:
+        return user_lookups.do(ref_key, lambda: self._get_user_from_ref_key(ref_key))
+
+    def _get_user_from_ref_key(self, ref_key: str) -> UserRecord | None:
+        row = self._session.exec(
+            select_read_model(UserRecord, User).where(User.external_reference == ref_key)
         ).one_or_none()
-        return dict(record) if record else None
+        return UserRecord(*row) if row else None
 
     def save_user_reset_code(self, email: str, code: str | None):
         user = self._session.exec(select(User).where(User.email == email)).one()
@@ -85,11 +96,11 @@ class UserRepo(AbstractUserRepo):
         self._session.add(record)
         self._session.commit()
 
-    def get_tokens_from_ref_key(self, ref_key: str) -> dict[str, str] | None:
-        record = self._session.exec(
-            select(Token).where(Token.subject == ref_key)
+    def get_tokens_from_ref_key(self, ref_key: str) -> TokenRecord | None:
+        row = self._session.exec(
+            select_read_model(TokenRecord, Token).where(Token.subject == ref_key)
         ).one_or_none()
-        return dict(record) if record else None
+        return TokenRecord(*row) if row else None
 
     def save_tokens(self, subject: str, access_token: bytes, refresh_token: bytes):
         record = self._session.exec(
@@ -16,6 +16,9 @@ class Base(SQLModel):
         default_factory=lambda: datetime.now(timezone.utc), nullable=False
     )
     last_updated: datetime = Field(
-        default_factory=lambda: datetime.now(timezone.utc), nullable=False
+        default_factory=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        index=True,
+        sa_column_kwargs={"onupdate": lambda: datetime.now(timezone.utc)},
     )
     deleted_at: datetime | None = Field(nullable=True)
@@ -1,12 +1,84 @@
+import threading
+import time
+
 from sqlalchemy import Engine
+from sqlalchemy import QueuePool
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlmodel import SQLModel
 from sqlmodel import create_engine
 
 from app.config.config import config
+from app.db.instrumentation import record_query
+from app.db.sqlite import SQLiteProfile
+from app.db.sqlite import apply_profile
+from app.db.sqlite import is_sqlite_file
+from app.db.sqlite import pool_options
+from app.utils.timing import record_phase
+
+
+class TimedQueuePool(QueuePool):
+    """A `QueuePool` keeping how many checkouts it served and how long they waited for a connection."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_seconds += waited
+            record_phase("db.pool", waited)
+
+
+sqlite_profile = SQLiteProfile(
+    journal_mode=config.SQLITE_JOURNAL_MODE,
+    synchronous=config.SQLITE_SYNCHRONOUS,
+    busy_timeout_ms=config.SQLITE_BUSY_TIMEOUT_MS,
+    mmap_size=config.SQLITE_MMAP_SIZE,
+    cache_size_kib=config.SQLITE_CACHE_SIZE_KIB,
+    temp_store=config.SQLITE_TEMP_STORE,
+    pool_size=config.SQLITE_POOL_SIZE,
+)
+
+
+def _engine_options(database_uri: str) -> dict:
+    url = make_url(database_uri)
+    options = {}
+    # Only the queue pool of server databases and SQLite files waits for connections
+    if url.get_dialect().get_pool_class(url) is QueuePool:
+        options["poolclass"] = TimedQueuePool
+    if is_sqlite_file(url):
+        options.update(pool_options(sqlite_profile))
+    return options
+
 
 engine: Engine = create_engine(
-    str(config.SQLALCHEMY_DATABASE_URI), echo=config.ENVIRONMENT == "dev"
+    str(config.SQLALCHEMY_DATABASE_URI),
+    echo=config.ENVIRONMENT == "dev",
+    **_engine_options(str(config.SQLALCHEMY_DATABASE_URI)),
 )
+if is_sqlite_file(engine.url):
+    apply_profile(engine, sqlite_profile)
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    context._query_started_at = time.perf_counter()
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _record_query_time(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - context._query_started_at
+    record_phase("db", duration)
+    record_query(statement, parameters, duration, executemany)
 
 
 def create_db_and_tables():
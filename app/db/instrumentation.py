@@ -0,0 +1,162 @@
+"""
+Query statistics: per-request query counts and database time, detection of the
+same statement repeated within a request (N+1) and a log of slow statements.
+
+`record_query` is fed by the engine events of `app.db.database`. In tests,
+`capture_queries` and `query_budget` attach to any engine to assert how many
+queries a block of code, e.g. a repository call or a route, runs.
+"""
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Iterator
+
+from sqlalchemy import Engine
+from sqlalchemy import event
+from starlette.types import ASGIApp
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from app.config.config import config
+from app.utils.logger import get_logger
+from app.utils.timing import current_request
+
+log = get_logger()
+
+
+@dataclass(slots=True)
+class QueryStats:
+    """The statements run by a request or a block of code, counted by SQL text."""
+
+    count: int = 0
+    duration: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def record(self, statement: str, duration: float) -> None:
+        # Queries of a request can run in the threadpool
+        with self._lock:
+            self.count += 1
+            self.duration += duration
+            self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements run at least `threshold` times, the signature of an N+1 query pattern."""
+        with self._lock:
+            return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+    def report(self) -> str:
+        with self._lock:
+            lines = [f"{self.count} queries in {self.duration * 1000:.1f} ms"]
+            lines += [f"  {count} x {_one_line(statement)}" for statement, count in self.statements.most_common()]
+        return "\n".join(lines)
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("request_queries", default=None)
+# Statements taking longer are logged, in seconds
+slow_query_threshold = config.SLOW_QUERY_THRESHOLD_MS / 1000
+
+
+def record_query(statement: str, parameters: Any, duration: float, executemany: bool) -> None:
+    """Adds a statement to the stats of the current request and logs it when it is slow."""
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+    if duration >= slow_query_threshold:
+        log.warning(
+            "Slow query (%.1f ms) in %s: %s parameters=%s",
+            duration * 1000,
+            _route(),
+            _one_line(statement),
+            parameter_shape(parameters, executemany),
+        )
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> str:
+    """Describes the bound parameters by their types only, so values never reach the logs."""
+    if executemany and isinstance(parameters, (list, tuple)):
+        return f"{len(parameters)} x {parameter_shape(parameters[0]) if parameters else '()'}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{name}: {type(value).__name__}" for name, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+class QueryStatsMiddleware:
+    """
+    Collects the queries of each request and logs the statements it repeated at least
+    `repeat_threshold` times, a likely N+1 query pattern. A summary of every request
+    is logged at debug level.
+
+    It must run within `TimingMiddleware` to know the route of the request.
+    """
+
+    def __init__(self, app: ASGIApp, repeat_threshold: int) -> None:
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+            self.report(scope["method"], stats)
+
+    def report(self, method: str, stats: QueryStats) -> None:
+        route = _route()
+        for statement, count in stats.repeated(self.repeat_threshold):
+            log.warning("N+1 query suspected in %s %s: %d x %s", method, route, count, _one_line(statement))
+        log.debug("%s %s ran %d queries in %.1f ms", method, route, stats.count, stats.duration * 1000)
+
+
+@contextmanager
+def capture_queries(engine: Engine) -> Iterator[QueryStats]:
+    """Collects the statements run on `engine`, from any thread, while the block runs."""
+    stats = QueryStats()
+    started = threading.local()
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        started.at = time.perf_counter()
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        stats.record(statement, time.perf_counter() - started.at)
+
+    event.listen(engine, "before_cursor_execute", before)
+    event.listen(engine, "after_cursor_execute", after)
+    try:
+        yield stats
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+        event.remove(engine, "after_cursor_execute", after)
+
+
+@contextmanager
+def query_budget(engine: Engine, max_queries: int) -> Iterator[QueryStats]:
+    """Fails with the statements run when the block runs more than `max_queries` queries on `engine`."""
+    with capture_queries(engine) as stats:
+        yield stats
+    if stats.count > max_queries:
+        raise AssertionError(f"Query budget of {max_queries} exceeded: {stats.report()}")
+
+
+def _route() -> str:
+    timings = current_request()
+    return timings.route if timings is not None and timings.route else "<unmatched>"
+
+
+def _one_line(statement: str) -> str:
+    return " ".join(statement.split())
@@ -0,0 +1,54 @@
+"""
+Brings the database schema to the latest Alembic revision.
+
+Run before the server starts, by the deployment or by the lifespan of the app when
+`DATABASE_MIGRATE_ON_STARTUP` is set:
+
+    python -m app.db.migrations
+"""
+import logging
+import os
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import Connection
+from sqlalchemy import Engine
+from sqlalchemy import inspect
+
+from app.db.database import engine
+
+log = logging.getLogger("server")
+
+SCRIPT_LOCATION = os.path.join(os.path.dirname(os.path.dirname(__file__)), "alembic")
+# The revision creating the tables `create_all` used to create
+INITIAL_REVISION = "0001"
+
+
+def alembic_config(connection: Connection | None = None) -> Config:
+    """The configuration of `alembic.ini` without the file, migrating over `connection` when given."""
+    config = Config()
+    config.set_main_option("script_location", SCRIPT_LOCATION)
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def upgrade_database(bind: Engine = engine) -> None:
+    with bind.begin() as connection:
+        config = alembic_config(connection)
+        if _created_without_alembic(connection):
+            # Databases created by `create_all` have the initial schema already
+            log.info("Stamping the database at the initial revision")
+            command.stamp(config, INITIAL_REVISION)
+        command.upgrade(config, "head")
+
+
+def _created_without_alembic(connection: Connection) -> bool:
+    revision = MigrationContext.configure(connection).get_current_revision()
+    return revision is None and inspect(connection).has_table("users")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    upgrade_database()
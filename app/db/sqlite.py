@@ -0,0 +1,68 @@
+"""
+Engine profile of SQLite files served to a threadpool.
+
+Every connection gets the pragmas of `SQLiteProfile` as it is opened:
+    journal_mode=WAL        readers no longer block on the writer, nor the writer on them
+    synchronous=NORMAL      syncs at checkpoints rather than at every commit, which WAL
+                            keeps durable against crashes of the application
+    busy_timeout            waits for the lock of another writer instead of failing at once
+    mmap_size               reads pages from the mapped file without copying them
+    cache_size, temp_store  keep more pages, and the temporary tables of sorts, in memory
+
+The connections are pooled and shared by the threads, up to `pool_size` kept open:
+with WAL, a connection per concurrent request reads in parallel with the others.
+"""
+from dataclasses import dataclass
+
+from sqlalchemy import Engine
+from sqlalchemy import event
+from sqlalchemy.engine import URL
+
+
+@dataclass(frozen=True)
+class SQLiteProfile:
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    busy_timeout_ms: int = 5000
+    mmap_size: int = 256 * 1024 * 1024
+    cache_size_kib: int = 64 * 1024
+    temp_store: str = "MEMORY"
+    pool_size: int = 20
+
+    def pragmas(self) -> list[str]:
+        return [
+            f"PRAGMA journal_mode={self.journal_mode}",
+            f"PRAGMA synchronous={self.synchronous}",
+            f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}",
+            f"PRAGMA mmap_size={int(self.mmap_size)}",
+            # Negative sizes are in KiB rather than in pages
+            f"PRAGMA cache_size={-int(self.cache_size_kib)}",
+            f"PRAGMA temp_store={self.temp_store}",
+        ]
+
+
+def is_sqlite_file(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def pool_options(profile: SQLiteProfile) -> dict:
+    """Options of `create_engine` for the queue pool of SQLite files."""
+    return {
+        "pool_size": profile.pool_size,
+        "max_overflow": profile.pool_size,
+        # The pool hands a connection to one thread at a time
+        "connect_args": {"check_same_thread": False},
+    }
+
+
+def apply_profile(engine: Engine, profile: SQLiteProfile) -> None:
+    """Sets the pragmas of the profile on every connection the engine opens."""
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in profile.pragmas():
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
@@ -1,12 +1,24 @@
+from starlette import status
+
+from app.config.config import config
+from app.config.response import HTTPException
 from app.data.assistance_repo import AbstractAssistanceRepo
+from app.data.backoffice.schemas import AssistanceSchema
+from app.data.models import AssistanceStatusType
 from app.data.models import IncidentType
+from app.data.read_models import FeedbackRecord
+from app.domain.duplicate_detector import AssistanceDuplicateDetector
+from app.domain.storage import ALLOWED_EXTENSIONS
 from app.domain.storage import StorageBase
 
+ASSISTANCE_IMAGES_PREFIX = "assistances/"
+SIGNED_URL_EXPIRATION = 7 * 24 * 60 * 60  # 7 days expressed in seconds
+
 
 def request_assistance(
         user_id: int,
-        latitude: str,
-        longitude: str,
+        latitude: float,
+        longitude: float,
         address_complement: str,
         comment: str,
         type_: IncidentType,
@@ -14,10 +26,28 @@ def request_assistance(
         image_extensions: list[str] | None,
         assistance_repo: AbstractAssistanceRepo,
         storage: StorageBase,
+        duplicate_detector: AssistanceDuplicateDetector | None = None,
 ):
     record = {}
     match type_:
         case IncidentType.Assistance:
+            image_urls = _upload_images(
+                images=images, image_extensions=image_extensions, storage=storage
+            )
+            duplicate_of_id = duplicate_detector.find_duplicate(
+                user_id=user_id, latitude=latitude, longitude=longitude, incident_type=type_
+            ) if duplicate_detector else None
+
+            if duplicate_of_id is not None and config.ASSISTANCE_DUPLICATE_POLICY == "merge":
+                record = assistance_repo.merge_into_assistance(
+                    id=duplicate_of_id, comment=comment, image_urls=image_urls
+                )
+                if record:
+                    return record
+                # The original is no longer open, treat the request as a new one
+                duplicate_detector.discard(duplicate_of_id)
+                duplicate_of_id = None
+
             record = assistance_repo.create_incidence_record(
                 user_id=user_id,
                 latitude=latitude,
@@ -25,27 +55,86 @@ def request_assistance(
                 address_complement=address_complement,
                 comment=comment,
                 type_=type_,
-                images=images
+                image_urls=image_urls,
+                duplicate_of_id=duplicate_of_id
             )
+            if duplicate_detector and duplicate_of_id is None:
+                duplicate_detector.register(
+                    assistance_id=record["id"],
+                    user_id=user_id,
+                    latitude=latitude,
+                    longitude=longitude,
+                    incident_type=type_,
+                )
         case IncidentType.Accident:
             ...
-        # Call storage to store images and save record to db
     return record
 
 
-def get_emergency_contacts(assistance_repo: AbstractAssistanceRepo) -> list[dict[str, str]]:
-    contacts = assistance_repo.get_emergency_contacts()
-    if contacts:
-        exclude = ["external_reference", "is_deleted", "created_at", "last_updated", "deleted_at"]
-        return [{k: v for k, v in contact if k not in exclude} for contact in contacts]
-    return contacts
+def update_assistance_status(
+        id: int,
+        status: AssistanceStatusType,
+        assistance_repo: AbstractAssistanceRepo,
+        duplicate_detector: AssistanceDuplicateDetector | None = None,
+):
+    record = assistance_repo.update_assistance_status(id=id, status=status)
+    if record is not None and duplicate_detector and status != AssistanceStatusType.OPEN:
+        duplicate_detector.discard(id)
+    return record
+
+
+def _upload_images(
+        images: list[bytes] | None,
+        image_extensions: list[str] | None,
+        storage: StorageBase,
+) -> list[str]:
+    if not images:
+        return []
+
+    extensions = image_extensions or [None] * len(images)
+    if len(extensions) != len(images):
+        raise HTTPException(
+            title="Invalid Images",
+            message=f"Got {len(extensions)} image extensions for {len(images)} images",
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    for extension in extensions:
+        if extension and extension.lstrip(".").lower() not in ALLOWED_EXTENSIONS:
+            raise HTTPException(
+                title="Invalid Images",
+                message=f"Images must be one of {', '.join(sorted(ALLOWED_EXTENSIONS))}",
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+    return [
+        storage.upload_content_addressed(
+            bucket_name=config.GCP_STORAGE_BUCKET,
+            data=image,
+            extension=extension,
+            prefix=ASSISTANCE_IMAGES_PREFIX,
+        )
+        for image, extension in zip(images, extensions, strict=True)
+    ]
+
+
+def sign_images(assistances: list[AssistanceSchema], storage: StorageBase) -> list[AssistanceSchema]:
+    """Replaces the blob names of the images, as stored, by signed download URLs, those of a page in one batch."""
+    images = [image for assistance in assistances for image in assistance.images]
+    if not images:
+        return assistances
+
+    urls = storage.generate_download_urls_for_blobs(
+        bucket_name=config.GCP_STORAGE_BUCKET,
+        blob_names=[image.image_url for image in images],
+        expiration=SIGNED_URL_EXPIRATION,
+    )
+    for image in images:
+        image.image_url = urls[image.image_url]
+    return assistances
 
 
 def submit_feedback(
     user_id: int,
     message: str,
     assistance_repo: AbstractAssistanceRepo
-) -> dict[str, str]:
-    feedback = assistance_repo.create_feedback_record(user_id=user_id, message=message)
-    exclude = ["external_reference", "is_deleted", "created_at", "last_updated", "deleted_at"]
-    return {k: v for k, v in feedback.items() if k not in exclude}
+) -> FeedbackRecord:
+    return assistance_repo.create_feedback_record(user_id=user_id, message=message)
@@ -31,13 +31,13 @@ def login(
             title="User Not Found",
             message=f"User with email {email} not found",
         )
-    if not bcrypt.checkpw(password.encode("utf-8"), user["password"]):
+    if not bcrypt.checkpw(password.encode("utf-8"), user.password):
         raise HTTPException(
             title="Incorrect password", message="Supplied password is incorrect"
         )
 
     if is_admin:
-        if not user["is_admin"]:
+        if not user.is_admin:
             raise HTTPException(
                 title="Unauthorized login",
                 message="The provided credentials don't have administrative privileges"
@@ -45,23 +45,21 @@ def login(
 
     access_token = _create_token(
         secret_key=secret_key,
-        subject=user["external_reference"],
+        subject=user.external_reference,
         expires_delta=timedelta(minutes=access_token_expiration_time),
     )
     refresh_token = _create_token(
         secret_key=secret_key,
-        subject=user["external_reference"],
+        subject=user.external_reference,
         expires_delta=timedelta(minutes=refresh_token_expiration_time),
     )
     user_repo.save_tokens(
-        subject=user["external_reference"],
+        subject=user.external_reference,
         access_token=bcrypt.hashpw(access_token.encode("utf-8"), bcrypt.gensalt()),
         refresh_token=bcrypt.hashpw(refresh_token.encode("utf-8"), bcrypt.gensalt())
     )
 
-    user["access_token"] = access_token
-    user["refresh_token"] = refresh_token
-    return user
+    return {"name": user.name, "email": user.email, "access_token": access_token, "refresh_token": refresh_token}
 
 
 def sign_up(
@@ -87,23 +85,21 @@ def sign_up(
     user = user_repo.create_user(email=email, name=name, password=hashed_password)
     access_token = _create_token(
         secret_key=secret_key,
-        subject=user["external_reference"],
+        subject=user.external_reference,
         expires_delta=timedelta(minutes=access_token_expiration_time),
     )
     refresh_token = _create_token(
         secret_key=secret_key,
-        subject=user["external_reference"],
+        subject=user.external_reference,
         expires_delta=timedelta(minutes=refresh_token_expiration_time),
     )
     user_repo.save_tokens(
-        subject=user["external_reference"],
+        subject=user.external_reference,
         access_token=bcrypt.hashpw(access_token.encode("utf-8"), bcrypt.gensalt()),
         refresh_token=bcrypt.hashpw(refresh_token.encode("utf-8"), bcrypt.gensalt())
     )
 
-    user["access_token"] = access_token
-    user["refresh_token"] = refresh_token
-    return user
+    return {"name": user.name, "email": user.email, "access_token": access_token, "refresh_token": refresh_token}
 
 
 def refresh_user_token(
@@ -125,11 +121,12 @@ def refresh_user_token(
         )
 
     access_token = _create_token(
-        subject=user["external_reference"],
+        secret_key=secret_key,
+        subject=user.external_reference,
         expires_delta=timedelta(minutes=access_token_expiration_time),
     )
     user_repo.save_tokens(
-        subject=user["external_reference"],
+        subject=user.external_reference,
         access_token=bcrypt.hashpw(access_token.encode("utf-8"), bcrypt.gensalt()),
         refresh_token=bcrypt.hashpw(refresh_token.encode("utf-8"), bcrypt.gensalt())
     )
@@ -156,7 +153,7 @@ def validate_password_reset_code(email: str, code: str, user_repo: AbstractUserR
             title="User Not Found",
             message=f"No user associated with the provided email {email}",
         )
-    return user["code"] == code
+    return user.code == code
 
 
 def reset_password(code: str, email: str, password: str, user_repo: AbstractUserRepo):
@@ -166,7 +163,7 @@ def reset_password(code: str, email: str, password: str, user_repo: AbstractUser
             title="User Not Found",
             message=f"No user associated with the provided email {email}",
         )
-    if user["code"] != code:
+    if user.code != code:
         raise HTTPException(
             title="Invalid reset code", message="Provided reset code is not valid"
         )
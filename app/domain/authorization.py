@@ -2,13 +2,16 @@ from __future__ import annotations
 
 from functools import wraps
 from typing import TYPE_CHECKING
-from typing import Any
+from typing import Callable
+from typing import ContextManager
 
 import bcrypt
-from starlette.types import ASGIApp
+from starlette_context import context
 
 from app import HTTPErrorResponse, config
-from app.data.user_repo import AbstractUserRepo
+from app.config.logs import USER_REFERENCE
+from app.utils.timing import current_request
+from app.utils.timing import phase
 
 if TYPE_CHECKING:
     from fastapi import Request
@@ -18,33 +21,46 @@ from jose import JWTError
 from jose import jwt
 from passlib.exc import InvalidTokenError
 from starlette import status
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.base import RequestResponseEndpoint
+from starlette.routing import Match
 
 if TYPE_CHECKING:
-    from starlette.routing import Route
+    from starlette.routing import BaseRoute
+    from starlette.types import ASGIApp
+    from starlette.types import Scope
+
+    from app.data.read_models import UserRecord
+    from app.data.user_repo import AbstractUserRepo
 
 ALGORITHM = "HS256"
 
 
 class AuthorizationMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app: ASGIApp, repo: AbstractUserRepo):
+    def __init__(self, app: ASGIApp, repo_factory: Callable[[], ContextManager[AbstractUserRepo]]):
         super().__init__(app)
-        self._repo = repo
+        # A session per request, rather than one shared by every request since the import
+        self._repo_factory = repo_factory
 
     async def dispatch(
         self,
         request: Request,
         call_next: RequestResponseEndpoint,
     ):
-        route_endpoint = AuthorizationMiddleware._get_route_endpoint(
-            current_path=request.url.path,
+        route = AuthorizationMiddleware._get_route(
+            scope=request.scope,
             routes=(
                 request.scope.get("app", None).router.routes
                 if request.scope.get("app", None)
                 else []
             ),
         )
+        timings = current_request()
+        if route is not None and timings is not None:
+            # Named before the request is authorized, so rejected requests are counted under their route
+            timings.route = route.path_format
+        route_endpoint = route.endpoint if route else None
         if route_endpoint:
             if hasattr(route_endpoint, "_require_authorization"):
                 authorization_header = request.headers.get("authorization")
@@ -66,14 +82,15 @@ class AuthorizationMiddleware(BaseHTTPMiddleware):
                             details="The provided access token is not valid",
                             status_code=status.HTTP_401_UNAUTHORIZED,
                         ).response()
-                    if not self._validate_token_against_db(subject=payload, token=token):
+                    # In the threadpool, where concurrent lookups of a user share one query
+                    valid, current_user = await run_in_threadpool(self._authenticate, subject=payload, token=token)
+                    if not valid:
                         return HTTPErrorResponse(
                             title="Access Token Invalid",
                             details="The provided access token is not valid",
                             status_code=status.HTTP_401_UNAUTHORIZED,
                         ).response()
 
-                    current_user = self._get_user_record_from_db(ref_key=payload)
                     request.state.current_user = current_user
                     if not current_user:
                         return HTTPErrorResponse(
@@ -81,6 +98,15 @@ class AuthorizationMiddleware(BaseHTTPMiddleware):
                             details="The user requesting this resource is not authorized",
                             status_code=status.HTTP_401_UNAUTHORIZED,
                         ).response()
+                    if context.exists():
+                        # Logged with every record of the request
+                        context[USER_REFERENCE] = current_user.external_reference
+                    if hasattr(route_endpoint, "_require_admin") and not current_user.is_admin:
+                        return HTTPErrorResponse(
+                            title="Forbidden",
+                            details="The user requesting this resource is not an admin",
+                            status_code=status.HTTP_403_FORBIDDEN,
+                        ).response()
                     return await call_next(request)
             else:
                 request.state.current_user = None
@@ -90,17 +116,21 @@ class AuthorizationMiddleware(BaseHTTPMiddleware):
             return await call_next(request)
 
     @staticmethod
-    def _get_route_endpoint(
-        current_path: str | None, routes: list[Route | APIRoute]
-    ) -> Any | None:
-        if current_path is None:
-            return None
-
+    def _get_route(scope: Scope, routes: list[BaseRoute]) -> APIRoute | None:
+        """The API route the router will hand the request to, path parameters included."""
         for route in routes:
-            if isinstance(route, APIRoute) and route.path == current_path:
-                return route.endpoint
+            if isinstance(route, APIRoute):
+                match, _ = route.matches(scope)
+                if match == Match.FULL:
+                    return route
         return None
 
+    def _authenticate(self, subject: str, token: str) -> tuple[bool, UserRecord | None]:
+        """Checks the token against the stored one and loads the user it was issued to."""
+        with self._repo_factory() as repo:
+            valid = self._validate_token_against_db(repo, subject=subject, token=token)
+            return valid, self._get_user_record_from_db(repo, ref_key=subject) if valid else None
+
     @staticmethod
     def get_payload_from_token(token: str) -> str | None:
         try:
@@ -111,14 +141,19 @@ class AuthorizationMiddleware(BaseHTTPMiddleware):
         except JWTError:
             return None
 
-    def _get_user_record_from_db(self, ref_key) -> dict[str, str] | None:
-        record = self._repo.get_user_from_ref_key(ref_key=ref_key)
+    @staticmethod
+    def _get_user_record_from_db(repo: AbstractUserRepo, ref_key) -> UserRecord | None:
+        with phase("auth.db"):
+            record = repo.get_user_from_ref_key(ref_key=ref_key)
         return record if record else None
 
-    def _validate_token_against_db(self, subject: str, token: str) -> bool:
-        record = self._repo.get_tokens_from_ref_key(ref_key=subject)
+    @staticmethod
+    def _validate_token_against_db(repo: AbstractUserRepo, subject: str, token: str) -> bool:
+        with phase("auth.db"):
+            record = repo.get_tokens_from_ref_key(ref_key=subject)
         if record:
-            return bcrypt.checkpw(token.encode("utf-8"), record["access_token"])
+            with phase("auth.bcrypt"):
+                return bcrypt.checkpw(token.encode("utf-8"), record.access_token)
         return False
 
 
@@ -130,3 +165,9 @@ def require_authorization(function):
         return await function(*args, **kwargs)
 
     return wrapper
+
+
+def require_admin(function):
+    """Restricts a route to authorized users who are admins, it implies `require_authorization`."""
+    function._require_admin = True
+    return require_authorization(function)
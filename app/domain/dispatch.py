@@ -0,0 +1,151 @@
+import asyncio
+import threading
+from abc import ABC
+from abc import abstractmethod
+from contextlib import aclosing
+from typing import Any
+from typing import AsyncIterator
+from typing import Optional
+
+import orjson
+
+from app.config.response import json_dumps
+from app.data.models import AssistanceStatusType
+from app.data.models import IncidentType
+
+ASSISTANCE_CREATED = "assistance.created"
+ASSISTANCE_UPDATED = "assistance.updated"
+
+
+class EventBroker(ABC):
+    """Transports serialized events between publishers and subscribers.
+
+    Implementations backed by a shared service (e.g. Redis pub/sub) let several
+    workers see each other's events; `InMemoryBroker` only reaches subscribers
+    of the current process.
+    """
+
+    @abstractmethod
+    def publish(self, channel: str, message: str) -> None:
+        """Publishes a message. Must be safe to call from any thread.
+
+        Args:
+            channel: Name of the channel.
+            message: Serialized event.
+        """
+        ...
+
+    @abstractmethod
+    def subscribe(self, channel: str, heartbeat: float) -> AsyncIterator[Optional[str]]:
+        """Subscribes to a channel.
+
+        Args:
+            channel: Name of the channel.
+            heartbeat: Seconds after which `None` is yielded when no message arrived.
+
+        Returns:
+            An async iterator of messages, unsubscribing when closed.
+        """
+        ...
+
+
+class InMemoryBroker(EventBroker):
+    """An in-process broker delivering messages to subscribers of this worker."""
+
+    def __init__(self, max_queue_size: int = 1000) -> None:
+        self._max_queue_size = max_queue_size
+        self._subscribers: dict[str, set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, message: str) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(self._deliver, queue, message)
+
+    async def subscribe(self, channel: str, heartbeat: float) -> AsyncIterator[Optional[str]]:
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=self._max_queue_size))
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscriber)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscriber[1].get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                self._subscribers[channel].discard(subscriber)
+
+    def subscriber_count(self, channel: str) -> int:
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, message: str) -> None:
+        # A subscriber that cannot keep up loses its oldest events rather than
+        # blocking publishers or growing without bound
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+
+class DispatchHub:
+    """Fans assistance events out to the backoffice dispatch board."""
+
+    CHANNEL = "assistances"
+
+    def __init__(self, broker: EventBroker, heartbeat: float = 15) -> None:
+        self.broker = broker
+        self._heartbeat = heartbeat
+
+    def publish(self, event: str, assistance: dict[str, Any]) -> None:
+        """Publishes an assistance event.
+
+        Args:
+            event: Type of the event, `ASSISTANCE_CREATED` or `ASSISTANCE_UPDATED`.
+            assistance: The assistance record.
+        """
+        message = json_dumps({"event": event, "assistance": assistance}).decode("utf-8")
+        self.broker.publish(self.CHANNEL, message)
+
+    async def stream(
+        self,
+        incident_type: Optional[IncidentType] = None,
+        status: Optional[AssistanceStatusType] = None,
+    ) -> AsyncIterator[Optional[dict[str, Any]]]:
+        """Streams assistance events matching the filters.
+
+        Args:
+            incident_type: Only stream assistances of this type.
+            status: Only stream assistances in this status.
+
+        Returns:
+            An async iterator of events, yielding `None` as a heartbeat when idle.
+        """
+        async with aclosing(self.broker.subscribe(self.CHANNEL, self._heartbeat)) as messages:
+            async for message in messages:
+                if message is None:
+                    yield None
+                    continue
+
+                event = orjson.loads(message)
+                assistance = event["assistance"]
+                if incident_type and assistance.get("incident_type") != incident_type.value:
+                    continue
+                if status and assistance.get("status") != status.value:
+                    continue
+                yield event
+
+
+async def server_sent_events(events: AsyncIterator[Optional[dict[str, Any]]]) -> AsyncIterator[str]:
+    """Formats dispatch events as a `text/event-stream` body."""
+    async with aclosing(events):
+        async for event in events:
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: {event['event']}\ndata: {json_dumps(event['assistance']).decode('utf-8')}\n\n"
+
+
+dispatch_hub = DispatchHub(broker=InMemoryBroker())
@@ -0,0 +1,137 @@
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+from typing import Optional
+
+from app.config.config import config
+from app.data.models import IncidentType
+from app.utils import geo
+
+
+@dataclass(slots=True)
+class _RecentAssistance:
+    assistance_id: int
+    user_id: int
+    latitude: float
+    longitude: float
+    incident_type: IncidentType
+    created_at: float
+
+
+class AssistanceDuplicateDetector:
+    """
+    Remembers the assistances requested in the last `window_seconds` in an
+    in-memory index bucketed by time and by grid cell, so a new request is
+    checked against nearby recent requests without scanning the database.
+
+    The index is local to the worker: a duplicate sent to another worker is
+    not detected.
+    """
+
+    def __init__(
+        self,
+        distance_meters: float,
+        window_seconds: float,
+        match_other_users: bool = False,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._distance_km = distance_meters / 1000
+        self._window = window_seconds
+        self._match_other_users = match_other_users
+        self._clock = clock
+        # Cells are at least `distance` high so a match is at most one row away
+        self._cell_degrees = max(self._distance_km / geo.KM_PER_DEGREE, 1e-6)
+        self._buckets: dict[tuple[int, int, int], list[_RecentAssistance]] = {}
+        self._cells_by_id: dict[int, tuple[int, int, int]] = {}
+        self._evicted_up_to = None
+        self._lock = threading.Lock()
+
+    def find_duplicate(
+        self, user_id: int, latitude: float, longitude: float, incident_type: IncidentType
+    ) -> Optional[int]:
+        """
+        Finds a recent open assistance the new request duplicates.
+
+        Args:
+            user_id (int): The user requesting assistance.
+            latitude (float): Latitude of the request.
+            longitude (float): Longitude of the request.
+            incident_type (IncidentType): Type of the request.
+
+        Returns:
+            int | None: The ID of the nearest matching assistance, or None.
+        """
+        now = self._clock()
+        time_bucket = self._time_bucket(now)
+        row, column = self._cell(latitude, longitude)
+        # Longitude degrees shrink towards the poles, widen the search accordingly
+        columns = math.ceil(1 / max(math.cos(math.radians(min(abs(latitude) + self._cell_degrees, 89.9))), 1e-3))
+
+        best_id, best_distance = None, None
+        with self._lock:
+            self._evict(time_bucket)
+            for bucket in (time_bucket - 1, time_bucket):
+                for d_row in (-1, 0, 1):
+                    for d_column in range(-columns, columns + 1):
+                        for recent in self._buckets.get((bucket, row + d_row, column + d_column), ()):
+                            if now - recent.created_at > self._window:
+                                continue
+                            if recent.incident_type != incident_type:
+                                continue
+                            if not self._match_other_users and recent.user_id != user_id:
+                                continue
+
+                            distance = geo.haversine_km(latitude, longitude, recent.latitude, recent.longitude)
+                            if distance <= self._distance_km and (best_distance is None or distance < best_distance):
+                                best_id, best_distance = recent.assistance_id, distance
+        return best_id
+
+    def register(
+        self, assistance_id: int, user_id: int, latitude: float, longitude: float, incident_type: IncidentType
+    ) -> None:
+        """
+        Records a newly created assistance so later requests can be matched against it.
+        """
+        now = self._clock()
+        key = (self._time_bucket(now), *self._cell(latitude, longitude))
+        with self._lock:
+            self._evict(key[0])
+            self._buckets.setdefault(key, []).append(
+                _RecentAssistance(assistance_id, user_id, latitude, longitude, incident_type, now)
+            )
+            self._cells_by_id[assistance_id] = key
+
+    def discard(self, assistance_id: int) -> None:
+        """
+        Forgets an assistance, e.g. once it is no longer open.
+        """
+        with self._lock:
+            key = self._cells_by_id.pop(assistance_id, None)
+            if key is None or key not in self._buckets:
+                return
+            self._buckets[key] = [r for r in self._buckets[key] if r.assistance_id != assistance_id]
+            if not self._buckets[key]:
+                del self._buckets[key]
+
+    def _time_bucket(self, timestamp: float) -> int:
+        return int(timestamp // self._window)
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return int(latitude // self._cell_degrees), int(longitude // self._cell_degrees)
+
+    def _evict(self, time_bucket: int) -> None:
+        if self._evicted_up_to == time_bucket:
+            return
+        self._evicted_up_to = time_bucket
+        for key in [key for key in self._buckets if key[0] < time_bucket - 1]:
+            for recent in self._buckets.pop(key):
+                self._cells_by_id.pop(recent.assistance_id, None)
+
+
+assistance_duplicates = AssistanceDuplicateDetector(
+    distance_meters=config.ASSISTANCE_DUPLICATE_DISTANCE_METERS,
+    window_seconds=config.ASSISTANCE_DUPLICATE_WINDOW_SECONDS,
+    match_other_users=config.ASSISTANCE_DUPLICATE_MATCH_OTHER_USERS,
+)
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+import zlib
+from abc import ABC
+from abc import abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from dataclasses import field
+from typing import TYPE_CHECKING
+from typing import Callable
+
+from starlette import status
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.middleware.base import RequestResponseEndpoint
+from starlette.responses import Response
+
+from app.config.config import config
+from app.config.response import HTTPErrorResponse
+from app.domain.authorization import AuthorizationMiddleware
+
+if TYPE_CHECKING:
+    from fastapi import Request
+    from starlette.types import ASGIApp
+
+IDEMPOTENCY_KEY_HEADER = "idempotency-key"
+IDEMPOTENT_REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+# Computed again from the replayed body
+UNSTORED_HEADERS = {b"content-length"}
+# Bodies above this size are kept compressed
+COMPRESSION_THRESHOLD = 512
+
+
+@dataclass(slots=True)
+class IdempotencyRecord:
+    fingerprint: bytes
+    expires_at: float
+    completed: asyncio.Event = field(default_factory=asyncio.Event)
+    status_code: int = 0
+    headers: list[tuple[bytes, bytes]] = field(default_factory=list)
+    body: bytes = b""
+    compressed: bool = False
+
+    def response(self) -> Response:
+        body = zlib.decompress(self.body) if self.compressed else self.body
+        response = Response(content=body, status_code=self.status_code)
+        response.raw_headers.extend(self.headers)
+        response.headers[IDEMPOTENT_REPLAYED_HEADER] = "true"
+        return response
+
+
+class IdempotencyStore(ABC):
+    """Keeps the outcome of requests sent with an `Idempotency-Key` header."""
+
+    @abstractmethod
+    def reserve(self, key: str, fingerprint: bytes) -> tuple[IdempotencyRecord, bool]:
+        """Reserves a key for a request, unless a request already holds it.
+
+        Args:
+            key: The scoped idempotency key.
+            fingerprint: Digest of the request the key is used for.
+
+        Returns:
+            The record of the key and whether it was created by this call.
+        """
+        ...
+
+    @abstractmethod
+    def complete(self, key: str, status_code: int, headers: list[tuple[bytes, bytes]], body: bytes) -> None:
+        """Stores the response of the request holding a key and wakes up the waiting duplicates."""
+        ...
+
+    @abstractmethod
+    def release(self, key: str) -> None:
+        """Drops a key whose request failed, so that it can be retried."""
+        ...
+
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    """A bounded in-process store whose keys expire after `ttl` seconds."""
+
+    def __init__(self, ttl: float, max_entries: int = 10000, clock: Callable[[], float] = time.monotonic) -> None:
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._clock = clock
+        self._records: OrderedDict[str, IdempotencyRecord] = OrderedDict()
+
+    def reserve(self, key: str, fingerprint: bytes) -> tuple[IdempotencyRecord, bool]:
+        now = self._clock()
+        record = self._records.get(key)
+        if record is not None and record.expires_at > now:
+            return record, False
+
+        record = IdempotencyRecord(fingerprint=fingerprint, expires_at=now + self._ttl)
+        self._records[key] = record
+        self._records.move_to_end(key)
+        self._evict(now)
+        return record, True
+
+    def complete(self, key: str, status_code: int, headers: list[tuple[bytes, bytes]], body: bytes) -> None:
+        record = self._records.get(key)
+        if record is None:
+            return
+        record.status_code = status_code
+        record.headers = headers
+        if len(body) > COMPRESSION_THRESHOLD:
+            record.body, record.compressed = zlib.compress(body), True
+        else:
+            record.body = body
+        record.completed.set()
+
+    def release(self, key: str) -> None:
+        record = self._records.pop(key, None)
+        if record is not None:
+            # Waiting duplicates see an empty record and run the request themselves
+            record.completed.set()
+
+    def _evict(self, now: float) -> None:
+        while self._records:
+            oldest_key, oldest = next(iter(self._records.items()))
+            if oldest.expires_at > now and len(self._records) <= self._max_entries:
+                break
+            del self._records[oldest_key]
+            oldest.completed.set()
+
+
+class IdempotencyMiddleware(BaseHTTPMiddleware):
+    """
+    Replays the stored response of routes marked with `@idempotent` when they are
+    called again with the same `Idempotency-Key`, instead of running them twice.
+    Concurrent duplicates wait for the first request to finish.
+    """
+
+    def __init__(self, app: ASGIApp, store: IdempotencyStore, wait_timeout: float = 30):
+        super().__init__(app)
+        self._store = store
+        self._wait_timeout = wait_timeout
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint):
+        idempotency_key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        if not idempotency_key or not self._is_idempotent_route(request):
+            return await call_next(request)
+
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            return HTTPErrorResponse(
+                title="Invalid Idempotency Key",
+                details=f"The idempotency key must be at most {MAX_KEY_LENGTH} characters long",
+                status_code=status.HTTP_400_BAD_REQUEST,
+            ).response()
+
+        fingerprint = hashlib.sha256(await request.body()).digest()
+        # Keys are scoped to the authorized user so that two users can't collide, and
+        # to the request itself when there is none, the headers of which any client can send
+        user = getattr(request.state, "current_user", None)
+        caller = f"user:{user.external_reference}" if user is not None else f"request:{fingerprint.hex()}"
+        key = f"{caller}:{request.method}:{request.url.path}:{idempotency_key}"
+
+        while True:
+            record, created = self._store.reserve(key, fingerprint)
+            if created:
+                return await self._run_and_store(request, call_next, key)
+
+            if record.fingerprint != fingerprint:
+                return HTTPErrorResponse(
+                    title="Idempotency Key Reused",
+                    details="The idempotency key was already used for a different request",
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                ).response()
+
+            try:
+                await asyncio.wait_for(record.completed.wait(), timeout=self._wait_timeout)
+            except asyncio.TimeoutError:
+                return HTTPErrorResponse(
+                    title="Request In Progress",
+                    details="A request with the same idempotency key is still being processed",
+                    status_code=status.HTTP_409_CONFLICT,
+                ).response()
+
+            if record.status_code:
+                return record.response()
+            # The first request failed and released the key, try to take it over
+
+    async def _run_and_store(self, request: Request, call_next: RequestResponseEndpoint, key: str) -> Response:
+        try:
+            response = await call_next(request)
+        except BaseException:
+            self._store.release(key)
+            raise
+
+        if response.status_code >= status.HTTP_500_INTERNAL_SERVER_ERROR:
+            self._store.release(key)
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        # The raw headers, a response can repeat some of them, e.g. Set-Cookie
+        headers = [(name, value) for name, value in response.raw_headers if name not in UNSTORED_HEADERS]
+        self._store.complete(key, response.status_code, headers, body)
+        replayable = Response(content=body, status_code=response.status_code, background=response.background)
+        replayable.raw_headers = list(response.raw_headers)
+        return replayable
+
+    @staticmethod
+    def _is_idempotent_route(request: Request) -> bool:
+        app = request.scope.get("app", None)
+        route = AuthorizationMiddleware._get_route(scope=request.scope, routes=app.router.routes if app else [])
+        return route is not None and hasattr(route.endpoint, "_idempotent")
+
+
+def idempotent(function):
+    function._idempotent = True
+    return function
+
+
+idempotency_store = InMemoryIdempotencyStore(ttl=config.IDEMPOTENCY_KEY_TTL, max_entries=config.IDEMPOTENCY_STORE_SIZE)
@@ -0,0 +1,108 @@
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+from typing import Callable
+
+from fastapi import Request
+from starlette import status
+from starlette.responses import Response
+
+from app.config.config import config
+from app.config.response import json_dumps
+
+
+@dataclass(slots=True)
+class CachedBody:
+    version: int
+    body: bytes
+    etag: str
+    checked_at: float
+
+
+class ReferenceCache:
+    """
+    Keeps rarely changing datasets serialized as JSON, keyed by name and
+    versioned by a counter shared between workers. The shared version is
+    checked at most every `check_interval` seconds, so a change made on
+    another worker is served after at most that delay; changes made on this
+    worker are served right away through `invalidate`.
+    """
+
+    def __init__(self, check_interval: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self._check_interval = check_interval
+        self._clock = clock
+        self._entries: dict[str, CachedBody] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, version: Callable[[], int], loader: Callable[[int], Any]) -> CachedBody:
+        """
+        Returns the cached body of a dataset, reloading it when its version changed.
+
+        Args:
+            name: Name of the dataset.
+            version: Returns the shared version of the dataset.
+            loader: Returns the dataset at the version it is given, as a JSON-serializable value.
+
+        Returns:
+            The serialized dataset and its ETag.
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is not None and now - entry.checked_at < self._check_interval:
+            with self._lock:
+                self.hits += 1
+            return entry
+
+        current_version = version()
+        if entry is not None and entry.version == current_version:
+            entry.checked_at = now
+            with self._lock:
+                self.hits += 1
+            return entry
+
+        # Sorted keys and a tag derived from the content: every worker hands out the same tag
+        body = json_dumps(loader(current_version), sort_keys=True)
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        entry = CachedBody(version=current_version, body=body, etag=etag, checked_at=now)
+        with self._lock:
+            stored = self._entries.get(name)
+            # A slower load of an older version must not replace a newer one
+            if stored is None or stored.version <= current_version:
+                self._entries[name] = entry
+            self.misses += 1
+        return entry
+
+    def invalidate(self, name: str) -> None:
+        with self._lock:
+            self._entries.pop(name, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def cached_response(request: Request, entry: CachedBody) -> Response:
+    """
+    Builds the response of a cached dataset, or a 304 when the client already has it.
+    """
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+reference_cache = ReferenceCache(check_interval=config.REFERENCE_CACHE_CHECK_INTERVAL)
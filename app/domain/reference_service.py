@@ -0,0 +1,65 @@
+from app.data.backoffice.reference_repo import AbstractReferenceRepo as AbstractBackofficeReferenceRepo
+from app.data.models import EmergencyContact
+from app.data.models import Faq
+from app.data.reference_repo import AbstractReferenceRepo
+from app.domain.reference_cache import CachedBody
+from app.domain.reference_cache import ReferenceCache
+
+EMERGENCY_CONTACTS = EmergencyContact.__tablename__
+FAQS = Faq.__tablename__
+
+
+def get_emergency_contacts(reference_repo: AbstractReferenceRepo, cache: ReferenceCache) -> CachedBody:
+    return cache.get(
+        name=EMERGENCY_CONTACTS,
+        version=lambda: reference_repo.get_cache_version(EMERGENCY_CONTACTS),
+        loader=lambda version: reference_repo.get_emergency_contacts(version=version),
+    )
+
+
+def get_faqs(reference_repo: AbstractReferenceRepo, cache: ReferenceCache) -> CachedBody:
+    return cache.get(
+        name=FAQS,
+        version=lambda: reference_repo.get_cache_version(FAQS),
+        loader=lambda version: reference_repo.get_faqs(version=version),
+    )
+
+
+def create_contact(name: str, number: str, reference_repo: AbstractBackofficeReferenceRepo, cache: ReferenceCache):
+    record = reference_repo.create_contact(name=name, number=number)
+    cache.invalidate(EMERGENCY_CONTACTS)
+    return record
+
+
+def update_contact(
+    id: int, name: str, number: str, reference_repo: AbstractBackofficeReferenceRepo, cache: ReferenceCache
+):
+    record = reference_repo.update_contact(id=id, name=name, number=number)
+    cache.invalidate(EMERGENCY_CONTACTS)
+    return record
+
+
+def delete_contact(id: int, reference_repo: AbstractBackofficeReferenceRepo, cache: ReferenceCache) -> bool:
+    deleted = reference_repo.soft_delete_contact(id=id)
+    cache.invalidate(EMERGENCY_CONTACTS)
+    return deleted
+
+
+def create_faq(question: str, answer: str, reference_repo: AbstractBackofficeReferenceRepo, cache: ReferenceCache):
+    record = reference_repo.create_faq(question=question, answer=answer)
+    cache.invalidate(FAQS)
+    return record
+
+
+def update_faq(
+    id: int, question: str, answer: str, reference_repo: AbstractBackofficeReferenceRepo, cache: ReferenceCache
+):
+    record = reference_repo.update_faq(id=id, question=question, answer=answer)
+    cache.invalidate(FAQS)
+    return record
+
+
+def delete_faq(id: int, reference_repo: AbstractBackofficeReferenceRepo, cache: ReferenceCache) -> bool:
+    deleted = reference_repo.soft_delete_faq(id=id)
+    cache.invalidate(FAQS)
+    return deleted
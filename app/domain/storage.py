@@ -1,14 +1,176 @@
+import hashlib
+import threading
+import time
 from abc import ABC
 from abc import abstractmethod
+from collections import OrderedDict
+from datetime import timedelta
+from functools import cached_property
+from typing import Callable
+from typing import Dict
 from typing import List
 from typing import Optional
 
-from google.cloud import storage
-from google.cloud.exceptions import GoogleCloudError
-from google.oauth2 import service_account
-
 from app import config
 
+# The image types clients may upload, and the extension of their blobs
+IMAGE_EXTENSIONS = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp"}
+ALLOWED_EXTENSIONS = frozenset({*IMAGE_EXTENSIONS.values(), "jpeg"})
+
+
+def content_blob_name(data: bytes, extension: Optional[str] = None, prefix: str = "") -> str:
+    """Builds the blob name under which `data` is stored when content addressed.
+
+    Args:
+        data: Bytes of the object.
+        extension: Optional file extension, with or without the leading dot.
+        prefix: Prefix prepended to the name (e.g., 'assistances/').
+
+    Returns:
+        `<prefix><sha256 hex digest>[.<extension>]`
+
+    Raises:
+        ValueError: If the extension is not one of `ALLOWED_EXTENSIONS`.
+    """
+    name = f"{prefix}{hashlib.sha256(data).hexdigest()}"
+    if extension:
+        extension = extension.lstrip(".").lower()
+        if extension not in ALLOWED_EXTENSIONS:
+            raise ValueError(f"Unsupported blob extension {extension!r}")
+        name = f"{name}.{extension}"
+    return name
+
+
+class BlobIndex:
+    """A bounded, thread safe record of blobs known to exist in a bucket.
+
+    Entries are evicted least recently used first once `max_entries` is reached,
+    in which case the next lookup falls back to the backend's exists check.
+    """
+
+    def __init__(self, max_entries: int = 10000) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def add(self, bucket_name: str, blob_name: str) -> None:
+        with self._lock:
+            self._entries[(bucket_name, blob_name)] = None
+            self._entries.move_to_end((bucket_name, blob_name))
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SignedUrlCache:
+    """A bounded, thread safe cache of signed URLs keyed by (bucket, blob, method).
+
+    A URL is handed out again until `reuse_fraction` of its lifetime has elapsed,
+    which guarantees callers always receive a URL with at least
+    `(1 - reuse_fraction) * expiration` seconds left.
+    """
+
+    def __init__(
+        self,
+        reuse_fraction: float = 0.5,
+        max_entries: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._reuse_fraction = reuse_fraction
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[tuple[str, str, str], tuple[str, float, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, bucket_name: str, blob_name: str, method: str, expiration: int) -> Optional[str]:
+        key = (bucket_name, blob_name, method)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                url, signed_at, lifetime = entry
+                if (
+                    lifetime >= expiration
+                    and self._clock() - signed_at < lifetime * self._reuse_fraction
+                ):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return url
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, bucket_name: str, blob_name: str, method: str, expiration: int, url: str) -> None:
+        key = (bucket_name, blob_name, method)
+        with self._lock:
+            self._entries[key] = (url, self._clock(), expiration)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class BlobListingCache:
+    """A short lived, thread safe cache of blob names listed under a prefix."""
+
+    def __init__(self, ttl: float = 30, clock: Callable[[], float] = time.monotonic) -> None:
+        self._ttl = ttl
+        self._clock = clock
+        self._entries: Dict[tuple[str, str], tuple[List[str], float]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, bucket_name: str, prefix: str) -> Optional[List[str]]:
+        with self._lock:
+            entry = self._entries.get((bucket_name, prefix))
+            if entry is None:
+                self.misses += 1
+                return None
+            blob_names, listed_at = entry
+            if self._clock() - listed_at >= self._ttl:
+                del self._entries[(bucket_name, prefix)]
+                self.misses += 1
+                return None
+            self.hits += 1
+            return blob_names
+
+    def set(self, bucket_name: str, prefix: str, blob_names: List[str]) -> None:
+        with self._lock:
+            self._entries[(bucket_name, prefix)] = (blob_names, self._clock())
+
+    def invalidate(self, bucket_name: str, blob_name: str) -> None:
+        """Drops every listing whose prefix covers `blob_name`."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == bucket_name and blob_name.startswith(k[1])]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+uploaded_blobs = BlobIndex(max_entries=config.STORAGE_BLOB_INDEX_SIZE)
+signed_urls = SignedUrlCache(
+    reuse_fraction=config.SIGNED_URL_REUSE_FRACTION,
+    max_entries=config.SIGNED_URL_CACHE_SIZE,
+)
+blob_listings = BlobListingCache(ttl=config.BLOB_LISTING_CACHE_TTL)
+
 
 class StorageBase(ABC):
 
@@ -38,6 +200,52 @@ class StorageBase(ABC):
         """
         ...
 
+    @abstractmethod
+    def blob_exists(self, bucket_name: str, blob_name: str) -> bool:
+        """Checks whether an object exists in an object storage bucket.
+
+        Args:
+            bucket_name: Name of the bucket.
+            blob_name: Name of the object.
+
+        Returns:
+            True if the object exists, False otherwise.
+        """
+        ...
+
+    def upload_content_addressed(
+        self,
+        bucket_name: str,
+        data: bytes,
+        extension: Optional[str] = None,
+        prefix: str = "",
+    ) -> str:
+        """Uploads bytes under a name derived from their content.
+
+        Identical payloads map to the same blob, so a duplicate only costs a
+        hash computation: the local index is checked first, then the backend,
+        and the upload is skipped when either already knows the blob.
+
+        Args:
+            bucket_name: Name of the bucket.
+            data: Bytes to upload.
+            extension: Optional file extension appended to the blob name.
+            prefix: Prefix prepended to the blob name (e.g., 'assistances/').
+
+        Returns:
+            The name of the blob holding the data.
+        """
+        blob_name = content_blob_name(data=data, extension=extension, prefix=prefix)
+        if (bucket_name, blob_name) in uploaded_blobs:
+            return blob_name
+
+        if not self.blob_exists(bucket_name=bucket_name, blob_name=blob_name):
+            self.upload_bytes(
+                bucket_name=bucket_name, data=data, destination_blob_name=blob_name
+            )
+        uploaded_blobs.add(bucket_name=bucket_name, blob_name=blob_name)
+        return blob_name
+
     @abstractmethod
     def generate_download_urls(self, bucket_name: str, prefix: str, expiration: int):
         """Generates signed URLs for objects in an object storage bucket.
@@ -67,6 +275,26 @@ class StorageBase(ABC):
         """
         ...
 
+    def generate_download_urls_for_blobs(
+        self, bucket_name: str, blob_names: List[str], expiration: int = 604800
+    ) -> Dict[str, str]:
+        """Generates signed URLs for a batch of objects, e.g. every image on a page.
+
+        Args:
+            bucket_name: Name of the bucket.
+            blob_names: Names of the objects.
+            expiration: Expiration time for the generated URLs.
+
+        Returns:
+            A mapping of blob name to signed URL.
+        """
+        return {
+            blob_name: self.generate_download_url(
+                bucket_name=bucket_name, blob_name=blob_name, expiration=expiration
+            )
+            for blob_name in dict.fromkeys(blob_names)
+        }
+
 
 class GCPStorage(StorageBase):
     """A class for interacting with Google Cloud Storage."""
@@ -78,18 +306,25 @@ class GCPStorage(StorageBase):
             key_file_path: Path to the service account key file. If not provided,
                 Application Default Credentials will be used.
         """
+        self._key_file_path = key_file_path or config.GCP_AUTH_SERVICE_FILE
+
+    @cached_property
+    def client(self):
+        """The Cloud Storage client, created on first use: many requests depending on
+        the storage, like pages of assistances without images, never call it."""
 
-        if not key_file_path:
-            key_file_path = config.GCP_AUTH_SERVICE_FILE
+        # Imported on first use, the Google Cloud client libraries are slow to import
+        from google.cloud import storage
+        from google.oauth2 import service_account
 
-        if key_file_path:
+        if self._key_file_path:
             self.credentials = service_account.Credentials.from_service_account_file(
-                key_file_path
+                self._key_file_path
             )
         else:
             # Use Application Default Credentials
             self.credentials = None
-        self.client = storage.Client(credentials=self.credentials)
+        return storage.Client(credentials=self.credentials)
 
     def upload_file(
         self, bucket_name: str, source_file_path: str, destination_blob_name: str
@@ -115,12 +350,28 @@ class GCPStorage(StorageBase):
             data: Bytes to upload.
             destination_blob_name: Name of the object in the bucket.
         """
+        from google.cloud.exceptions import GoogleCloudError
+
         try:
             bucket = self.client.bucket(bucket_name)
             blob = bucket.blob(destination_blob_name)
             blob.upload_from_string(data)
         except GoogleCloudError as e:
             raise e
+        blob_listings.invalidate(bucket_name=bucket_name, blob_name=destination_blob_name)
+
+    def blob_exists(self, bucket_name: str, blob_name: str) -> bool:
+        """Checks whether an object exists in a Google Cloud Storage bucket.
+
+        Args:
+            bucket_name: Name of the bucket.
+            blob_name: Name of the object.
+
+        Returns:
+            True if the object exists, False otherwise.
+        """
+        bucket = self.client.bucket(bucket_name)
+        return bucket.blob(blob_name).exists()
 
     def generate_download_urls(
         self, bucket_name: str, prefix: str, expiration: int = 604800
@@ -135,15 +386,16 @@ class GCPStorage(StorageBase):
         Returns:
             A list of signed URLs.
         """
-        bucket = self.client.bucket(bucket_name)
-        blobs = bucket.list_blobs(prefix=prefix)
-
-        signed_urls = []
-        for blob in blobs:
-            url = blob.generate_signed_url(expiration=expiration, method="GET")
-            signed_urls.append(url)
+        blob_names = blob_listings.get(bucket_name=bucket_name, prefix=prefix)
+        if blob_names is None:
+            bucket = self.client.bucket(bucket_name)
+            blob_names = [blob.name for blob in bucket.list_blobs(prefix=prefix)]
+            blob_listings.set(bucket_name=bucket_name, prefix=prefix, blob_names=blob_names)
 
-        return signed_urls
+        urls = self.generate_download_urls_for_blobs(
+            bucket_name=bucket_name, blob_names=blob_names, expiration=expiration
+        )
+        return [urls[blob_name] for blob_name in blob_names]
 
     def generate_download_url(
         self, bucket_name: str, blob_name: str, expiration: int = 604800
@@ -158,7 +410,44 @@ class GCPStorage(StorageBase):
         Returns:
             The generated signed URL.
         """
-        bucket = self.client.bucket(bucket_name)
-        blob = bucket.blob(blob_name)
-        url = blob.generate_signed_url(expiration=expiration, method="GET")
-        return url
+        return self.generate_download_urls_for_blobs(
+            bucket_name=bucket_name, blob_names=[blob_name], expiration=expiration
+        )[blob_name]
+
+    def generate_download_urls_for_blobs(
+        self, bucket_name: str, blob_names: List[str], expiration: int = 604800
+    ) -> Dict[str, str]:
+        """Generates signed URLs for a batch of objects in a Google Cloud Storage bucket.
+
+        URLs still in their reuse window are served from the signed URL cache and
+        only the remaining blobs are signed.
+
+        Args:
+            bucket_name: Name of the bucket.
+            blob_names: Names of the objects.
+            expiration: Expiration time for the generated URLs in seconds. Defaults to 7 days.
+
+        Returns:
+            A mapping of blob name to signed URL.
+        """
+        urls = {}
+        bucket = None
+        for blob_name in dict.fromkeys(blob_names):
+            url = signed_urls.get(
+                bucket_name=bucket_name, blob_name=blob_name, method="GET", expiration=expiration
+            )
+            if url is None:
+                bucket = bucket or self.client.bucket(bucket_name)
+                # An int expiration is read as an epoch timestamp, a timedelta as a lifetime
+                url = bucket.blob(blob_name).generate_signed_url(
+                    version="v4", expiration=timedelta(seconds=expiration), method="GET"
+                )
+                signed_urls.set(
+                    bucket_name=bucket_name,
+                    blob_name=blob_name,
+                    method="GET",
+                    expiration=expiration,
+                    url=url,
+                )
+            urls[blob_name] = url
+        return urls
@@ -0,0 +1,103 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from datetime import timezone
+from typing import Any
+
+from starlette import status
+
+from app import HTTPException
+from app.data.sync_repo import SYNC_DATASETS
+from app.data.sync_repo import AbstractSyncRepo
+
+Position = tuple[datetime | None, int]
+
+
+def sync_changes(user_id: int, since: str | None, limit: int, sync_repo: AbstractSyncRepo) -> dict[str, Any]:
+    """
+    Collects the changes of the synced datasets since a timestamp or a cursor
+    returned by a previous sync.
+
+    Args:
+        user_id (int): The user syncing.
+        since (str | None): An ISO 8601 timestamp, a cursor, or None for a full sync.
+        limit (int): Maximum number of rows returned per dataset.
+        sync_repo (AbstractSyncRepo): The repository to read the changes from.
+
+    Returns:
+        dict[str, Any]: For each dataset, its `updated` rows and the IDs of its
+        `deleted` rows, along with the `cursor` to send on the next sync and
+        whether more changes are waiting (`has_more`).
+    """
+    positions = _parse_since(since)
+    changes: dict[str, Any] = {}
+    has_more = False
+
+    for dataset in SYNC_DATASETS:
+        since_timestamp, since_id = positions[dataset]
+        rows = sync_repo.get_changes(
+            dataset=dataset, user_id=user_id, since=since_timestamp, since_id=since_id, limit=limit + 1
+        )
+        if len(rows) > limit:
+            has_more = True
+            rows = rows[:limit]
+        if rows:
+            positions[dataset] = (rows[-1]["last_updated"], rows[-1]["id"])
+
+        changes[dataset] = {
+            "updated": [_public_fields(row) for row in rows if not row["is_deleted"]],
+            # Rows deleted before the first sync are of no interest to the client
+            "deleted": [row["id"] for row in rows if row["is_deleted"]] if since_timestamp else [],
+        }
+
+    return {"cursor": _encode_cursor(positions), "has_more": has_more, **changes}
+
+
+def _public_fields(row: dict[str, Any]) -> dict[str, Any]:
+    exclude = ["external_reference", "is_deleted", "deleted_at", "user_id", "geohash", "duplicate_of_id"]
+    return {k: v for k, v in row.items() if k not in exclude}
+
+
+def _parse_since(since: str | None) -> dict[str, Position]:
+    if not since:
+        return {dataset: (None, 0) for dataset in SYNC_DATASETS}
+
+    try:
+        timestamp = datetime.fromisoformat(since)
+    except ValueError:
+        return _decode_cursor(since)
+    return {dataset: (_as_utc(timestamp), 0) for dataset in SYNC_DATASETS}
+
+
+def _encode_cursor(positions: dict[str, Position]) -> str:
+    payload = {
+        dataset: [timestamp.isoformat(), id_] if timestamp else None
+        for dataset, (timestamp, id_) in positions.items()
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> dict[str, Position]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        positions = {}
+        for dataset in SYNC_DATASETS:
+            position = payload.get(dataset)
+            positions[dataset] = (
+                (datetime.fromisoformat(position[0]), int(position[1])) if position else (None, 0)
+            )
+        return positions
+    except (binascii.Error, UnicodeError, ValueError, TypeError, AttributeError, IndexError) as exc:
+        raise HTTPException(
+            title="Invalid Sync Cursor",
+            message="The since parameter must be an ISO 8601 timestamp or a cursor returned by a previous sync",
+            status_code=status.HTTP_400_BAD_REQUEST,
+        ) from exc
+
+
+def _as_utc(timestamp: datetime) -> datetime:
+    # Timestamps are stored as naive UTC
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
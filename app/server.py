@@ -0,0 +1,115 @@
+"""
+Production server: gunicorn supervising uvicorn workers, one per available CPU by
+default, container CPU quotas included.
+
+The workers run on uvloop and httptools when installed (`uvicorn[standard]`) and
+are replaced after `SERVER_MAX_REQUESTS` requests to contain memory growth. On
+shutdown they stop accepting connections, serve their in-flight requests for up to
+`SERVER_GRACEFUL_TIMEOUT` seconds, then the lifespan disposes of the engine.
+
+For `/metrics` to aggregate the values of every worker, `PROMETHEUS_MULTIPROC_DIR`
+must be set before the server starts (see `app.config.metrics`).
+
+Usage:
+    python -m app.server
+"""
+import glob
+import importlib.util
+import os
+from typing import Any
+
+from gunicorn.app.base import BaseApplication
+from gunicorn.util import import_app
+from prometheus_client import multiprocess
+
+from app.config.config import FactoryConfig
+from app.config.config import config
+from app.db.database import engine
+from app.utils.cpu import available_cpus
+from app.utils.cpu import worker_count
+
+APP = "main:app"
+
+
+def on_starting(server) -> None:
+    multiprocess_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiprocess_dir:
+        # Values left by the workers of a previous run
+        for path in glob.glob(os.path.join(multiprocess_dir, "*.db")):
+            os.remove(path)
+    elif server.cfg.workers > 1:
+        server.log.warning("PROMETHEUS_MULTIPROC_DIR is not set, /metrics shows the values of one worker")
+    if config.PROFILING_ENABLED and not config.PROFILING_DIRECTORY and server.cfg.workers > 1:
+        server.log.warning("PROFILING_DIRECTORY is not set, the profiles are served by the worker which took them")
+
+    server.log.info(
+        "Starting %d workers, event loop: %s, HTTP parser: %s",
+        server.cfg.workers,
+        "uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        "httptools" if importlib.util.find_spec("httptools") else "h11",
+    )
+
+    if config.DATABASE_MIGRATE_ON_STARTUP:
+        from app.db.migrations import upgrade_database
+
+        upgrade_database()
+        # Once for every worker, which would otherwise race to migrate
+        config.DATABASE_MIGRATE_ON_STARTUP = False
+
+
+def post_fork(server, worker) -> None:
+    # Connections opened before the fork are left to the process which opened them
+    engine.dispose(close=False)
+
+
+def child_exit(server, worker) -> None:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Drops the gauges of the worker from the aggregated values
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def server_options(settings: FactoryConfig, cpus: float) -> dict[str, Any]:
+    """The gunicorn settings of the server, for a number of available CPUs."""
+    workers = settings.SERVER_WORKERS or worker_count(
+        cpus, per_cpu=settings.SERVER_WORKERS_PER_CPU, maximum=settings.SERVER_MAX_WORKERS
+    )
+    return {
+        "bind": f"{settings.SERVER_HOST}:{settings.SERVER_PORT}",
+        "workers": workers,
+        # Picks uvloop and httptools when they are installed
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": settings.SERVER_PRELOAD,
+        "max_requests": settings.SERVER_MAX_REQUESTS,
+        "max_requests_jitter": settings.SERVER_MAX_REQUESTS_JITTER,
+        "keepalive": settings.SERVER_KEEPALIVE,
+        "backlog": settings.SERVER_BACKLOG,
+        "graceful_timeout": settings.SERVER_GRACEFUL_TIMEOUT,
+        "on_starting": on_starting,
+        "post_fork": post_fork,
+        "child_exit": child_exit,
+    }
+
+
+class Server(BaseApplication):
+    """Runs the app with gunicorn, configured from `server_options` rather than the command line."""
+
+    def __init__(self, options: dict[str, Any], app=None) -> None:
+        self.options = options
+        self.application = app
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.application if self.application is not None else import_app(APP)
+
+
+def serve(app=None) -> None:
+    """Serves `app`, or the app of `main` imported as the settings allow."""
+    Server(server_options(config, available_cpus()), app).run()
+
+
+if __name__ == "__main__":
+    serve()
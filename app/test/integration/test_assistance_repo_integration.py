@@ -0,0 +1,124 @@
+import unittest
+from sqlmodel import create_engine, SQLModel, Session
+from app.data.assistance_repo import AssistanceRepo
+from app.data.models import Assistance, AssistanceStatusType, IncidentType
+from app.utils import geo
+
+# Douala city center and points at known distances from it
+CENTER = (4.0511, 9.7679)
+
+
+class TestAssistanceRepoIntegration(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:")
+        SQLModel.metadata.create_all(self.engine)
+        self.session = Session(self.engine)
+        self.repo = AssistanceRepo(self.session)
+
+    def tearDown(self):
+        self.session.close()
+
+    def _create(self, latitude, longitude):
+        return self.repo.create_incidence_record(
+            user_id=1,
+            latitude=latitude,
+            longitude=longitude,
+            address_complement="",
+            comment="",
+            type_=IncidentType.Assistance,
+            image_urls=None,
+        )
+
+    def test_create_incidence_record_stores_geohash(self):
+        record = self._create(*CENTER)
+        self.assertEqual(record["geohash"], geo.encode_geohash(*CENTER, 8))
+        self.assertEqual(record["status"], AssistanceStatusType.OPEN)
+
+    def test_merge_into_assistance(self):
+        record = self.repo.create_incidence_record(
+            user_id=1, latitude=CENTER[0], longitude=CENTER[1], address_complement="", comment="Flat tyre",
+            type_=IncidentType.Assistance, image_urls=["a.jpg"],
+        )
+
+        merged = self.repo.merge_into_assistance(record["id"], comment="Near the bridge", image_urls=["a.jpg", "b.jpg"])
+
+        self.assertEqual(merged["comment"], "Flat tyre\nNear the bridge")
+        self.assertEqual(sorted(image.image_url for image in self.repo._session.get(Assistance, record["id"]).images), ["a.jpg", "b.jpg"])
+
+        self.repo.update_assistance_status(record["id"], AssistanceStatusType.RESOLVED)
+        self.assertIsNone(self.repo.merge_into_assistance(record["id"], comment=None, image_urls=None))
+
+    def test_merging_images_alone_updates_the_assistance(self):
+        record = self.repo.create_incidence_record(
+            user_id=1, latitude=CENTER[0], longitude=CENTER[1], address_complement="", comment="Flat tyre",
+            type_=IncidentType.Assistance, image_urls=None,
+        )
+
+        merged = self.repo.merge_into_assistance(record["id"], comment="Flat tyre", image_urls=["a.jpg"])
+
+        self.assertGreater(merged["last_updated"], record["last_updated"])
+
+    def test_get_assistances_within_radius(self):
+        near = self._create(4.0550, 9.7700)   # ~0.5 km
+        middle = self._create(4.0800, 9.7679)  # ~3.2 km
+        self._create(4.5000, 9.7679)           # ~50 km
+
+        result = self.repo.get_assistances_within_radius(*CENTER, radius_km=5)
+
+        self.assertEqual([r["id"] for r in result], [near["id"], middle["id"]])
+        self.assertLess(result[0]["distance_km"], 1)
+
+        result = self.repo.get_assistances_within_radius(*CENTER, radius_km=5, limit=1)
+        self.assertEqual([r["id"] for r in result], [near["id"]])
+
+    def test_get_assistances_within_radius_across_cell_boundary(self):
+        # Points on both sides of the equator and of the prime meridian share no geohash prefix
+        records = [self._create(lat, lon) for lat, lon in [(0.001, 0.001), (-0.001, -0.001), (0.001, -0.001)]]
+
+        result = self.repo.get_assistances_within_radius(0.0, 0.0, radius_km=1)
+
+        self.assertEqual({r["id"] for r in result}, {r["id"] for r in records})
+
+    def test_get_assistances_within_radius_filters_status(self):
+        record = self._create(*CENTER)
+
+        result = self.repo.get_assistances_within_radius(*CENTER, radius_km=1, statuses=[AssistanceStatusType.RESOLVED])
+        self.assertEqual(result, [])
+
+        result = self.repo.get_assistances_within_radius(*CENTER, radius_km=1, statuses=[AssistanceStatusType.OPEN])
+        self.assertEqual([r["id"] for r in result], [record["id"]])
+
+    def test_get_nearest_assistances_expands_search(self):
+        self._create(4.0800, 9.7679)           # ~3.2 km
+        far = self._create(4.1400, 9.7679)     # ~9.9 km
+
+        result = self.repo.get_nearest_assistances(4.1500, 9.7679, max_radius_km=20)
+        self.assertEqual([r["id"] for r in result], [far["id"]])
+
+        result = self.repo.get_nearest_assistances(4.1500, 9.7679, max_radius_km=20, limit=5)
+        self.assertEqual(len(result), 2)
+
+        result = self.repo.get_nearest_assistances(4.5000, 9.7679, max_radius_km=20)
+        self.assertEqual(result, [])
+
+    def test_get_assistances_in_bounding_box(self):
+        inside = self._create(4.06, 9.77)
+        self._create(4.20, 9.77)
+
+        result = self.repo.get_assistances_in_bounding_box(4.0, 9.7, 4.1, 9.8)
+
+        self.assertEqual([r["id"] for r in result], [inside["id"]])
+
+    def test_get_assistances_in_bounding_box_across_antimeridian(self):
+        east = self._create(0.0, 179.9)
+        west = self._create(0.0, -179.9)
+        self._create(0.0, 0.0)
+
+        result = self.repo.get_assistances_in_bounding_box(-1, 179.5, 1, -179.5)
+
+        self.assertEqual({r["id"] for r in result}, {east["id"], west["id"]})
+
+
+if __name__ == '__main__':
+    unittest.main()
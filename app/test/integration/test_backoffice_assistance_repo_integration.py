@@ -0,0 +1,79 @@
+import unittest
+from sqlmodel import create_engine, SQLModel, Session
+from app.data.backoffice import schemas
+from app.data.backoffice.assistance_repo import AssistanceRepo
+from app.data.models import Assistance, AssistanceImage, Feedback, IncidentType, User
+from app.db.instrumentation import capture_queries
+
+
+class TestBackofficeAssistanceRepoIntegration(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:")
+        SQLModel.metadata.create_all(self.engine)
+        self.session = Session(self.engine)
+        self.repo = AssistanceRepo(self.session)
+
+    def tearDown(self):
+        self.session.close()
+
+    def _seed(self, count):
+        for index in range(count):
+            user = User(name=f"user {index}", email=f"user{index}@example.com", password=b"x")
+            assistance = Assistance(
+                user=user, gps_latitude=4.05, gps_longitude=9.77, incident_type=IncidentType.Assistance,
+                images=[AssistanceImage(image_url=f"{index}-a.jpg"), AssistanceImage(image_url=f"{index}-b.jpg")],
+            )
+            self.session.add_all([assistance, Feedback(user=user, message=f"message {index}")])
+        self.session.add(Assistance(gps_latitude=4.05, gps_longitude=9.77, incident_type=IncidentType.Accident))
+        self.session.commit()
+        self.session.expunge_all()
+
+    def _render_assistances(self, size):
+        with capture_queries(self.engine) as queries:
+            records = self.repo.get_assistances(offset=0, limit=size, type_=IncidentType.Assistance)
+            page = schemas.AssistanceListSchema(
+                assistance=[schemas.AssistanceSchema.model_validate(r, from_attributes=True) for r in records]
+            )
+        return page, queries.count
+
+    def test_assistance_page_costs_a_fixed_number_of_queries(self):
+        self._seed(20)
+
+        small_page, small_page_queries = self._render_assistances(size=2)
+        self.session.expunge_all()
+        large_page, large_page_queries = self._render_assistances(size=20)
+
+        self.assertEqual(len(small_page.assistance), 2)
+        self.assertEqual(len(large_page.assistance), 20)
+        self.assertEqual(small_page_queries, 2)
+        self.assertEqual(large_page_queries, 2)
+        self.assertEqual(len(large_page.assistance[0].images), 2)
+        self.assertEqual(large_page.assistance[0].user.name, "user 19")
+
+    def test_feedback_page_costs_a_single_query(self):
+        self._seed(10)
+
+        with capture_queries(self.engine) as queries:
+            records = self.repo.get_feedbacks(offset=0, limit=10)
+            page = schemas.FeedbackListSchema(
+                feedbacks=[schemas.FeedbackSchema.model_validate(r, from_attributes=True) for r in records]
+            )
+
+        self.assertEqual(queries.count, 1)
+        self.assertEqual([f.user.name for f in page.feedbacks][:2], ["user 9", "user 8"])
+
+    def test_get_assistance_from_id(self):
+        self._seed(1)
+
+        with capture_queries(self.engine) as queries:
+            record = self.repo.get_assistance_from_id(1)
+            schemas.AssistanceSchema.model_validate(record, from_attributes=True)
+
+        self.assertEqual(queries.count, 2)
+        self.assertIsNone(self.repo.get_assistance_from_id(100))
+        self.assertIsNone(self.repo.get_feedback_from_id(100))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from sqlmodel import create_engine, SQLModel, Session
+from app.data.backoffice.reference_repo import ReferenceRepo
+from app.domain import reference_service
+
+
+class TestReferenceRepoIntegration(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:")
+        SQLModel.metadata.create_all(self.engine)
+        self.session = Session(self.engine)
+        self.repo = ReferenceRepo(self.session)
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_changes_bump_the_dataset_version(self):
+        self.assertEqual(self.repo.get_cache_version(reference_service.EMERGENCY_CONTACTS), 0)
+
+        contact = self.repo.create_contact(name="Police", number="117")
+        self.repo.update_contact(contact.id, name="Police", number="112")
+        self.repo.create_faq(question="How?", answer="Like this")
+
+        self.assertEqual(self.repo.get_cache_version(reference_service.EMERGENCY_CONTACTS), 2)
+        self.assertEqual(self.repo.get_cache_version(reference_service.FAQS), 1)
+        self.assertEqual(self.repo.get_emergency_contacts()[0].number, "112")
+
+    def test_soft_deleted_records_are_hidden(self):
+        contact = self.repo.create_contact(name="Police", number="117")
+        faq = self.repo.create_faq(question="How?", answer="Like this")
+
+        self.assertTrue(self.repo.soft_delete_contact(contact.id))
+        self.assertTrue(self.repo.soft_delete_faq(faq.id))
+
+        self.assertEqual(self.repo.get_emergency_contacts(), [])
+        self.assertEqual(self.repo.get_faqs(), [])
+        self.assertIsNone(self.repo.get_contact_from_id(contact.id))
+        self.assertFalse(self.repo.soft_delete_faq(faq.id))
+        self.assertIsNone(self.repo.update_faq(faq.id, question="?", answer="!"))
+        self.assertEqual(self.repo.get_cache_version(reference_service.FAQS), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+from datetime import datetime, timezone
+from sqlmodel import create_engine, SQLModel, Session
+from app import HTTPException
+from app.data.backoffice.reference_repo import ReferenceRepo
+from app.data.models import Assistance, Faq, Feedback, IncidentType
+from app.data.sync_repo import SyncRepo
+from app.domain import sync_service
+
+
+class TestSyncIntegration(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:")
+        SQLModel.metadata.create_all(self.engine)
+        self.session = Session(self.engine)
+        self.reference_repo = ReferenceRepo(self.session)
+        self.sync_repo = SyncRepo(self.session)
+
+    def tearDown(self):
+        self.session.close()
+
+    def _sync(self, since=None, limit=500, user_id=1):
+        return sync_service.sync_changes(user_id=user_id, since=since, limit=limit, sync_repo=self.sync_repo)
+
+    def test_last_updated_is_bumped_on_update(self):
+        faq = self.reference_repo.create_faq(question="How?", answer="Like this")
+        created = faq.last_updated
+
+        self.reference_repo.update_faq(faq.id, question="How?", answer="Like that")
+
+        self.assertGreater(self.session.get(Faq, faq.id).last_updated, created)
+
+    def test_full_sync_then_delta(self):
+        kept = self.reference_repo.create_contact(name="Police", number="117")
+        deleted_before = self.reference_repo.create_contact(name="Old", number="000")
+        self.reference_repo.soft_delete_contact(deleted_before.id)
+        faq = self.reference_repo.create_faq(question="How?", answer="Like this")
+        self.session.add_all([
+            Assistance(user_id=1, incident_type=IncidentType.Assistance, comment="mine"),
+            Assistance(user_id=2, incident_type=IncidentType.Assistance, comment="not mine"),
+            Feedback(user_id=1, message="thanks"),
+        ])
+        self.session.commit()
+
+        first = self._sync()
+
+        self.assertEqual([c["id"] for c in first["emergency_contacts"]["updated"]], [kept.id])
+        self.assertEqual(first["emergency_contacts"]["deleted"], [])
+        self.assertEqual([a["comment"] for a in first["assistances"]["updated"]], ["mine"])
+        self.assertEqual(len(first["feedbacks"]["updated"]), 1)
+        self.assertNotIn("is_deleted", first["emergency_contacts"]["updated"][0])
+        self.assertFalse(first["has_more"])
+
+        unchanged = self._sync(since=first["cursor"])
+        self.assertTrue(all(not unchanged[d]["updated"] and not unchanged[d]["deleted"] for d in ("faqs", "emergency_contacts", "assistances", "feedbacks")))
+
+        self.reference_repo.update_contact(kept.id, name="Police", number="112")
+        self.reference_repo.soft_delete_faq(faq.id)
+
+        delta = self._sync(since=unchanged["cursor"])
+
+        self.assertEqual([c["number"] for c in delta["emergency_contacts"]["updated"]], ["112"])
+        self.assertEqual(delta["faqs"], {"updated": [], "deleted": [faq.id]})
+
+    def test_pages_do_not_skip_rows_sharing_a_timestamp(self):
+        timestamp = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        self.session.add_all([Faq(question=str(i), answer="", last_updated=timestamp) for i in range(5)])
+        self.session.commit()
+
+        seen, cursor, has_more = [], None, True
+        while has_more:
+            page = self._sync(since=cursor, limit=2)
+            seen.extend(f["question"] for f in page["faqs"]["updated"])
+            cursor, has_more = page["cursor"], page["has_more"]
+
+        self.assertEqual(seen, ["0", "1", "2", "3", "4"])
+
+    def test_since_accepts_a_timestamp(self):
+        self.session.add_all([
+            Faq(question="old", answer="", last_updated=datetime(2026, 1, 1)),
+            Faq(question="new", answer="", last_updated=datetime(2026, 3, 1)),
+        ])
+        self.session.commit()
+
+        result = self._sync(since="2026-02-01T01:00:00+01:00")
+
+        self.assertEqual([f["question"] for f in result["faqs"]["updated"]], ["new"])
+
+    def test_invalid_cursor_is_rejected(self):
+        with self.assertRaises(HTTPException):
+            self._sync(since="not a cursor")
+
+
+if __name__ == '__main__':
+    unittest.main()
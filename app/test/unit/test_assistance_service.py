@@ -0,0 +1,139 @@
+import base64
+import unittest
+from datetime import datetime
+
+from pydantic import ValidationError
+
+from app.config.response import HTTPException
+from app.data.backoffice.schemas import AssistanceSchema
+from app.data.backoffice.schemas import UserDetailSchema
+from app.data.models import AssistanceStatusType
+from app.data.models import IncidentType
+from app.data.schemas import RequestAssistanceSchema
+from app.domain import assistance_service
+from app.domain.storage import IMAGE_EXTENSIONS
+from app.domain.storage import StorageBase
+
+
+class SigningStorage(StorageBase):
+
+    def __init__(self):
+        self.batches = []
+
+    def upload_file(self, bucket_name, source_file_path, destination_blob_name): ...
+
+    def upload_bytes(self, bucket_name, data, destination_blob_name): ...
+
+    def blob_exists(self, bucket_name, blob_name):
+        return False
+
+    def generate_download_urls(self, bucket_name, prefix, expiration=604800): ...
+
+    def generate_download_url(self, bucket_name, blob_name, expiration=604800):
+        return f"https://storage.test/{blob_name}?signature=1"
+
+    def generate_download_urls_for_blobs(self, bucket_name, blob_names, expiration=604800):
+        self.batches.append(list(blob_names))
+        return super().generate_download_urls_for_blobs(bucket_name, blob_names, expiration)
+
+
+USER = UserDetailSchema(
+    id=1,
+    external_reference="user",
+    name="User",
+    email="user@example.com",
+    is_admin=False,
+    created_at=datetime(2024, 1, 1),
+    last_updated=datetime(2024, 1, 1),
+)
+
+
+def assistance(id, *image_urls):
+    return AssistanceSchema(
+        id=id,
+        incident_type=IncidentType.Assistance,
+        user=USER,
+        images=[{"image_url": image_url} for image_url in image_urls],
+        status=AssistanceStatusType.OPEN,
+        created_at=datetime(2024, 1, 1),
+        last_updated=datetime(2024, 1, 1),
+    )
+
+
+class TestAssistanceImages(unittest.TestCase):
+
+    def setUp(self):
+        self.storage = SigningStorage()
+
+    def test_signs_the_stored_blob_names(self):
+        """
+        Test that the images are returned as signed URLs of their blobs.
+        """
+        assistances = assistance_service.sign_images(
+            [assistance(1, "assistances/a.jpg"), assistance(2, "assistances/b.jpg")], storage=self.storage
+        )
+
+        self.assertEqual(
+            [image.image_url for record in assistances for image in record.images],
+            ["https://storage.test/assistances/a.jpg?signature=1", "https://storage.test/assistances/b.jpg?signature=1"],
+        )
+
+    def test_signs_a_page_in_one_batch(self):
+        """
+        Test that the images of a page, shared blobs included, are signed in a single call.
+        """
+        assistance_service.sign_images(
+            [assistance(1, "assistances/a.jpg", "assistances/b.jpg"), assistance(2, "assistances/a.jpg"), assistance(3)],
+            storage=self.storage,
+        )
+
+        self.assertEqual(len(self.storage.batches), 1)
+        self.assertEqual(set(self.storage.batches[0]), {"assistances/a.jpg", "assistances/b.jpg"})
+
+    def test_pages_without_images_are_not_signed(self):
+        assistance_service.sign_images([assistance(1)], storage=self.storage)
+
+        self.assertEqual(self.storage.batches, [])
+
+    def test_rejects_extensions_not_matching_the_images(self):
+        """
+        Test that a request with more images than extensions is refused before anything is uploaded.
+        """
+        with self.assertRaises(HTTPException) as raised:
+            assistance_service._upload_images(
+                images=[b"first", b"second"], image_extensions=["jpg"], storage=self.storage
+            )
+
+        self.assertEqual(raised.exception.status_code, 422)
+
+    def test_rejects_extensions_that_are_not_images(self):
+        with self.assertRaises(HTTPException) as raised:
+            assistance_service._upload_images(images=[b"page"], image_extensions=["html"], storage=self.storage)
+
+        self.assertEqual(raised.exception.status_code, 422)
+
+
+class TestRequestAssistanceSchema(unittest.TestCase):
+
+    def test_images_are_decoded_and_mapped_to_their_extension(self):
+        """
+        Test that uploaded images arrive as bytes, with the extension of their content type.
+        """
+        schema = RequestAssistanceSchema.model_validate({
+            "longitude": 2.35, "latitude": 48.85, "address_complement": "", "comment": "", "type": "ASSISTANCE",
+            "images": [{"content_type": "image/png", "data": base64.b64encode(b"photo").decode()}],
+        })
+
+        self.assertEqual([image.data for image in schema.images], [b"photo"])
+        self.assertEqual([IMAGE_EXTENSIONS[image.content_type] for image in schema.images], ["png"])
+
+    def test_other_content_types_are_refused(self):
+        with self.assertRaises(ValidationError):
+            RequestAssistanceSchema.model_validate({
+                "longitude": 2.35, "latitude": 48.85, "address_complement": "", "comment": "", "type": "ASSISTANCE",
+                "images": [{"content_type": "text/html", "data": ""}],
+            })
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import contextlib
+import threading
+import unittest
+
+import bcrypt
+from fastapi import APIRouter
+from fastapi import FastAPI
+from jose import jwt
+from starlette.testclient import TestClient
+
+from app.config.config import config
+from app.config.timing import TimingMiddleware
+from app.data.read_models import TokenRecord
+from app.data.read_models import UserRecord
+from app.domain.authorization import ALGORITHM
+from app.domain.authorization import AuthorizationMiddleware
+from app.domain.authorization import require_admin
+from app.utils.timing import LatencyRegistry
+
+REF_KEY = "ref-key"
+
+
+class FakeUserRepo:
+
+    def __init__(self, is_admin):
+        self.token = jwt.encode({"sub": REF_KEY}, config.SECRET_KEY, algorithm=ALGORITHM)
+        self.token_record = TokenRecord(
+            subject=REF_KEY,
+            access_token=bcrypt.hashpw(self.token.encode("utf-8"), bcrypt.gensalt(rounds=4)),
+            refresh_token=b"",
+        )
+        self.user = UserRecord(
+            id=1,
+            external_reference=REF_KEY,
+            name="Admin",
+            email="admin@example.com",
+            password=b"",
+            code=None,
+            is_admin=is_admin,
+            profile_image_url=None,
+            chassis_number=None,
+            plate_number=None,
+        )
+
+    def get_tokens_from_ref_key(self, ref_key):
+        return self.token_record if ref_key == REF_KEY else None
+
+    def get_user_from_ref_key(self, ref_key):
+        self.lookup_thread = threading.current_thread()
+        return self.user if ref_key == REF_KEY else None
+
+
+class TestAuthorizationMiddleware(unittest.TestCase):
+
+    def client(self, is_admin=True):
+        router = APIRouter()
+
+        @router.get("/items/{item_id}")
+        @require_admin
+        async def get_item(item_id: int):
+            self.loop_thread = threading.current_thread()
+            return {"id": item_id}
+
+        @router.get("/open/{item_id}")
+        async def get_open(item_id: int):
+            return {"id": item_id}
+
+        self.repo = FakeUserRepo(is_admin)
+        app = FastAPI()
+        app.include_router(router)
+        app.add_middleware(AuthorizationMiddleware, repo_factory=lambda: contextlib.nullcontext(self.repo))
+        self.registry = LatencyRegistry()
+        app.add_middleware(TimingMiddleware, registry=self.registry)
+        return TestClient(app)
+
+    def test_protects_routes_with_path_parameters(self):
+        client = self.client()
+
+        self.assertEqual(client.get("/items/1").status_code, 401)
+        response = client.get("/items/1", headers={"Authorization": f"Bearer {self.repo.token}"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"id": 1})
+
+    def test_forbids_users_who_are_not_admins(self):
+        client = self.client(is_admin=False)
+
+        response = client.get("/items/1", headers={"Authorization": f"Bearer {self.repo.token}"})
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_rejected_requests_are_timed_under_their_route(self):
+        client = self.client(is_admin=False)
+
+        client.get("/items/1")
+        client.get("/items/2", headers={"Authorization": f"Bearer {self.repo.token}"})
+
+        self.assertEqual(list(self.registry.snapshot()), ["GET /items/{item_id}"])
+        self.assertEqual(self.registry.snapshot()["GET /items/{item_id}"]["count"], 2)
+
+    def test_looks_the_user_up_off_the_event_loop(self):
+        client = self.client()
+
+        client.get("/items/1", headers={"Authorization": f"Bearer {self.repo.token}"})
+
+        # The async routes run on the thread of the event loop
+        self.assertIsNot(self.repo.lookup_thread, self.loop_thread)
+
+    def test_leaves_other_routes_open(self):
+        self.assertEqual(self.client().get("/open/1").status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
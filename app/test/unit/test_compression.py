@@ -0,0 +1,168 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.responses import Response
+from starlette.responses import StreamingResponse
+from starlette.routing import Mount
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.config.compression import CompressionMiddleware
+from app.config.compression import encoded_etag
+from app.config.compression import identity_etag
+from app.config.compression import negotiate_encoding
+from app.config.static import PrecompressedStaticFiles
+
+LARGE_BODY = "loxea " * 1000
+
+
+async def large(_):
+    return PlainTextResponse(LARGE_BODY)
+
+
+async def small(_):
+    return PlainTextResponse("ok")
+
+
+async def image(_):
+    return Response(b"\x89PNG" + b"\x00" * 4000, media_type="image/png")
+
+
+async def events(_):
+    async def stream():
+        for index in range(3):
+            yield f"data: {index}\n\n" * 500
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+async def tagged(request):
+    if request.headers.get("if-none-match") == '"abc"':
+        return Response(status_code=304, headers={"ETag": '"abc"'})
+    return PlainTextResponse(LARGE_BODY, headers={"ETag": '"abc"'})
+
+
+async def chunked(_):
+    async def stream():
+        for _ in range(10):
+            yield "loxea " * 50
+
+    return StreamingResponse(stream(), media_type="text/plain")
+
+
+class TestCompressionMiddleware(unittest.TestCase):
+
+    def setUp(self):
+        app = Starlette(
+            routes=[
+                Route("/large", large),
+                Route("/small", small),
+                Route("/image", image),
+                Route("/events", events),
+                Route("/chunked", chunked),
+                Route("/tagged", tagged),
+            ]
+        )
+        app.add_middleware(CompressionMiddleware, minimum_size=512)
+        self.client = TestClient(app)
+
+    def test_large_bodies_are_compressed(self):
+        response = self.client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response.headers["vary"])
+        self.assertLess(int(response.headers["content-length"]), len(LARGE_BODY))
+        self.assertEqual(response.text, LARGE_BODY)
+
+    def test_chunked_bodies_are_compressed_once_above_the_threshold(self):
+        response = self.client.get("/chunked", headers={"Accept-Encoding": "gzip"})
+
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertNotIn("content-length", response.headers)
+        self.assertEqual(response.text, "loxea " * 500)
+
+    def test_small_bodies_and_compressed_media_are_not_compressed(self):
+        for path in ("/small", "/image"):
+            response = self.client.get(path, headers={"Accept-Encoding": "gzip"})
+            self.assertNotIn("content-encoding", response.headers)
+
+    def test_event_streams_are_passed_through(self):
+        response = self.client.get("/events", headers={"Accept-Encoding": "gzip"})
+
+        self.assertNotIn("content-encoding", response.headers)
+        self.assertEqual(response.text, "".join(f"data: {index}\n\n" * 500 for index in range(3)))
+
+    def test_compressed_representations_have_their_own_etag(self):
+        """
+        Test that the ETag of a compressed response differs from the identity one, and still validates it.
+        """
+        identity = self.client.get("/tagged", headers={"Accept-Encoding": "identity"})
+        compressed = self.client.get("/tagged", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(identity.headers["etag"], '"abc"')
+        self.assertEqual(compressed.headers["etag"], '"abc-gzip"')
+
+        revalidated = self.client.get("/tagged", headers={"Accept-Encoding": "gzip", "If-None-Match": '"abc-gzip"'})
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.headers["etag"], '"abc-gzip"')
+
+        other_encoding = self.client.get("/tagged", headers={"Accept-Encoding": "identity", "If-None-Match": '"abc-gzip"'})
+        self.assertEqual(other_encoding.status_code, 200)
+
+    def test_etags(self):
+        self.assertEqual(encoded_etag('W/"abc"', "br"), 'W/"abc-br"')
+        self.assertEqual(identity_etag('W/"abc-br"', "br"), 'W/"abc"')
+        self.assertEqual(identity_etag('"abc-gzip"', "br"), '"abc-gzip"')
+
+    def test_encoding_negotiation(self):
+        self.assertEqual(negotiate_encoding("gzip, deflate"), "gzip")
+        self.assertEqual(negotiate_encoding("*"), "gzip")
+        self.assertIsNone(negotiate_encoding("gzip;q=0, identity"))
+        self.assertIsNone(negotiate_encoding(""))
+
+
+class TestPrecompressedStaticFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "index.html")
+        with open(self.path, "w") as file:
+            file.write("<html>" + LARGE_BODY + "</html>")
+        with open(self.path, "rb") as source, open(self.path + ".gz", "wb") as file:
+            file.write(gzip.compress(source.read()))
+
+        static = PrecompressedStaticFiles(directory=self.directory.name, max_age=3600)
+        self.client = TestClient(Starlette(routes=[Mount("/static", static)]))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_serves_the_precompressed_sibling(self):
+        response = self.client.get("/static/index.html", headers={"Accept-Encoding": "gzip"})
+
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertEqual(response.headers["content-type"], "text/html; charset=utf-8")
+        self.assertEqual(response.headers["cache-control"], "public, max-age=3600")
+        self.assertTrue(response.text.startswith("<html>"))
+
+        revalidated = self.client.get(
+            "/static/index.html", headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]}
+        )
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_serves_the_source_without_accepted_encoding_or_with_stale_sibling(self):
+        response = self.client.get("/static/index.html", headers={"Accept-Encoding": "identity"})
+        self.assertNotIn("content-encoding", response.headers)
+
+        source_mtime = os.stat(self.path).st_mtime
+        os.utime(self.path + ".gz", (source_mtime - 10, source_mtime - 10))
+        response = self.client.get("/static/index.html", headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("content-encoding", response.headers)
+        self.assertEqual(response.text, "<html>" + LARGE_BODY + "</html>")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import unittest
+
+from app.data.models import AssistanceStatusType
+from app.data.models import IncidentType
+from app.domain.dispatch import ASSISTANCE_CREATED
+from app.domain.dispatch import ASSISTANCE_UPDATED
+from app.domain.dispatch import DispatchHub
+from app.domain.dispatch import InMemoryBroker
+from app.domain.dispatch import server_sent_events
+
+
+def assistance(id, type_=IncidentType.Assistance, status=AssistanceStatusType.OPEN):
+    return {"id": id, "incident_type": type_, "status": status}
+
+
+class TestDispatchHub(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.broker = InMemoryBroker(max_queue_size=2)
+        self.hub = DispatchHub(broker=self.broker, heartbeat=0.05)
+
+    async def _subscribed(self, stream):
+        task = asyncio.ensure_future(stream.__anext__())
+        while self.broker.subscriber_count(DispatchHub.CHANNEL) == 0:
+            await asyncio.sleep(0)
+        return task
+
+    async def test_events_published_from_other_threads_are_delivered(self):
+        """
+        Test that events published from a worker thread reach subscribers on the event loop.
+        """
+        stream = self.hub.stream()
+        next_event = await self._subscribed(stream)
+
+        thread = threading.Thread(target=self.hub.publish, args=(ASSISTANCE_CREATED, assistance(1)))
+        thread.start()
+        thread.join()
+
+        event = await asyncio.wait_for(next_event, timeout=1)
+        self.assertEqual(event["event"], ASSISTANCE_CREATED)
+        self.assertEqual(event["assistance"], {"id": 1, "incident_type": "ASSISTANCE", "status": "Ouvert"})
+        await stream.aclose()
+        self.assertEqual(self.broker.subscriber_count(DispatchHub.CHANNEL), 0)
+
+    async def test_stream_filters_by_type_and_status(self):
+        """
+        Test that only events matching the incident type and status filters are streamed.
+        """
+        stream = self.hub.stream(incident_type=IncidentType.Accident, status=AssistanceStatusType.RESOLVED)
+        next_event = await self._subscribed(stream)
+
+        self.hub.publish(ASSISTANCE_CREATED, assistance(1))
+        self.hub.publish(ASSISTANCE_UPDATED, assistance(2, IncidentType.Accident, AssistanceStatusType.RESOLVED))
+
+        event = await asyncio.wait_for(next_event, timeout=1)
+        self.assertEqual(event["assistance"]["id"], 2)
+        await stream.aclose()
+
+    async def test_idle_stream_yields_heartbeats(self):
+        """
+        Test that idle subscribers receive keep-alive comments.
+        """
+        body = server_sent_events(self.hub.stream())
+        self.assertEqual(await asyncio.wait_for(body.__anext__(), timeout=1), ": keep-alive\n\n")
+        await body.aclose()
+
+    async def test_slow_subscriber_drops_oldest_events(self):
+        """
+        Test that a full subscriber queue keeps the most recent events.
+        """
+        stream = self.hub.stream()
+        next_event = await self._subscribed(stream)
+
+        for id in range(1, 4):
+            self.hub.publish(ASSISTANCE_CREATED, assistance(id))
+        await asyncio.sleep(0)
+
+        received = [(await asyncio.wait_for(next_event, timeout=1))["assistance"]["id"]]
+        received.append((await stream.__anext__())["assistance"]["id"])
+        self.assertEqual(received, [2, 3])
+        await stream.aclose()
+
+    async def test_server_sent_events_format(self):
+        async def events():
+            yield {"event": ASSISTANCE_CREATED, "assistance": {"id": 1}}
+
+        chunks = [chunk async for chunk in server_sent_events(events())]
+        self.assertEqual(chunks, [f'event: {ASSISTANCE_CREATED}\ndata: {{"id":1}}\n\n'])
+
+
+if __name__ == '__main__':
+    unittest.main()
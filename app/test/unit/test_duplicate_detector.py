@@ -0,0 +1,132 @@
+import math
+import unittest
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from app.data.models import IncidentType
+from app.domain import assistance_service
+from app.domain.duplicate_detector import AssistanceDuplicateDetector
+from app.utils import geo
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAssistanceDuplicateDetector(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.detector = AssistanceDuplicateDetector(distance_meters=200, window_seconds=600, clock=self.clock)
+        self.detector.register(1, user_id=7, latitude=4.0511, longitude=9.7679, incident_type=IncidentType.Assistance)
+
+    def test_nearby_request_from_same_user_is_a_duplicate(self):
+        """
+        Test that a request ~100m away within the window matches the recent assistance.
+        """
+        self.clock.now += 300
+        self.assertEqual(self.detector.find_duplicate(7, 4.0520, 9.7679, IncidentType.Assistance), 1)
+
+    def test_far_late_or_different_requests_are_not_duplicates(self):
+        """
+        Test that distance, time window, incident type and user all have to match.
+        """
+        self.assertIsNone(self.detector.find_duplicate(7, 4.0611, 9.7679, IncidentType.Assistance))
+        self.assertIsNone(self.detector.find_duplicate(7, 4.0511, 9.7679, IncidentType.Accident))
+        self.assertIsNone(self.detector.find_duplicate(8, 4.0511, 9.7679, IncidentType.Assistance))
+
+        self.clock.now += 601
+        self.assertIsNone(self.detector.find_duplicate(7, 4.0511, 9.7679, IncidentType.Assistance))
+
+    def test_other_users_can_be_matched(self):
+        detector = AssistanceDuplicateDetector(200, 600, match_other_users=True, clock=self.clock)
+        detector.register(1, user_id=7, latitude=4.0511, longitude=9.7679, incident_type=IncidentType.Assistance)
+        self.assertEqual(detector.find_duplicate(8, 4.0511, 9.7679, IncidentType.Assistance), 1)
+
+    def test_match_across_grid_cell_boundaries(self):
+        """
+        Test that requests on either side of a grid cell boundary still match.
+        """
+        detector = AssistanceDuplicateDetector(200, 600, clock=self.clock)
+        detector.register(1, user_id=7, latitude=-0.0005, longitude=-0.0005, incident_type=IncidentType.Assistance)
+        self.assertEqual(detector.find_duplicate(7, 0.0005, 0.0005, IncidentType.Assistance), 1)
+
+    def test_match_at_the_edge_of_the_distance_two_rows_down(self):
+        """
+        Test that a request just within the distance matches from the bottom of a grid row.
+        """
+        detector = AssistanceDuplicateDetector(200, 600, clock=self.clock)
+        # The bottom edge of a row, the request is one distance further south
+        latitude = 2000 * 0.2 / geo.KM_PER_DEGREE + 1e-9
+        detector.register(1, user_id=7, latitude=latitude, longitude=9.7679, incident_type=IncidentType.Assistance)
+
+        request_latitude = latitude - math.degrees(0.9999 * 0.2 / geo.EARTH_RADIUS_KM)
+        self.assertEqual(detector.find_duplicate(7, request_latitude, 9.7679, IncidentType.Assistance), 1)
+
+    def test_discarded_assistances_are_forgotten(self):
+        self.detector.discard(1)
+        self.assertIsNone(self.detector.find_duplicate(7, 4.0511, 9.7679, IncidentType.Assistance))
+
+
+class TestRequestAssistanceDuplicates(unittest.TestCase):
+
+    def setUp(self):
+        self.repo = MagicMock()
+        self.repo.create_incidence_record.return_value = {"id": 1}
+        self.detector = AssistanceDuplicateDetector(distance_meters=200, window_seconds=600)
+
+    def _request(self):
+        return assistance_service.request_assistance(
+            user_id=7,
+            latitude=4.0511,
+            longitude=9.7679,
+            address_complement="",
+            comment="Flat tyre",
+            type_=IncidentType.Assistance,
+            images=None,
+            image_extensions=None,
+            assistance_repo=self.repo,
+            storage=MagicMock(),
+            duplicate_detector=self.detector,
+        )
+
+    def test_duplicate_is_merged(self):
+        """
+        Test that a repeated request is merged into the first one instead of inserted.
+        """
+        self.repo.merge_into_assistance.return_value = {"id": 1}
+
+        self._request()
+        self.assertEqual(self._request(), {"id": 1})
+
+        self.repo.create_incidence_record.assert_called_once()
+        self.repo.merge_into_assistance.assert_called_once_with(id=1, comment="Flat tyre", image_urls=[])
+
+    def test_duplicate_of_closed_assistance_is_inserted(self):
+        self.repo.merge_into_assistance.return_value = None
+
+        self._request()
+        self._request()
+
+        self.assertEqual(self.repo.create_incidence_record.call_count, 2)
+        self.assertIsNone(self.repo.create_incidence_record.call_args.kwargs["duplicate_of_id"])
+
+    def test_duplicate_is_flagged(self):
+        """
+        Test that with the flag policy the duplicate is inserted and linked to the original.
+        """
+        with patch.object(assistance_service.config, "ASSISTANCE_DUPLICATE_POLICY", "flag"):
+            self._request()
+            self._request()
+
+        self.repo.merge_into_assistance.assert_not_called()
+        self.assertEqual(self.repo.create_incidence_record.call_args.kwargs["duplicate_of_id"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+import math
+import unittest
+
+from app.utils import geo
+
+
+class TestBoundingBox(unittest.TestCase):
+
+    def test_contains_points_at_the_edge_of_the_radius(self):
+        """
+        Test that points just inside the radius, as `haversine_km` measures it, are inside the box.
+        """
+        latitude, longitude, radius_km = 4.0511, 9.7679, 5
+        edge = math.degrees(0.9999 * radius_km / geo.EARTH_RADIUS_KM)
+        min_lat, min_lon, max_lat, max_lon = geo.bounding_box(latitude, longitude, radius_km)
+
+        for point in [(latitude + edge, longitude), (latitude - edge, longitude)]:
+            self.assertLessEqual(geo.haversine_km(latitude, longitude, *point), radius_km)
+            self.assertTrue(min_lat <= point[0] <= max_lat)
+
+        east = longitude + edge / math.cos(math.radians(latitude))
+        self.assertLessEqual(geo.haversine_km(latitude, longitude, latitude, east), radius_km)
+        self.assertTrue(min_lon <= east <= max_lon)
+
+
+if __name__ == '__main__':
+    unittest.main()
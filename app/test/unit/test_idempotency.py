@@ -0,0 +1,207 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+import httpx
+from fastapi import FastAPI
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from app.domain.idempotency import IDEMPOTENT_REPLAYED_HEADER
+from app.domain.idempotency import IdempotencyMiddleware
+from app.domain.idempotency import InMemoryIdempotencyStore
+from app.domain.idempotency import idempotent
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestIdempotencyMiddleware(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.store = InMemoryIdempotencyStore(ttl=60, max_entries=2, clock=self.clock)
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+        app = FastAPI()
+
+        @app.post("/items", status_code=201)
+        @idempotent
+        async def create_item(request: Request):
+            self.calls += 1
+            await self.release.wait()
+            return {"id": self.calls, "payload": await request.json()}
+
+        @app.post("/tagged")
+        @idempotent
+        async def tagged():
+            self.calls += 1
+            return JSONResponse({"id": self.calls}, headers={"Location": f"/items/{self.calls}"})
+
+        @app.post("/failing")
+        @idempotent
+        async def failing():
+            self.calls += 1
+            return JSONResponse({"detail": "unavailable"}, status_code=503)
+
+        @app.post("/plain")
+        async def plain():
+            self.calls += 1
+            return {"id": self.calls}
+
+        @app.post("/session")
+        @idempotent
+        async def session():
+            self.calls += 1
+            response = JSONResponse({"id": self.calls})
+            response.set_cookie("session", "s")
+            response.set_cookie("theme", "dark")
+            return response
+
+        app.add_middleware(IdempotencyMiddleware, store=self.store, wait_timeout=1)
+
+        # Stands for the authorization middleware, the tokens are the references of the users
+        @app.middleware("http")
+        async def authorize(request, call_next):
+            token = request.headers.get("authorization", "").removeprefix("Bearer ")
+            request.state.current_user = SimpleNamespace(external_reference=token) if token else None
+            return await call_next(request)
+
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def _post(self, path, key, json=None, token="a"):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        if key:
+            headers["Idempotency-Key"] = key
+        return await self.client.post(path, json=json or {"value": 1}, headers=headers)
+
+    async def test_retry_replays_the_stored_response(self):
+        """
+        Test that a retry with the same key returns the first response without running the route again.
+        """
+        first = await self._post("/items", "key-1")
+        second = await self._post("/items", "key-1")
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second.headers[IDEMPOTENT_REPLAYED_HEADER], "true")
+        self.assertNotIn(IDEMPOTENT_REPLAYED_HEADER, first.headers)
+
+    async def test_retry_replays_the_stored_headers(self):
+        """
+        Test that a replayed response keeps the content type and the headers of the first one.
+        """
+        first = await self._post("/tagged", "key-1")
+        second = await self._post("/tagged", "key-1")
+
+        self.assertEqual(second.headers["content-type"], "application/json")
+        self.assertEqual(second.headers["location"], first.headers["location"])
+        self.assertEqual(second.headers["content-length"], first.headers["content-length"])
+        self.assertEqual(second.json(), first.json())
+
+    async def test_retry_replays_repeated_headers(self):
+        """
+        Test that headers sent several times, like cookies, are all stored and replayed.
+        """
+        first = await self._post("/session", "key-1")
+        second = await self._post("/session", "key-1")
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len(first.headers.get_list("set-cookie")), 2)
+        self.assertEqual(second.headers.get_list("set-cookie"), first.headers.get_list("set-cookie"))
+
+    async def test_concurrent_duplicates_wait_for_the_first_request(self):
+        """
+        Test that duplicates sent while the first request is running get its response.
+        """
+        self.release.clear()
+        requests = [asyncio.ensure_future(self._post("/items", "key-1")) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        self.release.set()
+        responses = await asyncio.gather(*requests)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual({response.json()["id"] for response in responses}, {1})
+
+    async def test_key_reused_with_another_payload_is_rejected(self):
+        """
+        Test that a key sent again with a different body is rejected.
+        """
+        await self._post("/items", "key-1", json={"value": 1})
+        response = await self._post("/items", "key-1", json={"value": 2})
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.calls, 1)
+
+    async def test_keys_are_scoped_to_the_caller(self):
+        """
+        Test that two callers using the same key both run the route.
+        """
+        await self._post("/items", "key-1", token="a")
+        await self._post("/items", "key-1", token="b")
+
+        self.assertEqual(self.calls, 2)
+
+    async def test_requests_without_user_are_scoped_to_their_payload(self):
+        """
+        Test that without an authorized user, a key only replays the response of the same request.
+        """
+        await self._post("/items", "key-1", json={"value": 1}, token=None)
+        replayed = await self._post("/items", "key-1", json={"value": 1}, token=None)
+        other = await self._post("/items", "key-1", json={"value": 2}, token=None)
+
+        self.assertEqual(replayed.headers[IDEMPOTENT_REPLAYED_HEADER], "true")
+        self.assertEqual(other.status_code, 201)
+        self.assertEqual(self.calls, 2)
+
+    async def test_expired_keys_run_the_route_again(self):
+        """
+        Test that a key is forgotten once its TTL elapsed.
+        """
+        await self._post("/items", "key-1")
+        self.clock.now = 61
+        await self._post("/items", "key-1")
+
+        self.assertEqual(self.calls, 2)
+
+    async def test_store_is_bounded(self):
+        """
+        Test that the oldest keys are evicted once the store is full.
+        """
+        for key in ("key-1", "key-2", "key-3"):
+            await self._post("/items", key)
+        await self._post("/items", "key-1")
+
+        self.assertEqual(self.calls, 4)
+
+    async def test_requests_without_key_or_on_other_routes_are_not_stored(self):
+        """
+        Test that only marked routes called with a key are deduplicated.
+        """
+        await self._post("/items", None)
+        await self._post("/items", None)
+        await self._post("/plain", "key-1")
+        await self._post("/plain", "key-1")
+
+        self.assertEqual(self.calls, 4)
+
+    async def test_server_errors_release_the_key(self):
+        """
+        Test that a failed request can be retried with the same key.
+        """
+        first = await self._post("/failing", "key-1")
+        second = await self._post("/failing", "key-1")
+
+        self.assertEqual((first.status_code, second.status_code), (503, 503))
+        self.assertEqual(self.calls, 2)
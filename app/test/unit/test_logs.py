@@ -0,0 +1,245 @@
+import logging
+import logging.config
+import os
+import queue
+import sys
+import tempfile
+import threading
+import unittest
+
+import orjson
+from fastapi import APIRouter
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+from starlette_context import plugins
+from starlette_context.middleware import RawContextMiddleware
+
+from app.config.logs import DroppingQueueHandler
+from app.config.logs import JsonFormatter
+from app.config.logs import LogConfig
+from app.config.logs import LogPipeline
+from app.config.logs import RateLimitFilter
+from app.config.logs import RequestContextFilter
+from app.config.timing import TimedRoute
+from app.config.timing import TimingMiddleware
+from app.utils.timing import LatencyRegistry
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+        self.lines = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.threads.add(threading.current_thread().name)
+        self.lines.append(self.format(record))
+
+
+class TestDroppingQueueHandler(unittest.TestCase):
+
+    def test_drops_and_reports_records_which_do_not_fit(self):
+        log_queue = queue.Queue(maxsize=2)
+        handler = DroppingQueueHandler(log_queue)
+        logger = logging.getLogger("test_logs.dropping")
+        logger.propagate = False
+        logger.addHandler(handler)
+
+        for index in range(5):
+            logger.warning("record %d", index)
+        self.assertEqual(handler.dropped, 3)
+
+        log_queue.get_nowait()
+        log_queue.get_nowait()
+        logger.warning("after the burst")
+
+        messages = [log_queue.get_nowait().getMessage() for _ in range(2)]
+        self.assertEqual(messages, ["3 log records dropped, the log queue was full", "after the burst"])
+        logger.removeHandler(handler)
+
+
+class TestLogPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("test_logs.pipeline")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+        self.handler = RecordingHandler()
+        self.logger.addHandler(self.handler)
+        self.pipeline = LogPipeline()
+
+    def tearDown(self):
+        self.pipeline.stop()
+        self.logger.removeHandler(self.handler)
+
+    def test_handlers_run_in_the_listener_thread(self):
+        self.pipeline.install("test_logs.pipeline", max_size=100)
+        self.logger.info("hello %s", "world")
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            self.logger.exception("failed")
+        self.pipeline.stop()
+
+        self.assertEqual(self.handler.lines[0], "INFO hello world")
+        self.assertTrue(self.handler.lines[1].startswith("ERROR failed\nTraceback"))
+        self.assertIn("ValueError: boom", self.handler.lines[1])
+        self.assertNotIn(threading.current_thread().name, self.handler.threads)
+
+    def test_stop_hands_the_handlers_back(self):
+        self.pipeline.install("test_logs.pipeline", max_size=100)
+        self.assertIsInstance(self.logger.handlers[0], DroppingQueueHandler)
+
+        self.pipeline.stop()
+        self.logger.info("synchronous")
+
+        self.assertEqual(self.logger.handlers, [self.handler])
+        self.assertEqual(self.handler.lines, ["INFO synchronous"])
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs fork")
+    def test_forked_processes_keep_logging(self):
+        self.pipeline.install("test_logs.pipeline", max_size=100)
+        read_end, write_end = os.pipe()
+
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                self.pipeline.after_fork()
+                self.logger.info("from the child")
+                self.pipeline.stop()
+                os.write(write_end, "\n".join(self.handler.lines).encode())
+                status = 0
+            finally:
+                os._exit(status)
+
+        os.close(write_end)
+        _, status = os.waitpid(pid, 0)
+        with os.fdopen(read_end) as pipe:
+            lines = pipe.read()
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertEqual(lines, "INFO from the child")
+
+
+class TestJsonFormatter(unittest.TestCase):
+
+    def test_formats_one_json_document_per_record(self):
+        record = logging.makeLogRecord(
+            {"name": "server", "levelno": logging.ERROR, "levelname": "ERROR", "msg": "Failed %s", "args": ("x",)}
+        )
+        record.request_id = "abc"
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record.exc_info = sys.exc_info()
+
+        line = JsonFormatter().format(record)
+
+        self.assertNotIn("\n", line)
+        document = orjson.loads(line)
+        self.assertEqual(document["level"], "ERROR")
+        self.assertEqual(document["message"], "Failed x")
+        self.assertEqual(document["request_id"], "abc")
+        self.assertNotIn("user_reference", document)
+        self.assertIn("ValueError: boom", document["exception"])
+
+
+class TestRequestContextFilter(unittest.TestCase):
+
+    correlation_id = "7c5a8e0e-3c1f-4b7e-9c53-2d1c8a1f0b6e"
+
+    def test_adds_the_request_fields_within_a_request(self):
+        records = []
+        logger = logging.getLogger("test_logs.context")
+        logger.propagate = False
+        handler = logging.Handler()
+        handler.emit = records.append
+        handler.addFilter(RequestContextFilter())
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+
+        router = APIRouter(route_class=TimedRoute)
+
+        @router.get("/items/{item_id}")
+        async def get_item(item_id: int):
+            logger.warning("inside")
+            return {}
+
+        app = FastAPI()
+        app.include_router(router)
+        app.add_middleware(TimingMiddleware, registry=LatencyRegistry())
+        app.add_middleware(RawContextMiddleware, plugins=(plugins.RequestIdPlugin(), plugins.CorrelationIdPlugin()))
+        TestClient(app).get("/items/1", headers={"X-Correlation-ID": self.correlation_id})
+        logger.warning("outside")
+
+        inside, outside = records
+        self.assertEqual(inside.correlation_id, self.correlation_id)
+        self.assertTrue(inside.request_id)
+        self.assertEqual(inside.route, "/items/{item_id}")
+        self.assertFalse(hasattr(outside, "request_id"))
+        self.assertFalse(hasattr(outside, "route"))
+
+
+class TestRateLimitFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.filter = RateLimitFilter(burst=2, interval=60, sample_rate=3, max_templates=2, clock=lambda: self.now)
+
+    def log(self, msg, *args):
+        record = logging.makeLogRecord({"name": "server", "levelno": logging.ERROR, "msg": msg, "args": args})
+        return record if self.filter.filter(record) else None
+
+    def test_samples_a_template_past_its_burst(self):
+        passed = [self.log("Validation error: %s", index) for index in range(8)]
+
+        self.assertEqual([record is not None for record in passed], [True, True, False, False, True, False, False, True])
+        self.assertEqual(passed[4].sampled, "1/3")
+        # Other templates have their own budget
+        self.assertIsNotNone(self.log("Another error"))
+
+    def test_reports_the_suppressed_count_in_the_next_window(self):
+        for index in range(4):
+            self.log("Validation error: %s", index)
+
+        self.now = 60
+        record = self.log("Validation error: %s", "again")
+        self.assertEqual(record.suppressed, 2)
+        self.assertFalse(hasattr(self.log("Validation error: %s", "and again"), "suppressed"))
+
+    def test_forgets_the_least_recent_templates(self):
+        for template in ("a", "b", "c"):
+            self.log(template)
+        self.assertEqual(list(self.filter._windows), [("server", logging.ERROR, "b"), ("server", logging.ERROR, "c")])
+
+
+
+class TestLogFile(unittest.TestCase):
+
+    def test_file_moved_away_is_reopened(self):
+        """
+        Test that the file, shared by the workers, is written again after it was rotated outside of the app.
+        """
+        handler_config = LogConfig().handlers["file"]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "server.log")
+            handler = logging.config.DictConfigurator({}).resolve(handler_config["class"])(path)
+            handler.setFormatter(JsonFormatter())
+            logger = logging.getLogger("test_logs.file")
+            logger.propagate = False
+            logger.addHandler(handler)
+            try:
+                logger.warning("before")
+                os.rename(path, f"{path}.1")
+                logger.warning("after")
+            finally:
+                logger.removeHandler(handler)
+                handler.close()
+
+            with open(path) as file:
+                self.assertEqual([orjson.loads(line)["message"] for line in file], ["after"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from fastapi import APIRouter
+from fastapi import FastAPI
+from prometheus_client import CollectorRegistry
+from sqlalchemy import create_engine
+from starlette.testclient import TestClient
+
+from app.config.config import config
+from app.config.http import exception_error
+from app.config.metrics import AppMetrics
+from app.config.metrics import MetricsSampler
+from app.config.metrics import render_metrics
+from app.config.response import HTTPException
+from app.config.timing import TimedRoute
+from app.config.timing import TimingMiddleware
+from app.controller.metrics import router as metrics_router
+from app.db.database import TimedQueuePool
+from app.utils.singleflight import SingleFlight
+from app.utils.timing import LatencyRegistry
+
+
+class FakeCache:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+
+class TestMetricsSampler(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.registry = CollectorRegistry()
+        self.metrics = AppMetrics(registry=self.registry)
+        self.engine = create_engine("sqlite:////tmp/test_metrics.db", poolclass=TimedQueuePool, pool_size=2)
+        self.cache = FakeCache()
+        self.group = SingleFlight("test_metrics")
+        self.sampler = MetricsSampler(
+            metrics=self.metrics,
+            pool=self.engine.pool,
+            caches={"fake": self.cache},
+            singleflight_groups={"test_metrics": self.group},
+        )
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def value(self, name, **labels):
+        return self.registry.get_sample_value(name, labels)
+
+    async def test_publishes_counters_as_increments(self):
+        self.cache.hits, self.cache.misses = 3, 1
+        self.group.do("key", lambda: 1)
+        self.sampler.sample()
+        self.cache.hits = 5
+        self.sampler.sample()
+
+        self.assertEqual(self.value("cache_requests_total", cache="fake", result="hit"), 5)
+        self.assertEqual(self.value("cache_requests_total", cache="fake", result="miss"), 1)
+        self.assertEqual(self.value("singleflight_calls_total", group="test_metrics", outcome="executed"), 1)
+        self.assertEqual(self.value("threadpool_busy_threads"), 0)
+
+    async def test_samples_the_connection_pool(self):
+        with self.engine.connect():
+            self.sampler.sample()
+            self.assertEqual(self.value("db_pool_checked_out"), 1)
+            self.assertEqual(self.value("db_pool_size"), 2)
+        self.sampler.sample()
+
+        self.assertEqual(self.value("db_pool_checked_out"), 0)
+        self.assertEqual(self.value("db_pool_checkouts_total"), 1)
+
+    async def test_measures_the_event_loop_lag(self):
+        task = asyncio.create_task(self.sampler.run(interval=0.01))
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+        self.assertGreater(self.value("event_loop_lag_seconds_count"), 0)
+
+
+class TestRequestMetrics(unittest.TestCase):
+
+    def test_counts_requests_per_route_and_status(self):
+        registry = CollectorRegistry()
+        metrics = AppMetrics(registry=registry)
+        router = APIRouter(route_class=TimedRoute)
+
+        @router.get("/items/{id}")
+        async def get_item(id: int):
+            return {"id": id}
+
+        app = FastAPI()
+        app.include_router(router)
+        app.add_middleware(TimingMiddleware, registry=LatencyRegistry(), metrics=metrics)
+        client = TestClient(app)
+        client.get("/items/1")
+        client.get("/items/x")
+
+        labels = {"method": "GET", "route": "/items/{id}"}
+        self.assertEqual(registry.get_sample_value("http_requests_total", {**labels, "status": "200"}), 1)
+        self.assertEqual(registry.get_sample_value("http_requests_total", {**labels, "status": "422"}), 1)
+        self.assertEqual(registry.get_sample_value("http_requests_in_progress"), 0)
+        self.assertIn(b'http_request_duration_seconds_count{method="GET"', render_metrics(registry)[0])
+
+
+
+class TestMetricsRoute(unittest.TestCase):
+
+    def setUp(self):
+        app = FastAPI()
+        app.include_router(metrics_router)
+
+        @app.exception_handler(HTTPException)
+        async def http_exception(_, exc):
+            return exception_error(exc)
+
+        self.client = TestClient(app)
+
+    def test_scrapers_send_the_token(self):
+        """
+        Test that the metrics are only served to requests carrying the configured token.
+        """
+        with patch.object(config, "METRICS_TOKEN", "secret"):
+            self.assertEqual(self.client.get("/metrics").status_code, 401)
+            self.assertEqual(self.client.get("/metrics", headers={"Authorization": "Bearer other"}).status_code, 401)
+            response = self.client.get("/metrics", headers={"Authorization": "Bearer secret"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"http_requests_total", response.content)
+
+    def test_not_served_without_a_token(self):
+        with patch.object(config, "METRICS_TOKEN", None):
+            self.assertEqual(self.client.get("/metrics", headers={"Authorization": "Bearer "}).status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
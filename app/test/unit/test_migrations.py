@@ -0,0 +1,87 @@
+import unittest
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import StaticPool
+from sqlalchemy import text
+from sqlmodel import SQLModel
+from sqlmodel import create_engine
+
+from app.data import models  # noqa: F401
+from app.data.assistance_repo import GEOHASH_PRECISION
+from app.db.migrations import INITIAL_REVISION
+from app.db.migrations import alembic_config
+from app.db.migrations import upgrade_database
+from app.utils.geo import encode_geohash
+
+
+class TestMigrations(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://", poolclass=StaticPool)
+        self.head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def revision(self):
+        with self.engine.connect() as connection:
+            return MigrationContext.configure(connection).get_current_revision()
+
+    def test_migrates_an_empty_database_to_the_models(self):
+        upgrade_database(self.engine)
+
+        self.assertEqual(self.revision(), self.head)
+        # A model changed without its migration shows up here
+        self.assertEqual(self.differences(), [])
+
+    def create_initial_schema(self):
+        """The tables `create_all` created before the migrations, without their revision."""
+        with self.engine.begin() as connection:
+            command.upgrade(alembic_config(connection), INITIAL_REVISION)
+            connection.execute(text("DROP TABLE alembic_version"))
+
+    def differences(self):
+        with self.engine.connect() as connection:
+            return compare_metadata(MigrationContext.configure(connection), SQLModel.metadata)
+
+    def test_stamps_databases_created_without_alembic(self):
+        self.create_initial_schema()
+        with self.engine.begin() as connection:
+            connection.execute(text(
+                "INSERT INTO assistances (id, external_reference, is_deleted, created_at, last_updated, "
+                "gps_latitude, gps_longitude) VALUES "
+                "(1, 'located', 0, '2024-01-01', '2024-01-01', '38.7223', '-9.1393'), "
+                "(2, 'unlocated', 0, '2024-01-01', '2024-01-01', '', NULL)"
+            ))
+
+        upgrade_database(self.engine)
+
+        self.assertEqual(self.revision(), self.head)
+        self.assertEqual(self.differences(), [])
+        with self.engine.connect() as connection:
+            rows = connection.execute(
+                text("SELECT gps_latitude, gps_longitude, geohash FROM assistances ORDER BY id")
+            ).all()
+        self.assertEqual(rows[0], (38.7223, -9.1393, encode_geohash(38.7223, -9.1393, GEOHASH_PRECISION)))
+        self.assertEqual(rows[1], (None, None, None))
+
+    def test_upgrades_databases_created_by_the_models(self):
+        SQLModel.metadata.create_all(self.engine)
+
+        upgrade_database(self.engine)
+
+        self.assertEqual(self.revision(), self.head)
+        self.assertEqual(self.differences(), [])
+
+    def test_upgrades_once(self):
+        upgrade_database(self.engine)
+        upgrade_database(self.engine)
+
+        self.assertEqual(self.revision(), self.head)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.config.page import CachedPage
+
+
+class TestCachedPage(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "index.html")
+        self.write("<h1>{{ 'Loxea' | upper }}</h1>")
+        self.page = CachedPage(directory=self.directory.name, template="index.html", auto_reload=True)
+
+        async def root(request):
+            return self.page.response(request)
+
+        self.client = TestClient(Starlette(routes=[Route("/", root, methods=["GET", "HEAD"])]))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, content, mtime=1_700_000_000):
+        with open(self.path, "w") as file:
+            file.write(content)
+        os.utime(self.path, (mtime, mtime))
+
+    def test_serves_the_rendered_page(self):
+        response = self.client.get("/", headers={"Accept-Encoding": "identity"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, "<h1>LOXEA</h1>")
+        self.assertEqual(response.headers["content-type"], "text/html; charset=utf-8")
+        self.assertEqual(response.headers["last-modified"], "Tue, 14 Nov 2023 22:13:20 GMT")
+
+        compressed = self.client.get("/", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(compressed.headers["content-encoding"], "gzip")
+        self.assertEqual(gzip.decompress(self.page.page.gzip_body), b"<h1>LOXEA</h1>")
+        self.assertNotEqual(compressed.headers["etag"], response.headers["etag"])
+
+    def test_answers_not_modified(self):
+        etag = self.client.get("/", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+
+        for headers in (
+            {"If-None-Match": etag},
+            {"If-None-Match": f'W/{self.page.page.etag}'},
+            {"If-Modified-Since": "Tue, 14 Nov 2023 22:13:20 GMT"},
+        ):
+            response = self.client.get("/", headers=headers)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b"")
+
+        response = self.client.get("/", headers={"If-Modified-Since": "Tue, 14 Nov 2023 22:13:19 GMT"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_renders_again_when_the_template_changes(self):
+        first = self.page.page
+        self.assertIs(self.page.page, first)
+
+        self.write("<h1>Changed</h1>", mtime=1_700_000_100)
+        response = self.client.get("/", headers={"Accept-Encoding": "identity"})
+
+        self.assertEqual(response.text, "<h1>Changed</h1>")
+        self.assertNotEqual(self.page.page.etag, first.etag)
+
+
+if __name__ == '__main__':
+    unittest.main()
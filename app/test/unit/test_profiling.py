@@ -0,0 +1,181 @@
+import os
+import tempfile
+import time
+import unittest
+from collections import Counter
+from types import SimpleNamespace
+
+from fastapi import APIRouter
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from app.config.profiling import PROFILE_ID_HEADER
+from app.config.profiling import ProfilingMiddleware
+from app.config.timing import TimedRoute
+from app.config.timing import TimingMiddleware
+from app.utils.profiling import APP_DIRECTORY
+from app.utils.profiling import DirectoryProfileStore
+from app.utils.profiling import Profile
+from app.utils.profiling import ProfileStore
+from app.utils.profiling import _stack
+from app.utils.timing import LatencyRegistry
+
+OUTER = ("handle", "app/controller/x.py", 10)
+INNER = ("query", "app/data/y.py", 20)
+
+
+def busy(duration):
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        pass
+
+
+class TestProfile(unittest.TestCase):
+
+    def setUp(self):
+        self.profile = Profile(method="GET", path="/items/1", interval=0.005, route="/items/{id}")
+        self.profile.stacks = Counter({(OUTER, INNER): 3, (OUTER,): 1})
+
+    def test_collapsed_stacks(self):
+        self.assertEqual(
+            self.profile.collapsed(),
+            "handle (app/controller/x.py:10);query (app/data/y.py:20) 3\nhandle (app/controller/x.py:10) 1\n",
+        )
+
+    def test_speedscope(self):
+        document = self.profile.speedscope()
+
+        frames = [frame["name"] for frame in document["shared"]["frames"]]
+        self.assertEqual(frames, ["handle", "query"])
+        profile = document["profiles"][0]
+        self.assertEqual(profile["samples"], [[0, 1], [0]])
+        self.assertEqual(profile["weights"], [0.015, 0.005])
+        self.assertEqual(profile["name"], "GET /items/{id}")
+
+    def test_store_keeps_the_latest_profiles(self):
+        store = ProfileStore(max_profiles=2)
+        profiles = [Profile(method="GET", path=f"/{index}", interval=0.005) for index in range(3)]
+        for profile in profiles:
+            store.add(profile)
+
+        self.assertIsNone(store.get(profiles[0].id))
+        self.assertIs(store.get(profiles[2].id), profiles[2])
+        self.assertEqual([summary["path"] for summary in store.summaries()], ["/2", "/1"])
+
+
+class TestDirectoryProfileStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "profiles")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_profiles_are_shared_by_the_workers(self):
+        """
+        Test that a profile stored by one worker is served by another.
+        """
+        profile = Profile(method="GET", path="/items/1", interval=0.005, route="/items/{id}", status_code=200)
+        profile.stacks = Counter({(OUTER, INNER): 3, (OUTER,): 1})
+        DirectoryProfileStore(max_profiles=2, directory=self.path).add(profile)
+
+        stored = DirectoryProfileStore(max_profiles=2, directory=self.path).get(profile.id)
+
+        self.assertEqual(stored.summary(), profile.summary())
+        self.assertEqual(stored.collapsed(), profile.collapsed())
+
+    def test_keeps_the_latest_profiles(self):
+        store = DirectoryProfileStore(max_profiles=2, directory=self.path)
+        self.assertEqual(store.summaries(), [])
+        profiles = [Profile(method="GET", path=f"/{index}", interval=0.005) for index in range(3)]
+        for profile in profiles:
+            store.add(profile)
+            time.sleep(0.01)
+
+        self.assertIsNone(store.get(profiles[0].id))
+        self.assertEqual([summary["path"] for summary in store.summaries()], ["/2", "/1"])
+
+    def test_ids_name_files_of_the_directory_only(self):
+        store = DirectoryProfileStore(max_profiles=2, directory=self.path)
+
+        self.assertIsNone(store.get("../../etc/passwd"))
+
+
+def frames(*filenames):
+    """A chain of frames running `filenames`, the outermost first."""
+    frame = None
+    for line, filename in enumerate(filenames):
+        frame = SimpleNamespace(f_code=SimpleNamespace(co_filename=filename, co_qualname="f", co_firstlineno=line), f_back=frame)
+    return frame
+
+
+class TestStack(unittest.TestCase):
+
+    def test_application_frames_are_kept(self):
+        stack = _stack(frames("/usr/lib/runpy.py", os.path.join(APP_DIRECTORY, "controller", "client.py")))
+
+        self.assertEqual(len(stack), 2)
+
+    def test_idle_event_loop_of_the_server_is_idle(self):
+        """
+        Test that the frames of the server, below the event loop of a worker, do not make it application code.
+        """
+        server = os.path.join(APP_DIRECTORY, "server.py")
+
+        self.assertIsNone(_stack(frames(server, server, "/usr/lib/gunicorn/arbiter.py", "/usr/lib/asyncio/base_events.py")))
+        self.assertIsNone(_stack(frames("/usr/lib/runpy.py", server, "/usr/lib/asyncio/base_events.py")))
+        self.assertIsNone(_stack(frames(os.path.join(APP_DIRECTORY, "script.py"), "/usr/lib/asyncio/base_events.py")))
+
+
+class TestProfilingMiddleware(unittest.TestCase):
+
+    def client(self, is_admin=True, sample_rate=0.0):
+        router = APIRouter(route_class=TimedRoute)
+
+        @router.get("/work/{item_id}")
+        def work(item_id: int):
+            busy(0.05)
+            return {}
+
+        app = FastAPI()
+        app.include_router(router)
+        self.store = ProfileStore(max_profiles=10)
+        app.add_middleware(ProfilingMiddleware, store=self.store, interval=0.001, sample_rate=sample_rate)
+
+        # Stands for the authorization middleware
+        @app.middleware("http")
+        async def authorize(request, call_next):
+            request.state.current_user = SimpleNamespace(is_admin=is_admin)
+            return await call_next(request)
+
+        app.add_middleware(TimingMiddleware, registry=LatencyRegistry())
+        return TestClient(app)
+
+    def test_profiles_requests_of_admins_asking_for_it(self):
+        client = self.client()
+        self.assertNotIn(PROFILE_ID_HEADER, client.get("/work/1").headers)
+        self.assertEqual(self.store.summaries(), [])
+
+        response = client.get("/work/1", headers={"X-Profile": "1"})
+
+        profile = self.store.get(response.headers[PROFILE_ID_HEADER])
+        self.assertEqual(profile.route, "/work/{item_id}")
+        self.assertEqual(profile.status_code, 200)
+        self.assertGreater(profile.samples, 0)
+        self.assertIn("busy (app/test/unit/test_profiling.py", profile.collapsed())
+
+    def test_ignores_the_header_of_other_users(self):
+        response = self.client(is_admin=False).get("/work/1", headers={"X-Profile": "1"})
+
+        self.assertNotIn(PROFILE_ID_HEADER, response.headers)
+        self.assertEqual(self.store.summaries(), [])
+
+    def test_samples_requests(self):
+        response = self.client(is_admin=False, sample_rate=1.0).get("/work/1")
+
+        self.assertIsNotNone(self.store.get(response.headers[PROFILE_ID_HEADER]))
+
+
+if __name__ == '__main__':
+    unittest.main()
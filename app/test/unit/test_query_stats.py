@@ -0,0 +1,95 @@
+import unittest
+
+from fastapi import APIRouter
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlmodel import create_engine
+from starlette.testclient import TestClient
+
+from app.config.timing import TimedRoute
+from app.config.timing import TimingMiddleware
+from app.db import instrumentation
+from app.db.database import engine
+from app.db.instrumentation import QueryStatsMiddleware
+from app.db.instrumentation import capture_queries
+from app.db.instrumentation import parameter_shape
+from app.db.instrumentation import query_budget
+from app.utils.timing import LatencyRegistry
+
+
+class TestQueryHelpers(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:")
+
+    def run_queries(self, count):
+        with self.engine.connect() as connection:
+            for index in range(count):
+                connection.execute(text("SELECT :value"), {"value": index})
+
+    def test_capture_counts_statements(self):
+        with capture_queries(self.engine) as queries:
+            self.run_queries(3)
+
+        self.assertEqual(queries.count, 3)
+        self.assertEqual(queries.repeated(threshold=3), [("SELECT ?", 3)])
+        self.assertEqual(queries.repeated(threshold=4), [])
+        self.assertTrue(queries.report().startswith("3 queries in"))
+
+    def test_budget_fails_with_the_statements(self):
+        with query_budget(self.engine, max_queries=2):
+            self.run_queries(2)
+
+        with self.assertRaises(AssertionError) as context, query_budget(self.engine, max_queries=2):
+            self.run_queries(3)
+        self.assertIn("3 x SELECT ?", str(context.exception))
+
+    def test_parameter_shape_hides_values(self):
+        self.assertEqual(parameter_shape({"email": "a@b.c", "id": 1}), "{email: str, id: int}")
+        self.assertEqual(parameter_shape(("a@b.c", 1)), "(str, int)")
+        self.assertEqual(parameter_shape([("a", 1), ("b", 2)], executemany=True), "2 x (str, int)")
+
+
+class TestQueryStatsMiddleware(unittest.TestCase):
+
+    def setUp(self):
+        router = APIRouter(route_class=TimedRoute)
+
+        @router.get("/items/{count}")
+        async def get_items(count: int):
+            with engine.connect() as connection:
+                for index in range(count):
+                    connection.execute(text("SELECT :value"), {"value": index})
+            return {}
+
+        app = FastAPI()
+        app.include_router(router)
+        app.add_middleware(QueryStatsMiddleware, repeat_threshold=5)
+        app.add_middleware(TimingMiddleware, registry=LatencyRegistry())
+        self.client = TestClient(app)
+
+    def test_logs_repeated_statements(self):
+        with self.assertLogs("server", level="WARNING") as logs:
+            self.client.get("/items/5")
+        self.assertEqual(
+            logs.output, ["WARNING:server:N+1 query suspected in GET /items/{count}: 5 x SELECT ?"]
+        )
+
+        with self.assertNoLogs("server", level="WARNING"):
+            self.client.get("/items/4")
+
+    def test_logs_slow_statements_with_their_parameter_shape(self):
+        threshold = instrumentation.slow_query_threshold
+        instrumentation.slow_query_threshold = 0
+        try:
+            with self.assertLogs("server", level="WARNING") as logs:
+                self.client.get("/items/1")
+        finally:
+            instrumentation.slow_query_threshold = threshold
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertRegex(logs.output[0], r"Slow query \(.* ms\) in /items/\{count\}: SELECT \? parameters=\(int\)")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import json
+import threading
+import unittest
+
+from starlette.requests import Request
+
+from app.data.reference_repo import ReferenceRepo
+from app.domain.reference_cache import ReferenceCache
+from app.domain.reference_cache import cached_response
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def request_with(headers):
+    return Request({"type": "http", "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()]})
+
+
+class TestReferenceCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = ReferenceCache(check_interval=5, clock=self.clock)
+        self.version = 1
+        self.version_checks = 0
+        self.loads = 0
+        self.data = [{"id": 1, "name": "Police", "number": "117"}]
+
+    def _get(self):
+        def version():
+            self.version_checks += 1
+            return self.version
+
+        def loader(version):
+            self.loads += 1
+            return self.data
+
+        return self.cache.get("contacts", version=version, loader=loader)
+
+    def test_body_is_serialized_once(self):
+        first = self._get()
+        second = self._get()
+
+        self.assertIs(first, second)
+        self.assertEqual(json.loads(first.body), self.data)
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(self.version_checks, 1)
+
+    def test_shared_version_is_checked_after_the_interval(self):
+        self._get()
+        self.clock.now = 6
+        self._get()
+        self.assertEqual((self.version_checks, self.loads), (2, 1))
+
+        self.version = 2
+        self.data = []
+        self.clock.now = 12
+        entry = self._get()
+
+        self.assertEqual(self.loads, 2)
+        self.assertEqual(json.loads(entry.body), [])
+
+    def test_invalidate_reloads_right_away(self):
+        first = self._get()
+        self.data = [{"id": 2, "name": "Firemen", "number": "118"}]
+        self.version = 2
+        self.cache.invalidate("contacts")
+
+        second = self._get()
+
+        self.assertEqual(self.loads, 2)
+        self.assertNotEqual(first.etag, second.etag)
+
+    def test_matching_etag_returns_not_modified(self):
+        entry = self._get()
+
+        fresh = cached_response(request_with({}), entry)
+        not_modified = cached_response(request_with({"If-None-Match": f'W/"other", {entry.etag}'}), entry)
+        stale = cached_response(request_with({"If-None-Match": '"other"'}), entry)
+
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual(fresh.body, entry.body)
+        self.assertEqual(fresh.headers["etag"], entry.etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.body, b"")
+        self.assertEqual(stale.status_code, 200)
+
+
+class BlockingSession:
+    """Reads the rows committed when a query starts, the first query waiting to be released."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def exec(self, statement):
+        rows = list(self.rows)
+        if not self.started.is_set():
+            self.started.set()
+            self.release.wait(timeout=5)
+        return FakeResult(rows)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class TestReferenceLoads(unittest.TestCase):
+
+    def test_load_started_before_a_change_is_not_cached_under_its_version(self):
+        session = BlockingSession([(1, "Police", "117")])
+        repo = ReferenceRepo(session)
+        cache = ReferenceCache(check_interval=5)
+        versions = iter([1, 2])
+
+        def get():
+            cache.get(
+                "contacts", version=lambda: next(versions), loader=lambda v: repo.get_emergency_contacts(version=v)
+            )
+
+        first = threading.Thread(target=get)
+        first.start()
+        session.started.wait(timeout=5)
+        # Committed while the first load is in flight, the next reader sees the bumped version
+        session.rows = [(1, "Police", "112")]
+        second = threading.Thread(target=get)
+        second.start()
+        second.join(timeout=1)
+        session.release.set()
+        first.join()
+        second.join()
+
+        entry = cache.get("contacts", version=lambda: 2, loader=lambda version: self.fail("reloaded"))
+        self.assertEqual(entry.version, 2)
+        self.assertEqual(json.loads(entry.body), [{"id": 1, "name": "Police", "number": "112"}])
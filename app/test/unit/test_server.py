@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+from app.config.config import FactoryConfig
+from app.server import server_options
+from app.utils.cpu import cpu_quota
+from app.utils.cpu import worker_count
+
+
+class TestCpuQuota(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+
+    def write(self, path, content):
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(content)
+
+    def test_reads_the_cgroup_v2_quota(self):
+        self.write("cpu.max", "150000 100000\n")
+        self.assertEqual(cpu_quota(self.root), 1.5)
+
+    def test_cgroup_v2_without_a_quota(self):
+        self.write("cpu.max", "max 100000\n")
+        self.assertIsNone(cpu_quota(self.root))
+
+    def test_reads_the_cgroup_v1_quota(self):
+        self.write("cpu/cpu.cfs_quota_us", "200000\n")
+        self.write("cpu/cpu.cfs_period_us", "100000\n")
+        self.assertEqual(cpu_quota(self.root), 2)
+
+    def test_cgroup_v1_without_a_quota(self):
+        self.write("cpu/cpu.cfs_quota_us", "-1\n")
+        self.write("cpu/cpu.cfs_period_us", "100000\n")
+        self.assertIsNone(cpu_quota(self.root))
+
+    def test_without_cgroups(self):
+        self.assertIsNone(cpu_quota(self.root))
+
+    def test_worker_count(self):
+        self.assertEqual(worker_count(0.5), 1)
+        self.assertEqual(worker_count(1.5), 2)
+        self.assertEqual(worker_count(4, per_cpu=2), 8)
+        self.assertEqual(worker_count(64, maximum=16), 16)
+
+
+class TestServerOptions(unittest.TestCase):
+
+    def settings(self, **values):
+        return FactoryConfig(
+            SERVER_NAME="test",
+            SERVER_HOST="0.0.0.0",
+            SERVER_PORT="8080",
+            SQLALCHEMY_DATABASE_URI="sqlite://",
+            SECRET_KEY="secret",
+            **values,
+        )
+
+    def test_one_worker_per_cpu(self):
+        options = server_options(self.settings(SERVER_MAX_REQUESTS=500, SERVER_BACKLOG=128), cpus=3)
+
+        self.assertEqual(options["workers"], 3)
+        self.assertEqual(options["bind"], "0.0.0.0:8080")
+        self.assertEqual(options["max_requests"], 500)
+        self.assertEqual(options["backlog"], 128)
+        self.assertEqual(options["worker_class"], "uvicorn.workers.UvicornWorker")
+
+    def test_configured_workers(self):
+        self.assertEqual(server_options(self.settings(SERVER_WORKERS=2), cpus=8)["workers"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import threading
+import unittest
+
+from app.utils.singleflight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.group = SingleFlight("test")
+        self.release = threading.Event()
+        self.executions = 0
+
+    def _slow_query(self):
+        self.executions += 1
+        self.release.wait(timeout=5)
+        return ["result"]
+
+    def _wait_for_waiters(self, count):
+        while self.group.stats().calls < count:
+            threading.Event().wait(0.001)
+
+    def test_concurrent_calls_share_one_execution(self):
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.group.do("faqs", self._slow_query)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        self._wait_for_waiters(8)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+        stats = self.group.stats()
+        self.assertEqual(self.executions, 1)
+        self.assertEqual(results, [["result"]] * 8)
+        self.assertIs(results[0], results[-1])
+        self.assertEqual((stats.calls, stats.executions, stats.coalesced, stats.in_flight), (8, 1, 7, 0))
+
+    def test_sequential_calls_are_not_cached(self):
+        self.release.set()
+        self.group.do("faqs", self._slow_query)
+        self.group.do("faqs", self._slow_query)
+        self.group.do("contacts", self._slow_query)
+
+        self.assertEqual(self.executions, 3)
+        self.assertEqual(self.group.stats().coalesced, 0)
+
+    def test_errors_are_shared_with_waiting_callers(self):
+        def failing_query():
+            self.release.wait(timeout=5)
+            raise RuntimeError("database unavailable")
+
+        errors = []
+
+        def call():
+            try:
+                self.group.do("faqs", failing_query)
+            except RuntimeError as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        self._wait_for_waiters(3)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(self.group.stats().in_flight, 0)
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlmodel import create_engine
+
+from app.db.sqlite import SQLiteProfile
+from app.db.sqlite import apply_profile
+from app.db.sqlite import is_sqlite_file
+from app.db.sqlite import pool_options
+
+
+class TestSQLiteProfile(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.profile = SQLiteProfile(busy_timeout_ms=2000, cache_size_kib=1024, pool_size=4)
+        self.engine = create_engine(f"sqlite:///{os.path.join(directory.name, 'test.db')}", **pool_options(self.profile))
+        apply_profile(self.engine, self.profile)
+        self.addCleanup(self.engine.dispose)
+
+    def pragma(self, connection, name):
+        return connection.execute(text(f"PRAGMA {name}")).scalar()
+
+    def test_sets_the_pragmas_of_every_connection(self):
+        with self.engine.connect() as first, self.engine.connect() as second:
+            for connection in (first, second):
+                self.assertEqual(self.pragma(connection, "journal_mode"), "wal")
+                self.assertEqual(self.pragma(connection, "synchronous"), 1)  # NORMAL
+                self.assertEqual(self.pragma(connection, "busy_timeout"), 2000)
+                self.assertEqual(self.pragma(connection, "cache_size"), -1024)
+                self.assertEqual(self.pragma(connection, "temp_store"), 2)  # MEMORY
+
+    def test_reads_while_a_write_is_in_progress(self):
+        with self.engine.begin() as connection:
+            connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+            connection.execute(text("INSERT INTO items VALUES (1)"))
+
+        with self.engine.begin() as writer:
+            writer.execute(text("INSERT INTO items VALUES (2)"))
+            counts = []
+
+            def read():
+                with self.engine.connect() as reader:
+                    counts.append(reader.execute(text("SELECT count(*) FROM items")).scalar())
+
+            # Another thread, reading the last committed state without waiting for the writer
+            thread = threading.Thread(target=read)
+            thread.start()
+            thread.join(timeout=1)
+
+        self.assertEqual(counts, [1])
+
+    def test_files_only(self):
+        self.assertTrue(is_sqlite_file(make_url("sqlite:///./loxea.db")))
+        self.assertFalse(is_sqlite_file(make_url("sqlite://")))
+        self.assertFalse(is_sqlite_file(make_url("sqlite:///:memory:")))
+        self.assertFalse(is_sqlite_file(make_url("postgresql://localhost/loxea")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,211 @@
+import hashlib
+import unittest
+from datetime import timedelta
+
+from app.domain.storage import BlobListingCache
+from app.domain.storage import GCPStorage
+from app.domain.storage import SignedUrlCache
+from app.domain.storage import StorageBase
+from app.domain.storage import content_blob_name
+from app.domain.storage import signed_urls
+from app.domain.storage import uploaded_blobs
+
+
+class FakeStorage(StorageBase):
+
+    def __init__(self, existing: set[str] | None = None):
+        self.blobs = set(existing or [])
+        self.uploads = []
+        self.exists_checks = 0
+
+    def upload_file(self, bucket_name, source_file_path, destination_blob_name): ...
+
+    def upload_bytes(self, bucket_name, data, destination_blob_name):
+        self.uploads.append(destination_blob_name)
+        self.blobs.add(destination_blob_name)
+
+    def blob_exists(self, bucket_name, blob_name):
+        self.exists_checks += 1
+        return blob_name in self.blobs
+
+    def generate_download_urls(self, bucket_name, prefix, expiration=604800): ...
+
+    def generate_download_url(self, bucket_name, blob_name, expiration=604800): ...
+
+
+class TestContentAddressedUpload(unittest.TestCase):
+
+    def setUp(self):
+        uploaded_blobs.clear()
+        self.storage = FakeStorage()
+
+    def test_content_blob_name(self):
+        """
+        Test that the blob name is the content digest with prefix and extension.
+        """
+        digest = hashlib.sha256(b"image").hexdigest()
+        self.assertEqual(content_blob_name(b"image", ".JPG", "assistances/"), f"assistances/{digest}.jpg")
+        self.assertEqual(content_blob_name(b"image"), digest)
+
+    def test_content_blob_name_rejects_other_extensions(self):
+        """
+        Test that only image extensions can end a blob name.
+        """
+        for extension in ("html", "svg", "jpg/../index.html"):
+            with self.subTest(extension=extension), self.assertRaises(ValueError):
+                content_blob_name(b"image", extension, "assistances/")
+
+    def test_duplicate_upload_is_skipped(self):
+        """
+        Test that the same payload is uploaded once and the second call is
+        answered from the local index without hitting the backend.
+        """
+        first = self.storage.upload_content_addressed("bucket", b"photo", "png")
+        second = self.storage.upload_content_addressed("bucket", b"photo", "png")
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.storage.uploads, [first])
+        self.assertEqual(self.storage.exists_checks, 1)
+
+    def test_existing_blob_is_not_uploaded(self):
+        """
+        Test that a blob already present in the backend is not uploaded again.
+        """
+        blob_name = content_blob_name(b"photo", "png")
+        storage = FakeStorage(existing={blob_name})
+
+        result = storage.upload_content_addressed("bucket", b"photo", "png")
+
+        self.assertEqual(result, blob_name)
+        self.assertEqual(storage.uploads, [])
+
+    def test_different_buckets_are_indexed_separately(self):
+        """
+        Test that the local index is keyed by bucket as well as blob name.
+        """
+        self.storage.upload_content_addressed("bucket-a", b"photo")
+        self.storage.upload_content_addressed("bucket-b", b"photo")
+        self.assertEqual(self.storage.exists_checks, 2)
+
+
+
+class FakeBlob:
+
+    def __init__(self, name, signed):
+        self.name = name
+        self.signed = signed
+
+    def generate_signed_url(self, **kwargs):
+        self.signed.append(kwargs)
+        return f"https://storage.test/{self.name}"
+
+
+class FakeBucket:
+
+    def __init__(self):
+        self.signed = []
+
+    def blob(self, name):
+        return FakeBlob(name, self.signed)
+
+
+class FakeClient:
+
+    def __init__(self):
+        self.buckets = {}
+
+    def bucket(self, name):
+        return self.buckets.setdefault(name, FakeBucket())
+
+
+class TestGCPStorageSigning(unittest.TestCase):
+
+    def setUp(self):
+        signed_urls.clear()
+        self.storage = GCPStorage()
+        self.storage.client = FakeClient()
+
+    def tearDown(self):
+        signed_urls.clear()
+
+    def test_expiration_is_passed_as_a_lifetime(self):
+        """
+        Test that the expiration in seconds reaches the client as a duration, not as an epoch timestamp.
+        """
+        self.storage.generate_download_urls_for_blobs("bucket", ["assistances/a.png"], expiration=3600)
+
+        [signed] = self.storage.client.bucket("bucket").signed
+        self.assertEqual(signed["expiration"], timedelta(hours=1))
+        self.assertEqual(signed["version"], "v4")
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSignedUrlCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = SignedUrlCache(reuse_fraction=0.5, max_entries=2, clock=self.clock)
+
+    def test_url_is_reused_within_reuse_window(self):
+        """
+        Test that a URL is served from the cache until half its lifetime has passed.
+        """
+        self.cache.set("bucket", "blob", "GET", 100, "https://signed/1")
+
+        self.clock.now = 49
+        self.assertEqual(self.cache.get("bucket", "blob", "GET", 100), "https://signed/1")
+
+        self.clock.now = 50
+        self.assertIsNone(self.cache.get("bucket", "blob", "GET", 100))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_key_includes_method_and_expiration(self):
+        """
+        Test that URLs signed for another method or a shorter lifetime are not reused.
+        """
+        self.cache.set("bucket", "blob", "GET", 100, "https://signed/1")
+        self.assertIsNone(self.cache.get("bucket", "blob", "PUT", 100))
+        self.assertIsNone(self.cache.get("bucket", "blob", "GET", 200))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """
+        Test that the cache never holds more than `max_entries` URLs.
+        """
+        self.cache.set("bucket", "a", "GET", 100, "https://signed/a")
+        self.cache.set("bucket", "b", "GET", 100, "https://signed/b")
+        self.cache.get("bucket", "a", "GET", 100)
+        self.cache.set("bucket", "c", "GET", 100, "https://signed/c")
+
+        self.assertIsNotNone(self.cache.get("bucket", "a", "GET", 100))
+        self.assertIsNone(self.cache.get("bucket", "b", "GET", 100))
+
+
+class TestBlobListingCache(unittest.TestCase):
+
+    def test_listing_expires_and_is_invalidated_by_uploads(self):
+        """
+        Test that listings expire after the TTL and when a blob under the prefix changes.
+        """
+        clock = FakeClock()
+        cache = BlobListingCache(ttl=10, clock=clock)
+        cache.set("bucket", "images/", ["images/a"])
+
+        self.assertEqual(cache.get("bucket", "images/"), ["images/a"])
+        cache.invalidate("bucket", "images/b")
+        self.assertIsNone(cache.get("bucket", "images/"))
+
+        cache.set("bucket", "images/", ["images/a"])
+        clock.now = 10
+        self.assertIsNone(cache.get("bucket", "images/"))
+
+
+if __name__ == '__main__':
+    unittest.main()
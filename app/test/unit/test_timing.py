@@ -0,0 +1,77 @@
+import unittest
+
+from fastapi import APIRouter
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from app.config.timing import UNMATCHED_ROUTE
+from app.config.timing import TimedRoute
+from app.config.timing import TimingMiddleware
+from app.utils.timing import LatencyHistogram
+from app.utils.timing import LatencyRegistry
+from app.utils.timing import phase
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_counts_and_quantiles(self):
+        histogram = LatencyHistogram(buckets=(0.01, 0.1, 1.0, float("inf")))
+        for value in [0.005] * 50 + [0.05] * 40 + [0.5] * 9 + [5.0]:
+            histogram.observe(value)
+
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["count"], 100)
+        self.assertEqual(snapshot["buckets_ms"], {"10": 50, "100": 90, "1000": 99, "+Inf": 100})
+        self.assertAlmostEqual(histogram.quantile(0.5), 0.01)
+        self.assertAlmostEqual(histogram.quantile(0.9), 0.1)
+        self.assertEqual(histogram.quantile(1.0), 1.0)
+        self.assertEqual(LatencyHistogram().quantile(0.5), 0.0)
+
+
+class TestTimingMiddleware(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = LatencyRegistry()
+        router = APIRouter(prefix="/api", route_class=TimedRoute)
+
+        @router.get("/items/{id}")
+        async def get_item(id: int):
+            with phase("db"):
+                pass
+            return {"id": id}
+
+        @router.get("/sync")
+        def sync_route():
+            with phase("db"):
+                pass
+            return {}
+
+        app = FastAPI()
+        app.include_router(router)
+        app.add_middleware(TimingMiddleware, registry=self.registry, server_timing=True)
+        self.client = TestClient(app)
+
+    def test_reports_phases_in_server_timing_header(self):
+        response = self.client.get("/api/items/1")
+
+        metrics = dict(metric.split(";dur=") for metric in response.headers["server-timing"].split(", "))
+        self.assertEqual(set(metrics), {"handler", "db", "total"})
+        self.assertLessEqual(float(metrics["db"]), float(metrics["handler"]))
+        self.assertLessEqual(float(metrics["handler"]), float(metrics["total"]))
+
+    def test_aggregates_histograms_per_route_template(self):
+        self.client.get("/api/items/1")
+        self.client.get("/api/items/2")
+        self.client.get("/api/sync")
+        self.client.get("/missing")
+
+        snapshot = self.registry.snapshot()
+        self.assertEqual(list(snapshot), ["GET /api/items/{id}", "GET /api/sync", f"GET {UNMATCHED_ROUTE}"])
+        self.assertEqual(snapshot["GET /api/items/{id}"]["count"], 2)
+        self.assertEqual(snapshot["GET /api/items/{id}"]["phases"]["handler"]["count"], 2)
+        # Phases of sync endpoints run in the threadpool
+        self.assertEqual(snapshot["GET /api/sync"]["phases"]["db"]["count"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
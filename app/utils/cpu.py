@@ -0,0 +1,64 @@
+import math
+import os
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+
+def _read(path: str) -> str | None:
+    try:
+        with open(path) as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+
+def cpu_quota(cgroup_root: str = CGROUP_ROOT) -> float | None:
+    """
+    The CPUs the cgroup of the process may use, as set by a container limit.
+
+    Args:
+        cgroup_root (str): Mount point of the cgroup file system.
+
+    Returns:
+        float | None: The quota in CPUs, e.g. 1.5, or None without a quota.
+    """
+    # cgroup v2: "<quota> <period>", the quota being "max" without a limit
+    cpu_max = _read(os.path.join(cgroup_root, "cpu.max"))
+    if cpu_max is not None:
+        quota, _, period = cpu_max.partition(" ")
+        if quota == "max" or not period:
+            return None
+        return int(quota) / int(period)
+
+    # cgroup v1: a quota of -1 without a limit
+    quota = _read(os.path.join(cgroup_root, "cpu", "cpu.cfs_quota_us"))
+    period = _read(os.path.join(cgroup_root, "cpu", "cpu.cfs_period_us"))
+    if quota is None or period is None or int(quota) <= 0:
+        return None
+    return int(quota) / int(period)
+
+
+def available_cpus(cgroup_root: str = CGROUP_ROOT) -> float:
+    """The CPUs the process may run on, the least of its affinity and of its cgroup quota."""
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    quota = cpu_quota(cgroup_root)
+    return min(cpus, quota) if quota is not None else cpus
+
+
+def worker_count(cpus: float, per_cpu: float = 1, maximum: int | None = None) -> int:
+    """
+    Worker processes for a number of CPUs, a fractional quota counting as a CPU.
+
+    Args:
+        cpus (float): Available CPUs, see `available_cpus`.
+        per_cpu (float): Workers per CPU.
+        maximum (int | None): Upper bound of the count.
+
+    Returns:
+        int: At least one worker.
+    """
+    count = max(1, math.ceil(cpus * per_cpu))
+    return min(count, maximum) if maximum else count
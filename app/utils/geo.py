@@ -0,0 +1,153 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+# Of latitude, on the sphere `haversine_km` measures, so boxes built with it contain its circles
+KM_PER_DEGREE = math.radians(1) * EARTH_RADIUS_KM
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Upper bound of every geohash sharing a prefix: `prefix + _GEOHASH_UPPER_BOUND`
+# sorts after all of them since "{" follows "z" in ASCII.
+_GEOHASH_UPPER_BOUND = "{"
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = 8) -> str:
+    """
+    Encodes a coordinate as a geohash. Nearby points share long prefixes, which
+    makes a plain string index usable for proximity lookups.
+
+    Args:
+        latitude (float): Latitude in decimal degrees.
+        longitude (float): Longitude in decimal degrees.
+        precision (int): Number of characters of the geohash.
+
+    Returns:
+        str: The geohash of the cell containing the coordinate.
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(geohash) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lon_range[0] = mid
+            else:
+                bits <<= 1
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(_GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(geohash)
+
+
+def geohash_cell_size(precision: int) -> tuple[float, float]:
+    """
+    Returns the (height, width) in degrees of a geohash cell of the given precision.
+    """
+    total_bits = precision * 5
+    lat_bits = total_bits // 2
+    lon_bits = total_bits - lat_bits
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Returns the great circle distance in kilometers between two coordinates.
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> tuple[float, float, float, float]:
+    """
+    Returns the (min_lat, min_lon, max_lat, max_lon) box enclosing a circle.
+    Longitudes are wrapped into [-180, 180], so min_lon > max_lon when the box
+    crosses the antimeridian.
+    """
+    lat_delta = radius_km / KM_PER_DEGREE
+    min_lat = max(-90.0, latitude - lat_delta)
+    max_lat = min(90.0, latitude + lat_delta)
+
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if cos_lat <= 1e-9 or radius_km / (KM_PER_DEGREE * cos_lat) >= 180:
+        return min_lat, -180.0, max_lat, 180.0
+
+    lon_delta = radius_km / (KM_PER_DEGREE * cos_lat)
+    return min_lat, _wrap_longitude(longitude - lon_delta), max_lat, _wrap_longitude(longitude + lon_delta)
+
+
+def covering_geohashes(
+    latitude: float, longitude: float, radius_km: float, max_precision: int = 8, max_cells: int = 32
+) -> list[str]:
+    """
+    Returns geohash prefixes whose cells together cover the circle of `radius_km`
+    around the coordinate. The finest precision for which the cells overlapping
+    the circle's bounding box number at most `max_cells` is used, so the cover
+    stays close to the circle's area while keeping the query short.
+
+    Returns:
+        list[str]: The prefixes, or an empty list when the circle is too large
+        for a geohash cover and callers should fall back to a bounding box.
+    """
+    min_lat, min_lon, max_lat, max_lon = bounding_box(latitude, longitude, radius_km)
+    if max_lon < min_lon:
+        max_lon += 360.0
+
+    for precision in range(max_precision, 0, -1):
+        height, width = geohash_cell_size(precision)
+        lat_cells = int(180.0 / height)
+        lon_cells = int(360.0 / width)
+        first_row = int((min_lat + 90.0) / height)
+        last_row = min(int((max_lat + 90.0) / height), lat_cells - 1)
+        first_column = int((min_lon + 180.0) / width)
+        last_column = int((max_lon + 180.0) / width)
+        if (last_row - first_row + 1) * (last_column - first_column + 1) > max_cells:
+            continue
+        if last_column - first_column + 1 >= lon_cells:
+            return []
+
+        prefixes = set()
+        for row in range(first_row, last_row + 1):
+            cell_lat = -90.0 + (row + 0.5) * height
+            for column in range(first_column, last_column + 1):
+                cell_lon = -180.0 + ((column % lon_cells) + 0.5) * width
+                prefixes.add(encode_geohash(cell_lat, cell_lon, precision))
+        return sorted(prefixes)
+
+    return []
+
+
+def geohash_prefix_range(prefix: str) -> tuple[str, str]:
+    """
+    Returns the half open [lower, upper) string range holding every geohash
+    that starts with `prefix`, which an ordinary B-tree index can scan.
+    """
+    return prefix, prefix + _GEOHASH_UPPER_BOUND
+
+
+def _wrap_longitude(longitude: float) -> float:
+    if -180.0 <= longitude <= 180.0:
+        return longitude
+    return ((longitude + 180.0) % 360.0) - 180.0
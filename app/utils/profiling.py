@@ -0,0 +1,253 @@
+"""
+Statistical profiling of single requests.
+
+`StackSampler` reads the stacks of every thread of the worker at a fixed interval
+while a request runs. Only the stacks running application code are attributed to
+the profile, so idle threads and the idle event loop are left out; requests served
+concurrently by the same worker can show up in the profile too.
+
+Profiles are kept in a bounded `ProfileStore`, in the memory of the worker, or in
+a `DirectoryProfileStore` shared by the workers of the server, and exported as
+collapsed stacks (flame graph tools) or speedscope JSON (https://speedscope.app).
+"""
+import contextlib
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from collections import deque
+from dataclasses import dataclass
+from dataclasses import field
+from types import FrameType
+
+import orjson
+
+# Frames of files below this directory are application code
+APP_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_BASE_DIRECTORY = os.path.dirname(APP_DIRECTORY)
+# Starts the server: its frames are below those of every thread of a worker
+_SERVER_FILE = os.path.join(APP_DIRECTORY, "server.py")
+
+# A frame: qualified name, file relative to the project and first line of the function
+Frame = tuple[str, str, int]
+Stack = tuple[Frame, ...]
+
+
+class StackSampler:
+    """Samples the stacks of the threads of the process in a background thread, from `start` to `stop`."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.stacks: Counter[Stack] = Counter()
+        self.idle_samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter[Stack]:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = _stack(frame)
+                if stack is None:
+                    self.idle_samples += 1
+                else:
+                    self.stacks[stack] += 1
+
+
+def _stack(frame: FrameType) -> Stack | None:
+    """
+    The stack of `frame`, outermost first, or None when no frame runs application code.
+
+    The outermost frame, the script which was run, and the frames of the server are not
+    application code: they are below the idle event loop too.
+    """
+    frames: list[Frame] = []
+    in_app = False
+    while frame is not None:
+        code = frame.f_code
+        if frame.f_back is not None and code.co_filename != _SERVER_FILE:
+            in_app = in_app or code.co_filename.startswith(APP_DIRECTORY)
+        frames.append((code.co_qualname, os.path.relpath(code.co_filename, _BASE_DIRECTORY), code.co_firstlineno))
+        frame = frame.f_back
+    if not in_app:
+        return None
+    frames.reverse()
+    return tuple(frames)
+
+
+@dataclass(slots=True)
+class Profile:
+    """The stacks sampled while a request ran."""
+
+    method: str
+    path: str
+    interval: float
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    started_at: float = field(default_factory=time.time)
+    route: str | None = None
+    status_code: int | None = None
+    duration: float = 0.0
+    idle_samples: int = 0
+    stacks: Counter = field(default_factory=Counter)
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status_code": self.status_code,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "interval_ms": round(self.interval * 1000, 3),
+            "samples": self.samples,
+            "idle_samples": self.idle_samples,
+        }
+
+    def collapsed(self) -> str:
+        """One line per distinct stack: frames from the outermost, separated by `;`, then the sample count."""
+        lines = [
+            ";".join(_frame_name(frame) for frame in stack) + f" {count}"
+            for stack, count in self.stacks.most_common()
+        ]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def speedscope(self) -> dict:
+        """The profile in the speedscope file format, as a sampled profile weighted in seconds."""
+        frame_indexes: dict[Frame, int] = {}
+        samples, weights = [], []
+        for stack, count in self.stacks.items():
+            samples.append([frame_indexes.setdefault(frame, len(frame_indexes)) for frame in stack])
+            weights.append(count * self.interval)
+        name = f"{self.method} {self.route or self.path}"
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "app.utils.profiling",
+            "activeProfileIndex": 0,
+            "shared": {
+                "frames": [
+                    {"name": qualname, "file": filename, "line": line}
+                    for qualname, filename, line in frame_indexes
+                ]
+            },
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+
+def _frame_name(frame: Frame) -> str:
+    qualname, filename, line = frame
+    return f"{qualname} ({filename}:{line})"
+
+
+class ProfileStore:
+    """The latest `max_profiles` profiles, the oldest are dropped first."""
+
+    def __init__(self, max_profiles: int) -> None:
+        self._lock = threading.Lock()
+        self._profiles: deque[Profile] = deque(maxlen=max_profiles)
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def get(self, profile_id: str) -> Profile | None:
+        with self._lock:
+            return next((profile for profile in self._profiles if profile.id == profile_id), None)
+
+    def summaries(self) -> list[dict]:
+        """Summaries of the stored profiles, the latest first."""
+        with self._lock:
+            return [profile.summary() for profile in reversed(self._profiles)]
+
+
+class DirectoryProfileStore(ProfileStore):
+    """
+    The latest `max_profiles` profiles, as files of a directory shared by the workers,
+    so any of them serves the profiles of the others.
+    """
+
+    _ID = re.compile(r"[0-9a-f]{12}")
+
+    def __init__(self, max_profiles: int, directory: str) -> None:
+        super().__init__(max_profiles)
+        self.max_profiles = max_profiles
+        self.directory = directory
+
+    def add(self, profile: Profile) -> None:
+        document = {name: getattr(profile, name) for name in Profile.__slots__ if name != "stacks"}
+        document["stacks"] = [[stack, count] for stack, count in profile.stacks.items()]
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(profile.id)
+        # Renamed once written, the other workers never read part of a profile
+        with open(f"{path}.tmp", "wb") as file:
+            file.write(orjson.dumps(document))
+        os.replace(f"{path}.tmp", path)
+        for stale in self._paths()[self.max_profiles:]:
+            # Unless another worker removed it already
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(stale)
+
+    def get(self, profile_id: str) -> Profile | None:
+        if not self._ID.fullmatch(profile_id):
+            return None
+        return self._load(self._path(profile_id))
+
+    def summaries(self) -> list[dict]:
+        profiles = (self._load(path) for path in self._paths()[:self.max_profiles])
+        return [profile.summary() for profile in profiles if profile is not None]
+
+    def _path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.json")
+
+    def _paths(self) -> list[str]:
+        """The paths of the stored profiles, the latest first."""
+        entries = []
+        try:
+            with os.scandir(self.directory) as scan:
+                for entry in scan:
+                    if entry.name.endswith(".json"):
+                        entries.append((entry.stat().st_mtime_ns, entry.path))
+        except FileNotFoundError:
+            pass  # No profile yet, or one removed while listing
+        return [path for _, path in sorted(entries, reverse=True)]
+
+    @staticmethod
+    def _load(path: str) -> Profile | None:
+        try:
+            with open(path, "rb") as file:
+                document = orjson.loads(file.read())
+        except FileNotFoundError:
+            return None
+        stacks = document.pop("stacks")
+        return Profile(
+            **document,
+            stacks=Counter({tuple(tuple(frame) for frame in stack): count for stack, count in stacks}),
+        )
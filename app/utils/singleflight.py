@@ -0,0 +1,95 @@
+import threading
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Callable
+from typing import Hashable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+groups: dict[str, "SingleFlight"] = {}
+
+
+@dataclass(slots=True)
+class _Call:
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Any = None
+    error: BaseException | None = None
+
+
+@dataclass(slots=True)
+class SingleFlightStats:
+    calls: int = 0
+    executions: int = 0
+    coalesced: int = 0
+    in_flight: int = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls within a worker: while a call for a
+    key is running, callers asking for the same key wait for it and share its
+    result (or its exception) instead of running it again. Nothing is kept
+    once the call returns, so this is not a cache.
+
+    Results are handed to every waiting caller, they must be treated as read-only.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self._stats = SingleFlightStats()
+        groups[name] = self
+
+    def do(self, key: Hashable, function: Callable[[], T]) -> T:
+        """
+        Runs `function` unless a call for `key` is already running in another
+        thread, in which case its result is awaited and returned.
+
+        Args:
+            key: Identifies the call, e.g. the query and its arguments.
+            function: Computes the result.
+
+        Returns:
+            The result of `function`.
+        """
+        with self._lock:
+            self._stats.calls += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self._stats.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._stats.executions += 1
+                self._stats.in_flight += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                self._stats.in_flight -= 1
+            call.done.set()
+        return call.result
+
+    def stats(self) -> SingleFlightStats:
+        with self._lock:
+            return SingleFlightStats(
+                calls=self._stats.calls,
+                executions=self._stats.executions,
+                coalesced=self._stats.coalesced,
+                in_flight=self._stats.in_flight,
+            )
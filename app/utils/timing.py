@@ -0,0 +1,161 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Iterator
+
+# Upper bounds of the latency buckets, in seconds, the last one catches everything above
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+@dataclass(slots=True)
+class RequestTimings:
+    """Durations of the phases of a request, in seconds, summed when a phase runs several times."""
+
+    started_at: float = field(default_factory=time.perf_counter)
+    route: str | None = None
+    phases: dict[str, float] = field(default_factory=dict)
+    counts: dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add(self, name: str, duration: float) -> None:
+        # Phases can be recorded from the threadpool while the request runs
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + duration
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+
+_current: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+def start_request() -> RequestTimings:
+    """Starts collecting the phases of the request running in the current context."""
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+def current_request() -> RequestTimings | None:
+    return _current.get()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Times a block as a phase of the current request. Phases are inclusive: a phase
+    running within another one, e.g. `db` within `auth.db`, is counted in both.
+    Outside a request, the block runs untimed.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def record_phase(name: str, duration: float) -> None:
+    """Adds a duration measured elsewhere, e.g. by engine events, to the current request."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, duration)
+
+
+class LatencyHistogram:
+    """Counts of observations per latency bucket, with their sum."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimates a quantile by linear interpolation within its bucket."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                if upper == float("inf"):
+                    return lower
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-2]
+
+    def snapshot(self) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            buckets["+Inf" if bound == float("inf") else f"{bound * 1000:g}"] = cumulative
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum * 1000, 3),
+            "mean_ms": round(self.sum * 1000 / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.5) * 1000, 3),
+            "p90_ms": round(self.quantile(0.9) * 1000, 3),
+            "p99_ms": round(self.quantile(0.99) * 1000, 3),
+            "buckets_ms": buckets,
+        }
+
+
+@dataclass(slots=True)
+class _RouteLatency:
+    total: LatencyHistogram = field(default_factory=LatencyHistogram)
+    phases: dict[str, LatencyHistogram] = field(default_factory=dict)
+
+
+class LatencyRegistry:
+    """In-memory latency histograms of a worker, per route and per phase of the route."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: dict[tuple[str, str], _RouteLatency] = {}
+
+    def observe(self, method: str, route: str, timings: RequestTimings, duration: float) -> None:
+        with self._lock:
+            latency = self._routes.get((method, route))
+            if latency is None:
+                latency = self._routes[(method, route)] = _RouteLatency()
+            latency.total.observe(duration)
+            for name, phase_duration in timings.phases.items():
+                histogram = latency.phases.get(name)
+                if histogram is None:
+                    histogram = latency.phases[name] = LatencyHistogram()
+                histogram.observe(phase_duration)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                f"{method} {route}": {
+                    **latency.total.snapshot(),
+                    "phases": {name: histogram.snapshot() for name, histogram in sorted(latency.phases.items())},
+                }
+                for (method, route), latency in sorted(self._routes.items())
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+latency_registry = LatencyRegistry()
@@ -0,0 +1,116 @@
+"""
+Nearest-incident lookup benchmark for AssistanceRepo.get_nearest_assistances.
+
+Seeds a SQLite database with synthetic assistances clustered around a few cities,
+then times "nearest open incident within R km" lookups from random positions.
+
+Usage:
+    python -m benchmarks.bench_geo_lookup --rows 1000000 --lookups 1000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from datetime import timezone
+
+from sqlmodel import Session
+from sqlmodel import SQLModel
+from sqlmodel import create_engine
+
+from app.data.assistance_repo import GEOHASH_PRECISION
+from app.data.assistance_repo import AssistanceRepo
+from app.data.models import Assistance
+from app.data.models import AssistanceStatusType
+from app.data.models import IncidentType
+from app.utils import geo
+
+CITIES = [(4.0511, 9.7679), (3.8480, 11.5021), (5.9631, 10.1591), (9.3017, 13.3921)]
+OPEN_RATIO = 0.05
+BATCH_SIZE = 50000
+
+
+def random_point(rng: random.Random) -> tuple[float, float]:
+    if rng.random() < 0.7:
+        latitude, longitude = rng.choice(CITIES)
+        return latitude + rng.gauss(0, 0.1), longitude + rng.gauss(0, 0.1)
+    return rng.uniform(2.0, 13.0), rng.uniform(8.5, 16.0)
+
+
+def seed(engine, rows: int, rng: random.Random) -> None:
+    now = datetime.now(timezone.utc)
+    table = Assistance.__table__
+    with engine.begin() as connection:
+        for start in range(0, rows, BATCH_SIZE):
+            batch = []
+            for _ in range(min(BATCH_SIZE, rows - start)):
+                latitude, longitude = random_point(rng)
+                batch.append({
+                    "external_reference": uuid.uuid4().hex,
+                    "is_deleted": False,
+                    "created_at": now,
+                    "last_updated": now,
+                    "user_id": rng.randint(1, 50000),
+                    "gps_latitude": latitude,
+                    "gps_longitude": longitude,
+                    "geohash": geo.encode_geohash(latitude, longitude, GEOHASH_PRECISION),
+                    "incident_type": IncidentType.Assistance,
+                    "status": AssistanceStatusType.OPEN if rng.random() < OPEN_RATIO else AssistanceStatusType.RESOLVED,
+                })
+            connection.execute(table.insert(), batch)
+
+
+def run(rows: int, lookups: int, radius_km: float, database: str) -> dict:
+    rng = random.Random(42)
+    engine = create_engine(f"sqlite:///{database}")
+    SQLModel.metadata.create_all(engine)
+
+    started = time.perf_counter()
+    seed(engine, rows, rng)
+    seed_seconds = time.perf_counter() - started
+
+    timings = []
+    found = 0
+    with Session(engine) as session:
+        repo = AssistanceRepo(session)
+        for _ in range(lookups):
+            latitude, longitude = random_point(rng)
+            started = time.perf_counter()
+            result = repo.get_nearest_assistances(
+                latitude, longitude, radius_km, statuses=[AssistanceStatusType.OPEN], limit=1
+            )
+            timings.append((time.perf_counter() - started) * 1000)
+            found += bool(result)
+            session.expunge_all()
+
+    timings.sort()
+    return {
+        "rows": rows,
+        "lookups": lookups,
+        "radius_km": radius_km,
+        "seed_seconds": round(seed_seconds, 2),
+        "hit_ratio": round(found / lookups, 3),
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+        "p99_ms": round(timings[int(len(timings) * 0.99) - 1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--radius-km", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        result = run(args.rows, args.lookups, args.radius_km, os.path.join(directory, "bench.db"))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
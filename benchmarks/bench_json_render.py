@@ -0,0 +1,117 @@
+"""
+Response rendering benchmark for a backoffice assistance list page.
+
+Builds a list of assistances with their user and images, then times the
+rendering paths a route can take:
+
+- stdlib: `jsonable_encoder` then the stdlib `JSONResponse` (the previous default)
+- schema_stdlib: `AssistanceListSchema` serialization then `JSONResponse`
+- schema_fast: `AssistanceListSchema` serialization then `FastJSONResponse`
+- schema_python_fast: `AssistanceListSchema` dumped to Python objects then
+  `FastJSONResponse`, as the backoffice list routes do
+- fast: `FastJSONResponse` on the plain rows (datetimes and enums left to orjson)
+
+Usage:
+    python -m benchmarks.bench_json_render --items 1000 --repeat 50
+"""
+import argparse
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.config.response import FastJSONResponse
+from app.data.backoffice.schemas import AssistanceListSchema
+from app.data.models import AssistanceStatusType
+from app.data.models import IncidentType
+
+
+def build_rows(items: int) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    rows = []
+    for index in range(items):
+        created_at = now - timedelta(minutes=index)
+        rows.append({
+            "id": index + 1,
+            "gps_latitude": 4.0511 + index * 1e-4,
+            "gps_longitude": 9.7679 - index * 1e-4,
+            "address_complement": f"Carrefour {index}",
+            "comment": "Pneu crevé sur la voie de droite",
+            "incident_type": IncidentType.Assistance if index % 3 else IncidentType.Accident,
+            "status": list(AssistanceStatusType)[index % 4],
+            "created_at": created_at,
+            "last_updated": created_at,
+            "user": {
+                "id": index % 50 + 1,
+                "external_reference": uuid.uuid4().hex,
+                "name": f"User {index % 50}",
+                "email": f"user{index % 50}@example.com",
+                "is_admin": False,
+                "profile_image_url": None,
+                "chassis_number": "1HGCM82633A004352",
+                "plate_number": "LT 308 X",
+                "created_at": created_at,
+                "last_updated": created_at,
+            },
+            "images": [{"image_url": f"https://storage.example.com/assistances/{uuid.uuid4().hex}.jpg"}] * 2,
+        })
+    return rows
+
+
+def time_path(render, repeat: int) -> dict:
+    timings = []
+    body = b""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = render()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "bytes": len(body),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rows = build_rows(args.items)
+    page = {"assistance": rows}
+
+    def schema_content():
+        return AssistanceListSchema.model_validate(page).model_dump(mode="json")
+
+    paths = {
+        "stdlib": lambda: JSONResponse(content=jsonable_encoder(page)).body,
+        "schema_stdlib": lambda: JSONResponse(content=schema_content()).body,
+        "schema_fast": lambda: FastJSONResponse(content=schema_content()).body,
+        "schema_python_fast": lambda: FastJSONResponse(
+            content=AssistanceListSchema.model_validate(page).model_dump()
+        ).body,
+        "fast": lambda: FastJSONResponse(content=page).body,
+    }
+    # Paths from the same content must produce the same document (pydantic
+    # writes UTC datetimes with a "Z" suffix, so both groups differ slightly)
+    assert json.loads(paths["fast"]()) == json.loads(paths["stdlib"]())
+    assert json.loads(paths["schema_fast"]()) == json.loads(paths["schema_stdlib"]())
+    assert json.loads(paths["schema_python_fast"]()) == json.loads(paths["stdlib"]())
+
+    results = {name: time_path(render, args.repeat) for name, render in paths.items()}
+    baseline = results["stdlib"]["median_ms"]
+    for result in results.values():
+        result["speedup"] = round(baseline / result["median_ms"], 2)
+
+    print(json.dumps({"items": args.items, "repeat": args.repeat, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
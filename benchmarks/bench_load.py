@@ -0,0 +1,324 @@
+"""
+End-to-end load test: boots the API with synthetic data and an in-memory object
+storage (see `benchmarks.load_server`), drives each scenario with concurrent HTTP
+clients for a fixed duration and reports the throughput and latency quantiles as
+JSON, to be compared between commits.
+
+Scenarios:
+    login_storm         POST /api/login with the seeded users
+    read_mix            authenticated reads: emergency contacts, FAQs and sync
+    signup_burst        POST /api/signup with fresh emails and free identifications
+    backoffice_paging   GET /bo/assistance and /bo/feedbacks, page after page, as the
+                        seeded admin
+    csv_import          POST /bo/identifications/upload-file with 100 rows CSV files,
+                        counted as errors while the endpoint is not implemented
+
+The database is a temporary SQLite file unless `--database-url` points at another
+one, e.g. an empty local Postgres database. The load generator runs in this process,
+with one connection per concurrent client.
+
+Usage:
+    python -m benchmarks.bench_load --users 1000 --assistances 5000 --concurrency 32 --duration 10 \\
+        --scenarios login_storm,read_mix --output load.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime
+from datetime import timezone
+from typing import Awaitable
+from typing import Callable
+
+import httpx
+
+from benchmarks.synthetic import PASSWORD
+from benchmarks.synthetic import SyntheticData
+
+CSV_ROWS = 100
+SERVER_START_TIMEOUT = 120  # seconds, seeding large databases takes a while
+
+
+@dataclass
+class LoadState:
+    """What the scenarios know of the seeded data, shared by the clients."""
+
+    data: SyntheticData
+    users: int
+    identifications: int
+    page_count: int
+    tokens: list[str] = field(default_factory=list)
+    admin_token: str | None = None
+    # Emails and identifications of this run, never seeded
+    sequence: itertools.count = field(default_factory=lambda: itertools.count(1))
+    run_id: str = field(default_factory=lambda: f"{time.time_ns():x}")
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    request: Callable[[httpx.AsyncClient, LoadState, random.Random], Awaitable[httpx.Response]]
+    expected_status: tuple[int, ...] = (200,)
+    authenticated: bool = False
+    admin: bool = False
+
+
+async def login(client: httpx.AsyncClient, state: LoadState, rng: random.Random) -> httpx.Response:
+    index = rng.randrange(state.users)
+    return await client.post("/api/login", json={"email": state.data.email(index), "password": PASSWORD})
+
+
+async def read_mix(client: httpx.AsyncClient, state: LoadState, rng: random.Random) -> httpx.Response:
+    headers = {"Authorization": f"Bearer {rng.choice(state.tokens)}"}
+    path = rng.choices(["/api/emergency-contacts", "/api/faqs", "/api/sync?limit=100"], weights=[5, 3, 2])[0]
+    return await client.get(path, headers=headers)
+
+
+async def signup(client: httpx.AsyncClient, state: LoadState, rng: random.Random) -> httpx.Response:
+    number = next(state.sequence)
+    # Identifications past the seeded users are free, they are reused once all were taken
+    free = max(state.identifications - state.users, 1)
+    identification = state.data.identification(state.users + number % free)
+    return await client.post(
+        "/api/signup",
+        json={
+            "name": f"Signup {number}",
+            "email": f"signup-{state.run_id}-{number}@load.test",
+            "password": PASSWORD,
+            "chassis_number": identification["chassis_number"],
+            "plate_number": identification["plate_number"],
+        },
+    )
+
+
+async def backoffice_paging(client: httpx.AsyncClient, state: LoadState, rng: random.Random) -> httpx.Response:
+    path = rng.choice(["/bo/assistance", "/bo/feedbacks"])
+    return await client.get(
+        path,
+        params={"offset": rng.randrange(state.page_count) * 30, "size": 30},
+        headers={"Authorization": f"Bearer {state.admin_token}"},
+    )
+
+
+async def csv_import(client: httpx.AsyncClient, state: LoadState, rng: random.Random) -> httpx.Response:
+    first = next(state.sequence) * CSV_ROWS
+    lines = ["chassis_number,plate_number,type"]
+    for index in range(first, first + CSV_ROWS):
+        # Far past the seeded identifications
+        identification = state.data.identification(10_000_000 + index)
+        lines.append(f"{identification['chassis_number']},{identification['plate_number']},{identification['type']}")
+    content = "\n".join(lines).encode("utf-8")
+    return await client.post("/bo/identifications/upload-file", files={"file": ("identifications.csv", content)})
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (
+        Scenario("login_storm", login),
+        Scenario("read_mix", read_mix, expected_status=(200, 304), authenticated=True),
+        Scenario("signup_burst", signup),
+        Scenario("backoffice_paging", backoffice_paging, admin=True),
+        Scenario("csv_import", csv_import),
+    )
+}
+
+
+def quantile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def run_scenario(
+    base_url: str, scenario: Scenario, state: LoadState, concurrency: int, duration: float, warmup: float, seed: int
+) -> dict:
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=60, limits=httpx.Limits(max_connections=concurrency)
+    ) as client:
+        if scenario.authenticated and not state.tokens:
+            await authenticate(client, state, count=min(concurrency, state.users - 1))
+        if scenario.admin:
+            # Just before, a login of the admin in another scenario would revoke the token
+            await authenticate_admin(client, state)
+
+        # Requests started within the measured window count, until they complete
+        measured_from = time.perf_counter() + warmup
+        deadline = measured_from + duration
+
+        async def worker(number: int) -> None:
+            rng = random.Random(f"{seed}:{scenario.name}:{number}")
+            while (start := time.perf_counter()) < deadline:
+                try:
+                    status = (await scenario.request(client, state, rng)).status_code
+                except httpx.HTTPError as error:
+                    status = type(error).__name__
+                if start >= measured_from:
+                    latencies.append(time.perf_counter() - start)
+                    statuses[status] += 1
+
+        await asyncio.gather(*(worker(number) for number in range(concurrency)))
+
+    elapsed = max(time.perf_counter() - measured_from, duration)
+    latencies.sort()
+    unexpected = sum(count for status, count in statuses.items() if status not in scenario.expected_status)
+    return {
+        "requests": len(latencies),
+        "errors": unexpected,
+        "rps": round(len(latencies) / elapsed, 2),
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            "p50": round(quantile(latencies, 0.50) * 1000, 3),
+            "p95": round(quantile(latencies, 0.95) * 1000, 3),
+            "p99": round(quantile(latencies, 0.99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+        "status": {str(status): count for status, count in sorted(statuses.items(), key=lambda item: str(item[0]))},
+    }
+
+
+async def authenticate(client: httpx.AsyncClient, state: LoadState, count: int) -> None:
+    # Past the admin, whose token the backoffice scenarios replace
+    for index in range(1, count + 1):
+        response = await client.post("/api/login", json={"email": state.data.email(index), "password": PASSWORD})
+        response.raise_for_status()
+        state.tokens.append(response.json()["access_token"])
+
+
+async def authenticate_admin(client: httpx.AsyncClient, state: LoadState) -> None:
+    response = await client.post("/bo/login", json={"email": state.data.email(0), "password": PASSWORD})
+    response.raise_for_status()
+    state.admin_token = response.json()["access_token"]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, database_url: str, port: int, log_path: str) -> subprocess.Popen:
+    environment = {
+        "SERVER_NAME": "load-test",
+        "SERVER_HOST": "127.0.0.1",
+        "SECRET_KEY": "load-test-secret",
+        "ENVIRONMENT": "prod",
+        **os.environ,
+        "SERVER_PORT": str(port),
+        "SQLALCHEMY_DATABASE_URI": database_url,
+    }
+    command = [
+        sys.executable, "-m", "benchmarks.load_server",
+        "--port", str(port),
+        "--seed", str(args.seed),
+        "--users", str(args.users),
+        "--identifications", str(args.identifications),
+        "--assistances", str(args.assistances),
+    ]
+    with open(log_path, "wb") as log:
+        return subprocess.Popen(command, env=environment, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_until_ready(server: subprocess.Popen, base_url: str, log_path: str) -> None:
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            with open(log_path) as log:
+                raise RuntimeError(f"The server exited with {server.returncode}:\n{log.read()[-4000:]}")
+        try:
+            if httpx.get(f"{base_url}/bo/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"The server did not answer within {SERVER_START_TIMEOUT} seconds")
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma separated scenario names")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--identifications", type=int, default=2000)
+    parser.add_argument("--assistances", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10, help="Seconds measured per scenario")
+    parser.add_argument("--warmup", type=float, default=2, help="Seconds run before measuring")
+    parser.add_argument("--database-url", help="Defaults to a temporary SQLite file")
+    parser.add_argument("--output", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    scenarios = [SCENARIOS[name] for name in args.scenarios.split(",")]
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = args.database_url or f"sqlite:///{directory}/load.db"
+        log_path = os.path.join(directory, "server.log")
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(args, database_url, port, log_path)
+        try:
+            wait_until_ready(server, base_url, log_path)
+            state = LoadState(
+                data=SyntheticData(args.seed),
+                users=args.users,
+                identifications=args.identifications,
+                page_count=max(args.assistances // 30, 1),
+            )
+            results = {
+                scenario.name: asyncio.run(
+                    run_scenario(
+                        base_url, scenario, state, args.concurrency, args.duration, args.warmup, args.seed
+                    )
+                )
+                for scenario in scenarios
+            }
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "database": database_url.split(":", 1)[0],
+        "parameters": {
+            "users": args.users,
+            "identifications": args.identifications,
+            "assistances": args.assistances,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "seed": args.seed,
+        },
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Read model benchmark: `dict(ORM instance)` against column projections.
+
+Seeds a SQLite database with users and emergency contacts, then measures the
+time and the memory allocated by the read paths of the repositories, once by
+loading full SQLModel rows and copying them with `dict()` (the previous
+implementation) and once through the projected read models.
+
+Usage:
+    python -m benchmarks.bench_read_models --users 1000 --contacts 1000 --repeat 20
+"""
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+
+from sqlmodel import Session
+from sqlmodel import SQLModel
+from sqlmodel import create_engine
+from sqlmodel import select
+
+from app.data.models import EmergencyContact
+from app.data.models import User
+from app.data.read_models import EmergencyContactRecord
+from app.data.read_models import UserRecord
+from app.data.read_models import select_read_model
+
+
+def seed(session: Session, users: int, contacts: int) -> list[str]:
+    session.add_all(
+        User(name=f"User {index}", email=f"user{index}@example.com", password=b"$2b$12$" + b"x" * 53)
+        for index in range(users)
+    )
+    session.add_all(EmergencyContact(name=f"Contact {index}", number=f"{index:06d}") for index in range(contacts))
+    session.commit()
+    return list(session.exec(select(User.external_reference)).all())
+
+
+def orm_user_lookups(session: Session, ref_keys: list[str]):
+    for ref_key in ref_keys:
+        record = session.exec(select(User).where(User.external_reference == ref_key)).one_or_none()
+        dict(record)
+    # The repositories share a session per request, the identity map is not reused across requests
+    session.expunge_all()
+
+
+def projected_user_lookups(session: Session, ref_keys: list[str]):
+    for ref_key in ref_keys:
+        row = session.exec(select_read_model(UserRecord, User).where(User.external_reference == ref_key)).one_or_none()
+        UserRecord(*row)
+
+
+def orm_contacts(session: Session):
+    exclude = ["external_reference", "is_deleted", "created_at", "last_updated", "deleted_at"]
+    records = session.exec(select(EmergencyContact).where(EmergencyContact.is_deleted == False)).all()
+    contacts = [{k: v for k, v in dict(record).items() if k not in exclude} for record in records]
+    session.expunge_all()
+    return contacts
+
+
+def projected_contacts(session: Session):
+    rows = session.exec(
+        select_read_model(EmergencyContactRecord, EmergencyContact).where(EmergencyContact.is_deleted == False)
+    ).all()
+    return [EmergencyContactRecord(*row) for row in rows]
+
+
+def measure(function, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"median_ms": round(statistics.median(timings), 3), "peak_kib": round(peak / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--contacts", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        ref_keys = seed(session, args.users, args.contacts)
+
+        cases = {
+            "user_lookups": {
+                "orm_dict": lambda: orm_user_lookups(session, ref_keys),
+                "projection": lambda: projected_user_lookups(session, ref_keys),
+            },
+            "contact_list": {
+                "orm_dict": lambda: orm_contacts(session),
+                "projection": lambda: projected_contacts(session),
+            },
+        }
+
+        results = {}
+        for case, paths in cases.items():
+            results[case] = {name: measure(function, args.repeat) for name, function in paths.items()}
+            orm, projection = results[case]["orm_dict"], results[case]["projection"]
+            results[case]["speedup"] = round(orm["median_ms"] / projection["median_ms"], 2)
+            results[case]["peak_memory_ratio"] = round(orm["peak_kib"] / projection["peak_kib"], 2)
+
+    print(json.dumps({"users": args.users, "contacts": args.contacts, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Repository microbenchmarks: times the methods of `UserRepo`, `AssistanceRepo` and
+the backoffice `IdentificationRepo` one call at a time, on SQLite databases seeded
+with a growing number of rows, in memory and in a file.
+
+Each table is seeded with `size` rows (see `benchmarks.seeding`), every call runs
+in its own session as it would in a request. The scaling exponent of a method is
+the slope of its median call time against the size on a log-log scale: about 0
+for index lookups, 1 for full scans, above 1 for methods degrading superlinearly.
+Lookups returning more rows as the data grows (the radius queries, the data
+covering a fixed area) are output sensitive, their mean row count is reported.
+
+Usage:
+    python -m benchmarks.bench_repos --sizes 10000,100000,1000000 --databases memory,file --calls 200
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any
+from typing import Callable
+
+from sqlalchemy import Engine
+from sqlalchemy import StaticPool
+from sqlalchemy import func
+from sqlmodel import Session
+from sqlmodel import SQLModel
+from sqlmodel import create_engine
+from sqlmodel import select
+
+from app.data.assistance_repo import AssistanceRepo
+from app.data.backoffice.identification_repo import IdentificationRepo
+from app.data.models import IdentificationDetails
+from app.data.models import IncidentType
+from app.data.models import User
+from app.data.user_repo import UserRepo
+from app.utils import geo
+from benchmarks.seeding import seed
+from benchmarks.synthetic import SyntheticData
+
+# Scaling exponents above this are reported as superlinear
+SUPERLINEAR_EXPONENT = 1.1
+SAMPLE_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class Fixture:
+    """What the operations know of a seeded database."""
+
+    size: int
+    data: SyntheticData
+    ref_keys: list[str]
+    user_ids: list[int]
+
+
+@dataclass(frozen=True)
+class Operation:
+    name: str
+    repo: Callable[[Session], Any]
+    call: Callable[[Any, Fixture, random.Random], Any]
+
+
+def _point(fixture: Fixture, rng: random.Random) -> tuple[float, float]:
+    return fixture.data.gps_point(rng=rng)
+
+
+def _validate_identification(repo: UserRepo, fixture: Fixture, rng: random.Random):
+    identification = fixture.data.identification(rng.randrange(fixture.size))
+    return repo.validate_identification_information(
+        chassis_number=identification["chassis_number"], plate_number=identification["plate_number"]
+    )
+
+
+def _fresh_identifications(fixture: Fixture, rng: random.Random, count: int) -> list[IdentificationDetails]:
+    # Past the seeded indexes, so none is a duplicate
+    first = fixture.size + rng.randrange(10_000_000)
+    return [IdentificationDetails(**fixture.data.identification(index)) for index in range(first, first + count)]
+
+
+def _save_identifications(repo: IdentificationRepo, fixture: Fixture, rng: random.Random) -> int:
+    # The repository prints every lookup
+    with contextlib.redirect_stdout(io.StringIO()):
+        return repo.save_identification_details(_fresh_identifications(fixture, rng, 10))
+
+
+OPERATIONS = (
+    Operation(
+        "UserRepo.get_user_from_email",
+        UserRepo,
+        lambda repo, fixture, rng: repo.get_user_from_email(fixture.data.email(rng.randrange(fixture.size))),
+    ),
+    Operation(
+        "UserRepo.get_user_from_ref_key",
+        UserRepo,
+        lambda repo, fixture, rng: repo.get_user_from_ref_key(rng.choice(fixture.ref_keys)),
+    ),
+    Operation("UserRepo.validate_identification_information", UserRepo, _validate_identification),
+    Operation(
+        "UserRepo.create_user",
+        UserRepo,
+        lambda repo, fixture, rng: repo.create_user(
+            email=f"bench-{rng.getrandbits(64):x}@load.test", name="Bench", password=b"x"
+        ),
+    ),
+    Operation(
+        "AssistanceRepo.get_assistances_within_radius",
+        AssistanceRepo,
+        lambda repo, fixture, rng: repo.get_assistances_within_radius(*_point(fixture, rng), radius_km=1, limit=50),
+    ),
+    Operation(
+        "AssistanceRepo.get_nearest_assistances",
+        AssistanceRepo,
+        lambda repo, fixture, rng: repo.get_nearest_assistances(*_point(fixture, rng), max_radius_km=20, limit=5),
+    ),
+    Operation(
+        "AssistanceRepo.get_assistances_in_bounding_box",
+        AssistanceRepo,
+        lambda repo, fixture, rng: repo.get_assistances_in_bounding_box(
+            *geo.bounding_box(*_point(fixture, rng), 1), limit=50
+        ),
+    ),
+    Operation(
+        "AssistanceRepo.create_incidence_record",
+        AssistanceRepo,
+        lambda repo, fixture, rng: repo.create_incidence_record(
+            rng.choice(fixture.user_ids), *_point(fixture, rng), "", "Bench", IncidentType.Assistance, None
+        ),
+    ),
+    Operation(
+        "IdentificationRepo.get_identification_from_chassis_number",
+        IdentificationRepo,
+        lambda repo, fixture, rng: repo.get_identification_from_chassis_number(
+            fixture.data.chassis_number(rng.randrange(fixture.size))
+        ),
+    ),
+    Operation(
+        "IdentificationRepo.get_identification_from_plate_number",
+        IdentificationRepo,
+        lambda repo, fixture, rng: repo.get_identification_from_plate_number(
+            fixture.data.plate_number(rng.randrange(fixture.size))
+        ),
+    ),
+    Operation(
+        "IdentificationRepo.get_identification_details",
+        IdentificationRepo,
+        # A random page, deep pages included
+        lambda repo, fixture, rng: repo.get_identification_details(offset=rng.randrange(fixture.size), limit=30),
+    ),
+    Operation("IdentificationRepo.save_identification_details", IdentificationRepo, _save_identifications),
+)
+
+
+def make_engine(database: str, directory: str, size: int) -> Engine:
+    if database == "memory":
+        # One connection, an in-memory database lives as long as its connection
+        return create_engine("sqlite://", poolclass=StaticPool)
+    return create_engine(f"sqlite:///{os.path.join(directory, f'repos-{size}.db')}")
+
+
+def prepare(engine: Engine, size: int, seed_value: int) -> Fixture:
+    data = SyntheticData(seed_value)
+    SQLModel.metadata.create_all(engine)
+    seed(engine, data, users=size, identifications=size, assistances=size, feedbacks=0)
+    with Session(engine) as session:
+        ref_keys = list(
+            session.exec(select(User.external_reference).order_by(func.random()).limit(SAMPLE_SIZE)).all()
+        )
+        user_ids = list(session.exec(select(User.id).limit(SAMPLE_SIZE)).all())
+    return Fixture(size=size, data=data, ref_keys=ref_keys, user_ids=user_ids)
+
+
+def measure(engine: Engine, operation: Operation, fixture: Fixture, calls: int, seed_value: int) -> dict:
+    rng = random.Random(f"{seed_value}:{operation.name}")
+    timings, rows = [], []
+    for _ in range(calls):
+        with Session(engine) as session:
+            repo = operation.repo(session)
+            start = time.perf_counter()
+            result = operation.call(repo, fixture, rng)
+            timings.append(time.perf_counter() - start)
+        if isinstance(result, list):
+            rows.append(len(result))
+
+    timings.sort()
+    measurement = {
+        "median_us": round(statistics.median(timings) * 1e6, 1),
+        "p95_us": round(timings[min(len(timings) - 1, int(0.95 * len(timings)))] * 1e6, 1),
+    }
+    if rows:
+        measurement["mean_rows"] = round(statistics.mean(rows), 1)
+    return measurement
+
+
+def scaling(sizes: list[int], medians: list[float]) -> dict:
+    """Fits `median = a * size ^ exponent` by least squares on the logarithms."""
+    if len(sizes) < 2:
+        return {"exponent": None, "growth": None, "superlinear": None}
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(median, 1e-3)) for median in medians]
+    mean_x, mean_y = statistics.mean(xs), statistics.mean(ys)
+    exponent = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sum((x - mean_x) ** 2 for x in xs)
+    return {
+        "exponent": round(exponent, 3),
+        # How many times slower a call is on the largest database than on the smallest
+        "growth": round(medians[-1] / medians[0], 2),
+        "superlinear": exponent > SUPERLINEAR_EXPONENT,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000", help="Comma separated row counts")
+    parser.add_argument("--databases", default="memory,file", help="Comma separated: memory, file")
+    parser.add_argument("--calls", type=int, default=200, help="Calls timed per method and size")
+    parser.add_argument("--operations", help="Only the methods whose name contains this text")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    operations = [operation for operation in OPERATIONS if not args.operations or args.operations in operation.name]
+    results: dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for database in args.databases.split(","):
+            curves: dict[str, dict[int, dict]] = {operation.name: {} for operation in operations}
+            seeding_seconds = {}
+            for size in sizes:
+                engine = make_engine(database, directory, size)
+                start = time.perf_counter()
+                fixture = prepare(engine, size, args.seed)
+                seeding_seconds[size] = round(time.perf_counter() - start, 2)
+                for operation in operations:
+                    curves[operation.name][size] = measure(engine, operation, fixture, args.calls, args.seed)
+                engine.dispose()
+
+            results[database] = {
+                "seeding_seconds": seeding_seconds,
+                "operations": {
+                    name: {"curve": points, **scaling(sizes, [points[size]["median_us"] for size in sizes])}
+                    for name, points in curves.items()
+                },
+            }
+
+    report = {"sizes": sizes, "calls": args.calls, "seed": args.seed, "results": results}
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
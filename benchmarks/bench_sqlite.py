@@ -0,0 +1,165 @@
+"""
+SQLite engine profiles compared: the SQLAlchemy defaults (rollback journal, no busy
+timeout, a pool of 5 connections and 10 overflowing) against the profile of
+`app.db.sqlite` (WAL, synchronous=NORMAL, busy timeout, mmap, larger cache, pool
+sized for the threadpool).
+
+Each profile gets its own SQLite file, seeded with `--rows` users, identifications
+and assistances (see `benchmarks.seeding`), then for every thread count:
+    reads   the threads look users up by email and assistances around a point
+            for `--duration` seconds, a session per lookup as in a request
+    mixed   the same while one more thread records assistances, each in its own
+            committed transaction, the write latency covering the commit
+
+Errors are the operations which failed, "database is locked" with the defaults.
+
+Usage:
+    python -m benchmarks.bench_sqlite --rows 100000 --threads 1,4,16 --duration 5
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Callable
+
+from sqlalchemy import Engine
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+from sqlmodel import SQLModel
+from sqlmodel import create_engine
+
+from app.data.assistance_repo import AssistanceRepo
+from app.data.models import IncidentType
+from app.data.user_repo import UserRepo
+from app.db.sqlite import SQLiteProfile
+from app.db.sqlite import apply_profile
+from app.db.sqlite import pool_options
+from benchmarks.seeding import seed
+from benchmarks.synthetic import SyntheticData
+
+
+def default_engine(path: str) -> Engine:
+    return create_engine(f"sqlite:///{path}")
+
+
+def tuned_engine(path: str) -> Engine:
+    profile = SQLiteProfile()
+    engine = create_engine(f"sqlite:///{path}", **pool_options(profile))
+    apply_profile(engine, profile)
+    return engine
+
+
+PROFILES: dict[str, Callable[[str], Engine]] = {"default": default_engine, "tuned": tuned_engine}
+
+
+def quantile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def read(engine: Engine, data: SyntheticData, rows: int, rng: random.Random) -> None:
+    with Session(engine) as session:
+        if rng.random() < 0.5:
+            UserRepo(session).get_user_from_email(data.email(rng.randrange(rows)))
+        else:
+            AssistanceRepo(session).get_assistances_within_radius(*data.gps_point(rng=rng), radius_km=1, limit=50)
+
+
+def write(engine: Engine, data: SyntheticData, user_ids: range, rng: random.Random) -> None:
+    with Session(engine) as session:
+        AssistanceRepo(session).create_incidence_record(
+            rng.choice(user_ids), *data.gps_point(rng=rng), "", "Bench", IncidentType.Assistance, None
+        )
+
+
+def run(engine: Engine, data: SyntheticData, rows: int, threads: int, duration: float, writer: bool) -> dict:
+    deadline = time.perf_counter() + duration
+    reads: Counter = Counter()
+    write_latencies: list[float] = []
+    errors: Counter = Counter()
+
+    def reader(number: int) -> None:
+        rng = random.Random(f"read:{number}")
+        while time.perf_counter() < deadline:
+            try:
+                read(engine, data, rows, rng)
+                reads[number] += 1
+            except OperationalError as error:
+                errors[str(error.orig)] += 1
+
+    def write_loop() -> None:
+        rng = random.Random("write")
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                write(engine, data, range(1, rows + 1), rng)
+                write_latencies.append(time.perf_counter() - start)
+            except OperationalError as error:
+                errors[str(error.orig)] += 1
+
+    workers = [threading.Thread(target=reader, args=(number,)) for number in range(threads)]
+    if writer:
+        workers.append(threading.Thread(target=write_loop))
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    result = {"reads_per_second": round(sum(reads.values()) / elapsed, 1), "errors": dict(errors)}
+    if writer:
+        write_latencies.sort()
+        result["writes_per_second"] = round(len(write_latencies) / elapsed, 1)
+        result["write_latency_ms"] = {
+            "p50": round(quantile(write_latencies, 0.50) * 1000, 3),
+            "p95": round(quantile(write_latencies, 0.95) * 1000, 3),
+            "p99": round(quantile(write_latencies, 0.99) * 1000, 3),
+            "mean": round(statistics.mean(write_latencies) * 1000, 3) if write_latencies else 0.0,
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="Users, identifications and assistances seeded")
+    parser.add_argument("--threads", default="1,4,16", help="Comma separated reader thread counts")
+    parser.add_argument("--duration", type=float, default=5, help="Seconds per measurement")
+    parser.add_argument("--profiles", default=",".join(PROFILES), help="Comma separated: default, tuned")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    data = SyntheticData(args.seed)
+    thread_counts = [int(count) for count in args.threads.split(",")]
+    results: dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name in args.profiles.split(","):
+            engine = PROFILES[name](os.path.join(directory, f"{name}.db"))
+            SQLModel.metadata.create_all(engine)
+            seed(engine, data, users=args.rows, identifications=args.rows, assistances=args.rows, feedbacks=0)
+            results[name] = {
+                str(threads): {
+                    "reads": run(engine, data, args.rows, threads, args.duration, writer=False),
+                    "mixed": run(engine, data, args.rows, threads, args.duration, writer=True),
+                }
+                for threads in thread_counts
+            }
+            engine.dispose()
+
+    report = {"rows": args.rows, "duration": args.duration, "seed": args.seed, "profiles": results}
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Startup benchmark: how long a new worker takes to import the app and to answer its
+first request, the time an autoscaled instance or a restarted worker is unavailable.
+
+Every measurement runs in a fresh interpreter:
+    import      `import main`, with the modules it left imported (the optional
+                backends should not be)
+    cold start  spawn of uvicorn to the first answer of /bo/health, on an empty
+                database the worker migrates
+    warm start  the same on the database the cold start left, with the migrations
+                left to the deployment as in the Docker image, as every later worker
+
+Runs the tree of `--app-dir`, so a checkout of an earlier commit (e.g. a
+`git worktree add /tmp/baseline HEAD~1`) can be measured the same way and compared.
+
+Usage:
+    python -m benchmarks.bench_startup --repeat 10 --output startup.json
+    python -m benchmarks.bench_startup --app-dir /tmp/baseline --repeat 10
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+# Modules only some deployments use, which importing the app should not import
+OPTIONAL_MODULES = ("google.cloud.storage", "alembic")
+START_TIMEOUT = 60  # seconds
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "imported": [name for name in %r if name in sys.modules]}))
+""" % (OPTIONAL_MODULES,)
+
+
+def environment(database_url: str, port: int = 9000, **overrides: str) -> dict[str, str]:
+    return {
+        "SERVER_NAME": "startup-benchmark",
+        "SERVER_HOST": "127.0.0.1",
+        "SECRET_KEY": "startup-benchmark-secret",
+        "ENVIRONMENT": "prod",
+        **os.environ,
+        "SERVER_PORT": str(port),
+        "SQLALCHEMY_DATABASE_URI": database_url,
+        **overrides,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import(app_dir: str, database_url: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE],
+        cwd=app_dir,
+        env=environment(database_url),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure_start(app_dir: str, database_url: str, migrate: bool) -> float:
+    """Seconds from the spawn of a uvicorn worker to its first successful answer."""
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=app_dir,
+        # Ignored by the trees creating the tables on import
+        env=environment(database_url, port, DATABASE_MIGRATE_ON_STARTUP=str(migrate).lower()),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1) as client:
+            while time.perf_counter() - start < START_TIMEOUT:
+                if server.poll() is not None:
+                    raise RuntimeError(f"The server exited with {server.returncode}:\n{server.stderr.read().decode()}")
+                try:
+                    if client.get("/bo/health").status_code == 200:
+                        return time.perf_counter() - start
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.005)
+        raise TimeoutError(f"The server did not answer within {START_TIMEOUT} seconds")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def summary(seconds: list[float]) -> dict:
+    return {
+        "median_ms": round(statistics.median(seconds) * 1000, 1),
+        "min_ms": round(min(seconds) * 1000, 1),
+        "max_ms": round(max(seconds) * 1000, 1),
+    }
+
+
+def git_commit(app_dir: str) -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=app_dir, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", default=os.getcwd(), help="The tree to measure, the current one by default")
+    parser.add_argument("--repeat", type=int, default=5, help="Measurements of each kind")
+    parser.add_argument("--output", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    app_dir = os.path.abspath(args.app_dir)
+    imports, cold, warm = [], [], []
+    imported: set[str] = set()
+    with tempfile.TemporaryDirectory() as directory:
+        for run in range(args.repeat):
+            # Trees creating the tables on import would leave no empty database to the cold start
+            probe = measure_import(app_dir, f"sqlite:///{directory}/import-{run}.db")
+            database_url = f"sqlite:///{directory}/startup-{run}.db"
+            imports.append(probe["seconds"])
+            imported.update(probe["imported"])
+            cold.append(measure_start(app_dir, database_url, migrate=True))
+            warm.append(measure_start(app_dir, database_url, migrate=False))
+
+    report = {
+        "commit": git_commit(app_dir),
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "import": {**summary(imports), "optional_modules_imported": sorted(imported)},
+        "cold_start": summary(cold),
+        "warm_start": summary(warm),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+The API as served to the load tests: seeds the configured database with synthetic
+data, replaces the object storage with an in-memory stand-in, then runs uvicorn.
+
+Started by `benchmarks.bench_load`, which passes the database and the server
+settings through the environment.
+
+Usage:
+    python -m benchmarks.load_server --port 8765 --users 1000 --identifications 2000 --assistances 5000
+"""
+import argparse
+
+import uvicorn
+
+from app.controller.dependencies import get_storage
+from app.db.database import engine
+from app.db.migrations import upgrade_database
+from app.domain.storage import StorageBase
+from benchmarks.seeding import seed
+from benchmarks.synthetic import SyntheticData
+from main import app
+
+
+class MemoryStorage(StorageBase):
+    """Object storage kept in memory, so uploads and signed URLs cost no network round trip."""
+
+    def __init__(self) -> None:
+        self.blobs: dict[tuple[str, str], bytes] = {}
+
+    def upload_file(self, bucket_name: str, source_file_path: str, destination_blob_name: str):
+        with open(source_file_path, "rb") as file:
+            self.upload_bytes(bucket_name, file.read(), destination_blob_name)
+
+    def upload_bytes(self, bucket_name: str, data: bytes, destination_blob_name: str) -> None:
+        self.blobs[(bucket_name, destination_blob_name)] = data
+
+    def blob_exists(self, bucket_name: str, blob_name: str) -> bool:
+        return (bucket_name, blob_name) in self.blobs
+
+    def generate_download_urls(self, bucket_name: str, prefix: str, expiration: int):
+        return [
+            self.generate_download_url(bucket_name, name, expiration)
+            for bucket, name in self.blobs
+            if bucket == bucket_name and name.startswith(prefix)
+        ]
+
+    def generate_download_url(self, bucket_name: str, blob_name: str, expiration: int) -> str:
+        return f"memory://{bucket_name}/{blob_name}?expires={expiration}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--identifications", type=int, default=2000)
+    parser.add_argument("--assistances", type=int, default=5000)
+    args = parser.parse_args()
+
+    # Before the lifespan would, the tables are seeded first
+    upgrade_database()
+    seed(engine, SyntheticData(args.seed), args.users, args.identifications, args.assistances)
+    storage = MemoryStorage()
+    app.dependency_overrides[get_storage] = lambda: storage
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Bulk seeding of a database with the synthetic data of `benchmarks.synthetic`.
+
+Rows are inserted with executemany in batches, bypassing the ORM, so seeding a
+million rows takes seconds rather than minutes.
+"""
+import itertools
+import random
+import uuid
+from datetime import datetime
+from datetime import timezone
+from typing import Iterable
+
+import bcrypt
+from sqlalchemy import Engine
+from sqlalchemy import insert
+from sqlalchemy import select
+
+from app.data.assistance_repo import GEOHASH_PRECISION
+from app.data.models import Assistance
+from app.data.models import AssistanceStatusType
+from app.data.models import EmergencyContact
+from app.data.models import Faq
+from app.data.models import Feedback
+from app.data.models import IdentificationDetails
+from app.data.models import IncidentType
+from app.data.models import User
+from app.utils import geo
+from benchmarks.synthetic import PASSWORD
+from benchmarks.synthetic import SyntheticData
+
+BATCH_SIZE = 5000
+
+
+def _base_row() -> dict:
+    # Bulk inserts skip the model defaults
+    now = datetime.now(timezone.utc)
+    return {"external_reference": uuid.uuid4().hex, "is_deleted": False, "created_at": now, "last_updated": now}
+
+
+def _insert(engine: Engine, model, rows: Iterable[dict]) -> None:
+    rows = iter(rows)
+    with engine.begin() as connection:
+        while batch := list(itertools.islice(rows, BATCH_SIZE)):
+            connection.execute(insert(model), batch)
+
+
+def seed(
+    engine: Engine,
+    data: SyntheticData,
+    users: int,
+    identifications: int,
+    assistances: int,
+    feedbacks: int | None = None,
+) -> None:
+    """
+    Seeds `users` users, registered with the identifications of the same indexes and
+    the first one an admin,
+    `identifications` identifications in total, the ones past the users being free
+    for signups, and `assistances` assistances and `feedbacks` feedbacks, as many as
+    the assistances by default, spread over the users.
+    """
+    # Hashing once, every user shares the password
+    password = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt())
+    _insert(
+        engine,
+        IdentificationDetails,
+        ({**_base_row(), **data.identification(index)} for index in range(max(identifications, users))),
+    )
+    _insert(
+        engine,
+        User,
+        (
+            {
+                **_base_row(),
+                "name": data.name(index),
+                "email": data.email(index),
+                "password": password,
+                # The backoffice scenarios log in as the first user
+                "is_admin": index == 0,
+                "chassis_number": data.chassis_number(index),
+                "plate_number": data.plate_number(index),
+            }
+            for index in range(users)
+        ),
+    )
+    with engine.connect() as connection:
+        user_ids = list(connection.execute(select(User.id)).scalars())
+
+    rng = random.Random(data.seed)
+    statuses = list(AssistanceStatusType)
+    incident_types = list(IncidentType)
+    _insert(
+        engine,
+        Assistance,
+        (
+            {
+                **_base_row(),
+                "user_id": rng.choice(user_ids) if user_ids else None,
+                "gps_latitude": latitude,
+                "gps_longitude": longitude,
+                "geohash": geo.encode_geohash(latitude, longitude, GEOHASH_PRECISION),
+                "comment": "Synthetic assistance",
+                "incident_type": rng.choice(incident_types),
+                "status": rng.choice(statuses),
+            }
+            for latitude, longitude in (data.gps_point() for _ in range(assistances))
+        ),
+    )
+    _insert(
+        engine,
+        Feedback,
+        (
+            {**_base_row(), "user_id": rng.choice(user_ids) if user_ids else None, "message": f"Feedback {index}"}
+            for index in range(assistances if feedbacks is None else feedbacks)
+        ),
+    )
+    _insert(
+        engine,
+        EmergencyContact,
+        ({**_base_row(), "name": f"Contact {index}", "number": f"{index:06d}"} for index in range(50)),
+    )
+    _insert(
+        engine,
+        Faq,
+        ({**_base_row(), "question": f"Question {index}?", "answer": f"Answer {index}."} for index in range(50)),
+    )
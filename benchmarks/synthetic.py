@@ -0,0 +1,105 @@
+"""
+Deterministic synthetic data for the benchmarks.
+
+Values derived from an index (emails, plates, chassis numbers) are unique per index
+and the same in every process for a given seed, so a load generator can address
+the rows a server process seeded without sharing any state with it.
+"""
+import math
+import random
+import string
+
+# Letters allowed in a VIN, I, O and Q are excluded
+VIN_LETTERS = "ABCDEFGHJKLMNPRSTUVWXYZ"
+VIN_VALUES = {
+    **{str(digit): digit for digit in range(10)},
+    **dict(zip("ABCDEFGH", range(1, 9))),
+    **dict(zip("JKLMN", range(1, 6))),
+    "P": 7,
+    "R": 9,
+    **dict(zip("STUVWXYZ", range(2, 10))),
+}
+VIN_WEIGHTS = (8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2)
+# Model year codes, 2010 to 2030
+VIN_YEARS = "ABCDEFGHJKLMNPRSTVWXY"
+
+PASSWORD = "load-test-password"
+# Dakar, the default center of the GPS points
+DEFAULT_CENTER = (14.6928, -17.4467)
+
+
+def vin_check_digit(vin: str) -> str:
+    """The check digit (9th character) of a 17 characters VIN."""
+    total = sum(VIN_VALUES[character] * weight for character, weight in zip(vin, VIN_WEIGHTS))
+    remainder = total % 11
+    return "X" if remainder == 10 else str(remainder)
+
+
+def is_valid_vin(vin: str) -> bool:
+    return (
+        len(vin) == 17
+        and all(character in VIN_VALUES for character in vin)
+        and vin[8] == vin_check_digit(vin)
+    )
+
+
+class SyntheticData:
+    """Generates users, vehicle identifications and GPS points from a seed."""
+
+    def __init__(self, seed: int = 0) -> None:
+        self.seed = seed
+        self._random = random.Random(seed)
+
+    def _indexed(self, index: int, kind: str) -> random.Random:
+        return random.Random(f"{self.seed}:{kind}:{index}")
+
+    def email(self, index: int) -> str:
+        return f"user{index}@load.test"
+
+    def name(self, index: int) -> str:
+        return f"User {index}"
+
+    def plate_number(self, index: int) -> str:
+        """A plate like `AB-123-CD`, unique for indexes below 26^4 * 1000."""
+        number, index = index % 1000, index // 1000
+        letters = []
+        for _ in range(4):
+            index, letter = divmod(index, 26)
+            letters.append(string.ascii_uppercase[letter])
+        return f"{letters[0]}{letters[1]}-{number:03d}-{letters[2]}{letters[3]}"
+
+    def chassis_number(self, index: int) -> str:
+        """A VIN with a valid check digit, unique for indexes below 23 * 10^6."""
+        rng = self._indexed(index, "vin")
+        manufacturer = "".join(rng.choice(VIN_LETTERS) for _ in range(3))
+        descriptor = "".join(rng.choice(VIN_LETTERS + string.digits) for _ in range(5))
+        year = rng.choice(VIN_YEARS)
+        plant = VIN_LETTERS[index // 1_000_000 % len(VIN_LETTERS)]
+        serial = f"{index % 1_000_000:06d}"
+        vin = f"{manufacturer}{descriptor}0{year}{plant}{serial}"
+        return vin[:8] + vin_check_digit(vin) + vin[9:]
+
+    def identification(self, index: int) -> dict[str, str]:
+        return {
+            "chassis_number": self.chassis_number(index),
+            "plate_number": self.plate_number(index),
+            "type": self._indexed(index, "type").choice(("car", "truck", "motorcycle", "bus")),
+        }
+
+    def gps_point(
+        self,
+        center: tuple[float, float] = DEFAULT_CENTER,
+        spread_km: float = 10,
+        rng: random.Random | None = None,
+    ) -> tuple[float, float]:
+        """A point around `center`, normally distributed with `spread_km` standard deviation."""
+        rng = rng or self._random
+        latitude, longitude = center
+        north = rng.gauss(0, spread_km) / 111.32
+        east = rng.gauss(0, spread_km) / (111.32 * math.cos(math.radians(latitude)))
+        return round(latitude + north, 6), round(longitude + east, 6)
+
+    def gps_points(
+        self, count: int, center: tuple[float, float] = DEFAULT_CENTER, spread_km: float = 10
+    ) -> list[tuple[float, float]]:
+        return [self.gps_point(center, spread_km) for _ in range(count)]
@@ -1,22 +1,20 @@
-from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
 from fastapi import Request
 
 from app import create_app
 from app.config.config import config
-from app.db.database import create_db_and_tables
-from app.data.models import User 
-
-create_db_and_tables()
+from app.config.page import CachedPage
+from app.data.models import User
 
 app = create_app()
 
-templates = Jinja2Templates(directory="static")
+# The landing page has no per-request data, it is rendered once (again on change in dev)
+landing_page = CachedPage(directory="static", template="index.html", auto_reload=config.ENVIRONMENT == "dev")
 
 
-@app.get('/', response_class=HTMLResponse)
+@app.api_route('/', methods=["GET", "HEAD"], response_class=HTMLResponse)
 async def root(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+    return landing_page.response(request)
 
 
 if __name__ == '__main__':
@@ -26,4 +24,7 @@ if __name__ == '__main__':
         uvicorn.run("main:app", reload=True, port=int(config.SERVER_PORT), host=config.SERVER_HOST)
 
     else:
-        uvicorn.run("main:app", port=int(config.SERVER_PORT), host=config.SERVER_HOST)
+        from app.server import serve
+
+        # Imported by the server, once or in every worker as SERVER_PRELOAD says
+        serve()
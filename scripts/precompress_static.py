@@ -0,0 +1,72 @@
+"""
+Writes the `.gz` (and `.br`, when brotli is installed) siblings of the static files
+served by `PrecompressedStaticFiles`, so they are not compressed per request.
+
+Files already compressed, smaller than the threshold or that do not shrink are skipped.
+
+Usage:
+    python scripts/precompress_static.py static --minimum-size 256
+"""
+import argparse
+import gzip
+import os
+from mimetypes import guess_type
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSED_SUFFIXES = (".gz", ".br")
+TEXT_MEDIA_TYPES = ("application/javascript", "application/json", "application/xml", "image/svg+xml")
+
+
+def is_text(path: str) -> bool:
+    media_type = guess_type(path)[0] or ""
+    return media_type.startswith("text/") or media_type in TEXT_MEDIA_TYPES
+
+
+def write_sibling(path: str, suffix: str, body: bytes, source_size: int, stat_result: os.stat_result) -> bool:
+    if len(body) >= source_size:
+        return False
+    with open(path + suffix, "wb") as file:
+        file.write(body)
+    # Same modification time as the source, the static mount ignores older siblings
+    os.utime(path + suffix, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns))
+    return True
+
+
+def precompress(directory: str, minimum_size: int) -> list[str]:
+    written = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            if name.endswith(COMPRESSED_SUFFIXES) or not is_text(path):
+                continue
+            stat_result = os.stat(path)
+            if stat_result.st_size < minimum_size:
+                continue
+            with open(path, "rb") as file:
+                source = file.read()
+
+            if write_sibling(path, ".gz", gzip.compress(source, compresslevel=9, mtime=0), len(source), stat_result):
+                written.append(path + ".gz")
+            if brotli is not None and write_sibling(
+                path, ".br", brotli.compress(source, quality=11), len(source), stat_result
+            ):
+                written.append(path + ".br")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", nargs="?", default="static")
+    parser.add_argument("--minimum-size", type=int, default=256)
+    args = parser.parse_args()
+
+    for path in precompress(args.directory, args.minimum_size):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()